@@ -0,0 +1,199 @@
+import asyncio
+import concurrent.futures
+import logging
+import os
+import sys
+import threading
+import time
+from ffmpeg_ingest import AsyncFFmpegIngest
+
+log = logging.getLogger("async_engine")
+
+
+def cpu_budget(variable, minimum=2):
+    """positive int from the environment variable, else the CPU count (at least `minimum`).
+
+    Read at import time by the supervisors: a bad value is logged and ignored
+    instead of making the whole application fail to start.
+    """
+    default = max(minimum, os.cpu_count() or minimum)
+    value = os.environ.get(variable, "").strip()
+    if not value:
+        return default
+    try:
+        count = int(value)
+    except ValueError:
+        count = -1
+    if count > 0:
+        return count
+    if count < 0:  # 0: the CPU count, as when unset
+        log.warning(f"{variable}={value!r} is not a positive integer, using the CPU count ({default})")
+    return default
+
+
+# frame analysis threads of the asyncio engine (defaults to the CPU count, like the supervisor worker budget)
+DEFAULT_ANALYSIS_WORKERS = cpu_budget("SUPERVISION_MAX_WORKERS")
+
+
+def _pidfd_supported():
+    try:
+        os.close(os.pidfd_open(os.getpid()))
+        return True
+    except (AttributeError, OSError):
+        return False
+
+
+class AsyncEngine:
+    """Runs the ffmpeg ingest of every monitor on one asyncio event loop.
+
+    Subprocess pipes, reconnect timers and frame timeouts are handled by the
+    loop thread with non-blocking I/O; the CPU-heavy analysis of a frame
+    (StreamMonitor.on_frame) runs in a fixed-size thread pool. The thread count
+    therefore stays constant whatever the number of channels. A channel has at
+    most one frame in analysis, newer frames replace the waiting one.
+    """
+
+    def __init__(self, max_workers=None, ingest_class=AsyncFFmpegIngest):
+        self.max_workers = max_workers or DEFAULT_ANALYSIS_WORKERS
+        self.ingest_class = ingest_class
+        self.executor = None
+        self.loop = None
+        self._thread = None
+        self._tasks = {}  # monitor -> asyncio task, only used from the loop thread
+        self._running = set()  # monitors with a task, readable from any thread
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self.executor = concurrent.futures.ThreadPoolExecutor(self.max_workers, thread_name_prefix="Analysis")
+            self.loop = asyncio.new_event_loop()
+            ready = threading.Event()
+            self._thread = threading.Thread(target=self._run_loop, args=(ready,), daemon=True, name="AsyncEngine")
+            self._thread.start()
+            ready.wait()
+
+    def _run_loop(self, ready):
+        asyncio.set_event_loop(self.loop)
+        if sys.platform != "win32" and sys.version_info < (3, 12) and _pidfd_supported():
+            # the default child watcher of Python < 3.12 starts one thread per subprocess
+            watcher = asyncio.PidfdChildWatcher()
+            watcher.attach_loop(self.loop)
+            asyncio.set_child_watcher(watcher)
+        self.loop.call_soon(ready.set)
+        self.loop.run_forever()
+
+    def stop(self, timeout=10):
+        """cancels every channel, then stops the loop and the analysis threads."""
+        with self._lock:
+            thread, loop = self._thread, self.loop
+            self._thread = None
+        if thread is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._cancel_all(), loop).result(timeout)
+        except concurrent.futures.TimeoutError:
+            log.warning("some channels did not stop in time")
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout)
+        loop.close()
+        self.executor.shutdown(wait=True)
+
+    def run(self, monitor, delay=0):
+        """starts supervising a monitor (from any thread)."""
+        self.start()
+        with self._lock:
+            if monitor in self._running:
+                return
+            self._running.add(monitor)
+        self.loop.call_soon_threadsafe(self._create_task, monitor, delay)
+
+    def cancel(self, monitor, wait=True, timeout=10):
+        with self._lock:
+            if monitor not in self._running or self._thread is None:
+                return
+        future = asyncio.run_coroutine_threadsafe(self._cancel(monitor), self.loop)
+        if wait:
+            future.result(timeout)
+
+    def is_running(self, monitor):
+        return monitor in self._running
+
+    def channel_count(self):
+        return len(self._running)
+
+    def _create_task(self, monitor, delay):
+        task = self.loop.create_task(self._supervise(monitor, delay), name=f"Supervise-{monitor.channel_name}")
+        self._tasks[monitor] = task
+        task.add_done_callback(lambda _: self._finished(monitor, task))
+
+    def _finished(self, monitor, task):
+        if self._tasks.get(monitor) is task:
+            del self._tasks[monitor]
+            with self._lock:
+                self._running.discard(monitor)
+        if not task.cancelled() and task.exception() is not None:
+            log.error(f"supervision of {monitor.channel_name} crashed: {task.exception()}")
+
+    async def _cancel(self, monitor):
+        task = self._tasks.get(monitor)
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def _cancel_all(self):
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _start_ingest(self, monitor):
+        ingest = monitor.ingest = monitor.create_ingest(self.ingest_class)
+        return ingest, asyncio.create_task(ingest.run(), name=f"Ingest-{monitor.channel_name}")
+
+    async def _supervise(self, monitor, delay):
+        # staggered start: avoids every channel opening its stream at the same instant
+        if delay:
+            await asyncio.sleep(delay)
+        loop = asyncio.get_running_loop()
+        ingest, reader = self._start_ingest(monitor)
+        backoff = ingest.reconnect_delay
+        no_frame_since = time.time()
+        try:
+            while monitor.running:
+                try:
+                    if reader.done():
+                        # ingest.run() only returns when cancelled: it crashed
+                        error = None if reader.cancelled() else reader.exception()
+                        raise RuntimeError(f"ingest stopped: {error}")
+                    frame, frame_time = await ingest.read(timeout=1.0)
+                    now = time.time()
+                    if frame is None:
+                        no_frame_since = monitor.on_no_frame(now, no_frame_since)
+                        continue
+                    no_frame_since = now
+                    backoff = ingest.reconnect_delay
+                    try:
+                        await loop.run_in_executor(self.executor, monitor.on_frame, frame, frame_time)
+                    except Exception as e:
+                        monitor._log_event(f"Exception in monitor_loop: {e}")
+                except Exception as e:
+                    # the channel is never dropped: a new ingest is started with the reconnect backoff
+                    monitor._log_event(f"Exception in monitor_loop: {e}, ingest restarted in {backoff}s")
+                    reader.cancel()
+                    await asyncio.gather(reader, return_exceptions=True)
+                    await asyncio.sleep(backoff)
+                    backoff = min(backoff * 2, ingest.max_reconnect_delay)
+                    ingest, reader = self._start_ingest(monitor)
+                    no_frame_since = time.time()
+        finally:
+            reader.cancel()
+            await asyncio.gather(reader, return_exceptions=True)
+            # the conditions are no longer observed once the monitor stops
+            monitor.close_all_episodes()
+            monitor.close_frame_ring()
+
+    def stats(self):
+        return {"channels": len(self._running), "analysis_workers": self.max_workers,
+                "threads": threading.active_count()}
@@ -0,0 +1,67 @@
+import numpy as np
+
+# defaults, can be overridden per channel in channels.json
+DEFAULT_SAMPLE_RATE = 16000
+DEFAULT_SILENCE_THRESHOLD_DB = -40.0
+DEFAULT_SILENCE_MIN_DURATION = 10.0
+DEFAULT_WINDOW = 0.1  # seconds per RMS window
+
+
+def dbfs_windows(samples, window):
+    """RMS level in dBFS of each complete window of signed 16-bit samples (vectorized)."""
+    n = len(samples) // window
+    if n == 0:
+        return np.empty(0, dtype=np.float32)
+    x = samples[:n * window].reshape(n, window).astype(np.float32)
+    rms = np.sqrt(np.mean(x * x, axis=1)) / 32768.0
+    return 20.0 * np.log10(np.maximum(rms, 1e-10))
+
+
+class SilenceTracker:
+    """Continuous silence state computed from PCM chunks, in stream time (samples), not wall clock."""
+
+    def __init__(self, sample_rate=DEFAULT_SAMPLE_RATE, threshold_db=DEFAULT_SILENCE_THRESHOLD_DB,
+                 min_duration=DEFAULT_SILENCE_MIN_DURATION, window=DEFAULT_WINDOW):
+        self.sample_rate = sample_rate
+        self.threshold_db = threshold_db
+        self.min_duration = min_duration
+        self.window = max(1, int(sample_rate * window))
+        self.window_duration = self.window / sample_rate
+        self.stream_time = 0.0  # seconds of audio analysed
+        self.silent_since = None  # stream time at which the current silence started
+        self.level_db = None  # level of the last window
+        self._remainder = np.empty(0, dtype=np.int16)
+
+    def reset(self):
+        self.stream_time = 0.0
+        self.silent_since = None
+        self.level_db = None
+        self._remainder = np.empty(0, dtype=np.int16)
+
+    def feed(self, samples):
+        if len(self._remainder):
+            samples = np.concatenate((self._remainder, samples))
+        levels = dbfs_windows(samples, self.window)
+        used = len(levels) * self.window
+        self._remainder = samples[used:].copy()
+        if not len(levels):
+            return
+        chunk_start = self.stream_time
+        loud = np.flatnonzero(levels >= self.threshold_db)
+        if len(loud):
+            last = loud[-1]
+            self.silent_since = None if last == len(levels) - 1 else chunk_start + (last + 1) * self.window_duration
+        elif self.silent_since is None:
+            self.silent_since = chunk_start
+        self.stream_time = chunk_start + len(levels) * self.window_duration
+        self.level_db = float(levels[-1])
+
+    @property
+    def silence_duration(self):
+        if self.silent_since is None:
+            return 0.0
+        return self.stream_time - self.silent_since
+
+    @property
+    def is_silent(self):
+        return self.silence_duration >= self.min_duration
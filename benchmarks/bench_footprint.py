@@ -0,0 +1,106 @@
+"""Memory and CPU footprint per channel of the headless daemon, compared with the GUI build.
+
+Each build is started on the same channels.json, left to warm up, then sampled
+(process tree: the Python process, its ffmpeg decoders and the moderation
+service). The GUI is killed at the end of its run, the daemon gets a SIGTERM.
+Requires the optional psutil package.
+
+usage: python benchmarks/bench_footprint.py [--channels channels.json] [--warmup 30] [--duration 60] [--no-gui]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def tree(process):
+    try:
+        return [process] + process.children(recursive=True)
+    except psutil.NoSuchProcess:
+        return []
+
+
+def cpu_seconds(processes):
+    total = 0.0
+    for p in processes:
+        try:
+            times = p.cpu_times()
+            total += times.user + times.system
+        except psutil.NoSuchProcess:
+            pass
+    return total
+
+
+def rss(processes):
+    total = 0
+    for p in processes:
+        try:
+            total += p.memory_info().rss
+        except psutil.NoSuchProcess:
+            pass
+    return total
+
+
+def measure(cmd, warmup, duration, terminate):
+    proc = subprocess.Popen(cmd, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    process = psutil.Process(proc.pid)
+    try:
+        time.sleep(warmup)
+        # cpu_times of children that exit are lost: take the tree at both ends of the window
+        start_cpu, start = cpu_seconds(tree(process)), time.monotonic()
+        peak = 0
+        while time.monotonic() - start < duration:
+            peak = max(peak, rss(tree(process)))
+            time.sleep(1)
+        cpu = (cpu_seconds(tree(process)) - start_cpu) / (time.monotonic() - start)
+        return {"rss_mb": peak / 2 ** 20, "cpu_percent": cpu * 100}
+    finally:
+        terminate(proc)
+        try:
+            proc.wait(30)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def sigterm(proc):
+    proc.terminate()  # SIGTERM on POSIX
+
+
+def kill(proc):
+    for p in reversed(tree(psutil.Process(proc.pid))):
+        try:
+            p.kill()
+        except psutil.NoSuchProcess:
+            pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--channels", default=os.path.join(ROOT, "channels.json"))
+    parser.add_argument("--warmup", type=float, default=30)
+    parser.add_argument("--duration", type=float, default=60)
+    parser.add_argument("--no-gui", action="store_true", help="only measure the headless daemon")
+    args = parser.parse_args()
+    if psutil is None:
+        sys.exit("this benchmark requires psutil (pip install psutil)")
+    with open(args.channels, encoding="utf-8") as f:
+        count = len(json.load(f))
+
+    builds = [("headless", [sys.executable, "headless.py", "--channels", os.path.abspath(args.channels)], sigterm)]
+    if not args.no_gui:
+        # the GUI always reads ./channels.json
+        builds.append(("gui", [sys.executable, "main.py"], kill))
+    print(f"channels: {count}, warm-up {args.warmup:g}s, measured over {args.duration:g}s")
+    for name, cmd, terminate in builds:
+        result = measure(cmd, args.warmup, args.duration, terminate)
+        print(f"{name:9s}: {result['rss_mb']:8.1f} MB RSS ({result['rss_mb'] / count:6.1f} MB/channel), "
+              f"{result['cpu_percent']:6.1f}% CPU ({result['cpu_percent'] / count:5.1f}%/channel)")
@@ -0,0 +1,66 @@
+"""CPU time per 1080p frame of the black / frozen checks, full-resolution path vs luma thumbnail path.
+
+usage: python benchmarks/bench_luma_analysis.py [frames]
+"""
+import os
+import sys
+import time
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from frame_analysis import LumaAnalyzer, is_black, is_frozen  # noqa: E402
+
+
+def make_frames(count, width=1920, height=1080):
+    # a few noisy 1080p frames, alternating so that the frozen check sees changes
+    rng = np.random.default_rng(0)
+    base = rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+    frames = []
+    for i in range(count):
+        frame = base.copy()
+        cv2.putText(frame, str(i), (100, 500), cv2.FONT_HERSHEY_SIMPLEX, 8, (255, 255, 255), 12)
+        frames.append(frame)
+    return frames
+
+
+def full_resolution(frames):
+    # detection code as it was in StreamMonitor.monitor_loop
+    last_frame = None
+    for frame in frames:
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        np.mean(gray) < 10
+        if last_frame is not None:
+            diff = cv2.absdiff(frame, last_frame)
+            np.count_nonzero(diff) < 1000
+        last_frame = frame.copy()
+
+
+def luma_thumbnail(frames):
+    analyzer = LumaAnalyzer()
+    for frame in frames:
+        mean, changed = analyzer.update(frame)
+        is_black(mean)
+        is_frozen(changed)
+
+
+def measure(func, frames, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.process_time()
+        func(frames)
+        elapsed = (time.process_time() - start) / len(frames)
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    cv2.setNumThreads(1)  # per-frame CPU cost, not multi-core wall time
+    frames = make_frames(count)
+    before = measure(full_resolution, frames)
+    after = measure(luma_thumbnail, frames)
+    print(f"frames: {count} x 1920x1080")
+    print(f"full resolution : {before * 1000:8.3f} ms CPU / frame")
+    print(f"luma thumbnail  : {after * 1000:8.3f} ms CPU / frame")
+    print(f"speed-up        : {before / after:8.1f}x")
@@ -0,0 +1,96 @@
+"""Analysis throughput of a fixed set of channels spread over 1..N worker processes (sharding.py).
+
+Every channel is a synthetic stream generated by ffmpeg in real time (lavfi test
+pattern + sine audio), decoded and analysed by the real ingest and detectors
+(moderation off). --work-ms adds pure Python work per analysed frame, holding
+the GIL like the Python part of the detectors: in one process the channels
+share one interpreter, sharded they run on several cores. The channels are
+given more frames than one core can analyse, so the total analysed fps shows
+the scaling (near-linear up to the number of physical cores).
+Incidents and logs go to a temporary directory.
+
+usage: python benchmarks/bench_sharding.py [--processes 1,2,4] [--channels 16] [--duration 20] [--fps 10]
+                                           [--size 480x270] [--work-ms 20] [--engine asyncio|threads]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# data/ and channel logs of the run, shared with the worker processes (which re-import this module)
+os.chdir(os.environ.setdefault("BENCH_SHARDING_DIR", tempfile.mkdtemp(prefix="bench_sharding_")))
+os.environ.setdefault("EVENT_LOG_DIR", os.getcwd())
+
+from stream_monitor import StreamMonitor  # noqa: E402
+from ffmpeg_ingest import FFmpegIngest, AsyncFFmpegIngest  # noqa: E402
+from sharding import ShardedSupervisor  # noqa: E402
+
+WORK_MS = float(os.environ.get("BENCH_WORK_MS", 20))  # read by the workers too
+
+
+class LavfiMixin:
+    def build_command(self):
+        # the "URL" is a lavfi graph, generated at its native rate like a live stream
+        cmd = super().build_command()
+        i = cmd.index('-i')
+        return cmd[:i] + ['-re', '-f', 'lavfi'] + cmd[i:]
+
+
+class LavfiIngest(LavfiMixin, FFmpegIngest):
+    pass
+
+
+class AsyncLavfiIngest(LavfiMixin, AsyncFFmpegIngest):
+    pass
+
+
+class BenchMonitor(StreamMonitor):
+    def create_ingest(self, ingest_class=FFmpegIngest):
+        return super().create_ingest(AsyncLavfiIngest if issubclass(ingest_class, AsyncFFmpegIngest) else LavfiIngest)
+
+    def _analyse_frame(self, frame, now):
+        end = time.perf_counter() + WORK_MS / 1000
+        while time.perf_counter() < end:  # GIL-bound, like the Python side of the detectors
+            pass
+        return super()._analyse_frame(frame, now)
+
+
+def run(processes, count, duration, fps, width, height, engine):
+    graph = f"testsrc2=size={width}x{height}:rate={fps}[out0];sine=frequency=440:sample_rate=16000[out1]"
+    config = {"moderation": False, "evidence": False, "detectors": {"logo": {"enabled": False}},
+              "analysis_fps": fps, "analysis_width": width, "analysis_height": height}
+    channels = [dict(config, name=f"bench-{i}", url=graph, db_name="bench.db") for i in range(count)]
+    supervisor = ShardedSupervisor(channels, processes=processes, engine=engine, monitor_class=BenchMonitor)
+    time.sleep(8 + count * 0.2 / processes)  # warm-up: workers spawned, every ffmpeg started and connected
+    frames, started = supervisor.frames_analysed(), time.monotonic()
+    time.sleep(duration)
+    rate = (supervisor.frames_analysed() - frames) / (time.monotonic() - started)
+    supervisor.stop_all()
+    return rate
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--processes", default="1,2,4", help="comma-separated worker process counts")
+    parser.add_argument("--channels", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20, help="measured seconds per process count")
+    parser.add_argument("--fps", type=float, default=10)
+    parser.add_argument("--size", default="480x270")
+    parser.add_argument("--work-ms", type=float, default=WORK_MS, help="pure Python work per analysed frame")
+    parser.add_argument("--engine", choices=("asyncio", "threads"), default="asyncio")
+    args = parser.parse_args()
+    os.environ["BENCH_WORK_MS"] = str(args.work_ms)
+    WORK_MS = args.work_ms
+    width, height = (int(v) for v in args.size.split("x"))
+
+    print(f"{args.channels} channels, {args.engine} engine, {args.size} @ {args.fps:g} fps, "
+          f"{args.work_ms:g} ms of Python per frame, {os.cpu_count()} CPUs")
+    print(f"{'processes':>9} {'frames/s':>9} {'speed-up':>9}")
+    baseline = None
+    for processes in (int(p) for p in args.processes.split(",")):
+        rate = run(processes, args.channels, args.duration, args.fps, width, height, args.engine)
+        baseline = baseline or rate
+        print(f"{processes:9d} {rate:9.1f} {rate / baseline:8.2f}x")
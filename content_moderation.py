@@ -1,47 +1,248 @@
-import os
+import threading
+import collections
+import time
 import cv2
 import numpy as np
-import pytesseract
-from nudenet import NudeDetector
+import ocr_pool
+from logo_index import LogoIndex
 from PIL import Image
 
-detector = NudeDetector()  # downloads the model the first time
+# the NSFW model is loaded on first use (or by warmup()), never at import time:
+# importing nudenet/onnxruntime and building the detector (which may download the model) takes seconds
+_detector = None
+_detector_lock = threading.Lock()
+detector_load_time = None  # seconds it took to load the model
 
-def detect_nsfw(frame):
-    rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    # we pass the numpy RGB array directly to NudeDetector
-    result = detector.detect(rgb)
-    nsfw_labels = {"EXPOSED_ANUS", "EXPOSED_BREAST_F", "EXPOSED_GENITALIA_F", "EXPOSED_GENITALIA_M", "EXPOSED_BUTTOCKS_F", "EXPOSED_BUTTOCKS_M"}
+
+def get_detector():
+    global _detector, detector_load_time
+    if _detector is None:
+        with _detector_lock:
+            if _detector is None:
+                started = time.perf_counter()
+                from nudenet import NudeDetector
+                _detector = NudeDetector()  # downloads the model the first time
+                detector_load_time = time.perf_counter() - started
+    return _detector
+
+
+def warmup(on_ready=None):
+    """loads the NSFW model in a background thread; on_ready(seconds) is called once it is ready."""
+    def load():
+        get_detector()
+        if on_ready:
+            on_ready(detector_load_time)
+    thread = threading.Thread(target=load, daemon=True, name="ModerationWarmup")
+    thread.start()
+    return thread
+
+# perceptual hash gate: inference is skipped when the frame is nearly identical to the last analysed one
+HASH_SIZE = 16  # 16x16 difference hash = 256 bits
+GATE_MAX_DISTANCE = 6  # bits that may differ between two frames considered identical
+CACHE_SIZE = 512  # results kept per detector, keyed by hash
+
+_MISS = object()
+
+
+def perceptual_hash(frame, hash_size=HASH_SIZE):
+    """difference hash (dHash) of a BGR frame, as an int."""
+    small = cv2.resize(frame, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    bits = gray[:, 1:] > gray[:, :-1]
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+class ModerationCache:
+    """Gate on the last analysed frame of each caller + bounded LRU of results keyed by hash."""
+
+    def __init__(self, maxsize=CACHE_SIZE, max_distance=GATE_MAX_DISTANCE):
+        self.maxsize = maxsize
+        self.max_distance = max_distance
+        self._lru = collections.OrderedDict()
+        self._last = {}  # caller key -> (hash, result)
+        self._lock = threading.Lock()
+        self.gate_hits = 0
+        self.cache_hits = 0
+        self.misses = 0
+
+    def lookup(self, frame_hash, key=None):
+        with self._lock:
+            last = self._last.get(key)
+            if last is not None and bin(last[0] ^ frame_hash).count('1') <= self.max_distance:
+                self.gate_hits += 1
+                return last[1]
+            if frame_hash in self._lru:
+                self._lru.move_to_end(frame_hash)
+                self.cache_hits += 1
+                result = self._lru[frame_hash]
+                self._last[key] = (frame_hash, result)
+                return result
+            self.misses += 1
+            return _MISS
+
+    def store(self, frame_hash, result, key=None):
+        with self._lock:
+            self._lru[frame_hash] = result
+            self._lru.move_to_end(frame_hash)
+            while len(self._lru) > self.maxsize:
+                self._lru.popitem(last=False)
+            self._last[key] = (frame_hash, result)
+
+    def stats(self):
+        with self._lock:
+            hits = self.gate_hits + self.cache_hits
+            total = hits + self.misses
+            return {
+                "gate_hits": self.gate_hits,
+                "cache_hits": self.cache_hits,
+                "misses": self.misses,
+                "hit_rate": hits / total if total else 0.0,
+            }
+
+
+nsfw_cache = ModerationCache()
+text_cache = ModerationCache()
+
+
+def cache_stats():
+    """hit rate of the moderation gate/cache, i.e. the share of inferences saved."""
+    return {"nsfw": nsfw_cache.stats(), "forbidden_text": text_cache.stats()}
+
+
+def detect_nsfw(frame, key=None):
+    """highest NSFW score of the frame; key identifies the caller (channel) for the scene-change gate."""
+    frame_hash = perceptual_hash(frame)
+    cached = nsfw_cache.lookup(frame_hash, key)
+    if cached is not _MISS:
+        return cached
+    score = _nsfw_score(frame)
+    nsfw_cache.store(frame_hash, score, key)
+    return score
+
+
+def detect_nsfw_async(frame, callback, service, key=None):
+    """same as detect_nsfw, but inference goes through the batched ModerationService.
+
+    callback(score) is called immediately on a gate/cache hit, otherwise from the
+    service collector thread (score is None if inference failed). Returns False
+    if the frame could not be queued.
+    """
+    frame_hash = perceptual_hash(frame)
+    cached = nsfw_cache.lookup(frame_hash, key)
+    if cached is not _MISS:
+        callback(cached)
+        return True
+
+    def on_result(score, error):
+        if error is None:
+            nsfw_cache.store(frame_hash, score, key)
+        callback(score if error is None else None)
+    return service.submit(frame, on_result)
+
+
+nsfw_labels = {"EXPOSED_ANUS", "EXPOSED_BREAST_F", "EXPOSED_GENITALIA_F", "EXPOSED_GENITALIA_M", "EXPOSED_BUTTOCKS_F", "EXPOSED_BUTTOCKS_M"}
+
+
+def _score_detections(result):
     nsfw_score = 0.0
     for det in result:
         if 'label' in det and det['label'] in nsfw_labels:
             nsfw_score = max(nsfw_score, det.get('score', 0.0))
     return nsfw_score
 
-def detect_forbidden_text(frame, blacklist=None):
+
+def _nsfw_score(frame):
+    rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    # we pass the numpy RGB array directly to NudeDetector
+    return _score_detections(get_detector().detect(rgb))
+
+
+def nsfw_scores_batch(frames):
+    """NSFW score of several BGR frames with one batched ONNX inference when the detector supports it."""
+    rgbs = [cv2.cvtColor(frame, cv2.COLOR_BGR2RGB) for frame in frames]
+    detector = get_detector()
+    if hasattr(detector, 'detect_batch'):
+        results = detector.detect_batch(rgbs, batch_size=len(rgbs))
+    else:
+        results = [detector.detect(rgb) for rgb in rgbs]
+    return [_score_detections(result) for result in results]
+
+DEFAULT_BLACKLIST = ['no signal', 'error', 'forbidden']
+
+
+def _regions_hash(crops):
+    # one hash per region, concatenated: a change in a small ticker is not diluted in the whole picture
+    value = 0
+    for crop in crops:
+        small = cv2.resize(crop, (HASH_SIZE + 1, HASH_SIZE), interpolation=cv2.INTER_AREA)
+        bits = small[:, 1:] > small[:, :-1]
+        value = (value << (HASH_SIZE * HASH_SIZE)) | int.from_bytes(np.packbits(bits).tobytes(), 'big')
+    return value
+
+
+def _match_blacklist(text, blacklist):
+    return [mot for mot in blacklist if mot in text]
+
+
+def detect_forbidden_text(frame, blacklist=None, key=None, regions=None):
+    """blacklisted words found by OCR in the configured regions of the frame (see ocr_pool.DEFAULT_OCR_REGIONS)."""
+    if blacklist is None:
+        blacklist = DEFAULT_BLACKLIST
+    crops = ocr_pool.crop_regions(frame, regions)
+    # the OCR text is cached, not the matches, so that callers may use different blacklists
+    frame_hash = _regions_hash(crops)
+    text = text_cache.lookup(frame_hash, key)
+    if text is _MISS:
+        text = ocr_pool.ocr_crops(crops).lower()
+        text_cache.store(frame_hash, text, key)
+    return _match_blacklist(text, blacklist)
+
+
+def detect_forbidden_text_async(frame, callback, pool, blacklist=None, key=None, regions=None):
+    """same as detect_forbidden_text, OCR running on the persistent OcrPool.
+
+    callback(found) is called immediately on a gate/cache hit, otherwise from an OCR
+    worker (found is None if OCR failed). Returns False if the pool is saturated.
+    """
     if blacklist is None:
-        blacklist = ['no signal', 'error', 'forbidden']
-    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-    text = pytesseract.image_to_string(gray).lower()
-    found = [mot for mot in blacklist if mot in text]
-    return found
-
-def detect_unauthorized_logo(frame, logos_dir='assets/logos_autorises/'):
-    """returns True if no authorized logo is detected in the frame."""
-    if not os.path.exists(logos_dir):
+        blacklist = DEFAULT_BLACKLIST
+    crops = ocr_pool.crop_regions(frame, regions)
+    frame_hash = _regions_hash(crops)
+    text = text_cache.lookup(frame_hash, key)
+    if text is not _MISS:
+        callback(_match_blacklist(text, blacklist))
+        return True
+    future = pool.submit(crops)
+    if future is None:
+        return False
+
+    def on_done(done):
+        if done.exception() is not None:
+            callback(None)
+            return
+        text = done.result().lower()
+        text_cache.store(frame_hash, text, key)
+        callback(_match_blacklist(text, blacklist))
+    future.add_done_callback(on_done)
+    return True
+
+LOGOS_DIR = 'assets/logos_autorises/'
+_logo_indexes = {}  # logos directory -> LogoIndex, built once and reloaded when the directory changes
+_logo_lock = threading.Lock()
+
+
+def get_logo_index(logos_dir=LOGOS_DIR):
+    with _logo_lock:
+        index = _logo_indexes.get(logos_dir)
+        if index is None:
+            index = _logo_indexes[logos_dir] = LogoIndex(logos_dir)
+    return index
+
+
+def detect_unauthorized_logo(frame, logos_dir=LOGOS_DIR, regions=None):
+    """returns True if no authorized logo is detected in the frame regions (see logo_index.DEFAULT_LOGO_REGIONS)."""
+    index = get_logo_index(logos_dir)
+    index.refresh()
+    if not len(index):
         return False  # no logos to compare
-    found_logo = False
-    frame_gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-    for logo_name in os.listdir(logos_dir):
-        logo_path = os.path.join(logos_dir, logo_name)
-        if not os.path.isfile(logo_path):
-            continue
-        logo = cv2.imread(logo_path, cv2.IMREAD_GRAYSCALE)
-        if logo is None or logo.shape[0] > frame_gray.shape[0] or logo.shape[1] > frame_gray.shape[1]:
-            continue
-        res = cv2.matchTemplate(frame_gray, logo, cv2.TM_CCOEFF_NORMED)
-        min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(res)
-        if max_val > 0.8:
-            found_logo = True
-            break
-    return not found_logo 
\ No newline at end of file
+    return index.find(frame, regions) is None
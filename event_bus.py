@@ -0,0 +1,156 @@
+import collections
+import logging
+import threading
+
+# in-process publish / subscribe of the monitor events, without Qt.
+# Publishing never blocks: each subscriber has its own bounded queue, and either its own
+# delivery thread (callback) or polls the queue itself (get / drain, e.g. from a GUI timer).
+StatusEvent = collections.namedtuple("StatusEvent", "channel status previous ts")
+LogEvent = collections.namedtuple("LogEvent", "channel message stage latency ts")
+# frame: private copy of the analysed BGR frame (the ingest buffers are reused)
+FrameEvent = collections.namedtuple("FrameEvent", "channel frame ts")
+
+DEFAULT_QUEUE_SIZE = 1000  # events waiting per subscriber
+FRAME_QUEUE_SIZE = 2  # frames waiting per subscriber: only the latest pictures matter
+
+log = logging.getLogger("event_bus")
+
+
+class Subscription:
+    """Bounded queue of the events of one subscriber.
+
+    When the queue is full the new event is dropped, or the oldest one when
+    drop_oldest is set (frames). `dropped` counts the lost events.
+    """
+
+    def __init__(self, event_type, callback=None, channel=None, maxsize=DEFAULT_QUEUE_SIZE, drop_oldest=False,
+                 name=None):
+        self.event_type = event_type
+        self.callback = callback
+        self.channel = channel
+        self.maxsize = maxsize
+        self.drop_oldest = drop_oldest
+        self.name = name or getattr(callback, "__qualname__", event_type.__name__)
+        self.dropped = 0
+        self.delivered = 0
+        self.closed = False
+        self._events = collections.deque()
+        self._cond = threading.Condition()
+        self._thread = None
+        if callback is not None:
+            self._thread = threading.Thread(target=self._run, daemon=True, name=f"EventBus-{self.name}")
+            self._thread.start()
+
+    def matches(self, event):
+        return isinstance(event, self.event_type) and (self.channel is None or event.channel == self.channel)
+
+    def put(self, event):
+        with self._cond:
+            if self.closed:
+                return
+            if len(self._events) >= self.maxsize:
+                self.dropped += 1
+                if not self.drop_oldest:
+                    return
+                self._events.popleft()
+            self._events.append(event)
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """next event, or None after timeout seconds (or once closed)."""
+        with self._cond:
+            if not self._events and not self.closed:
+                self._cond.wait(timeout)
+            if not self._events:
+                return None
+            self.delivered += 1
+            return self._events.popleft()
+
+    def drain(self):
+        """every queued event, without waiting."""
+        with self._cond:
+            events = list(self._events)
+            self._events.clear()
+            self.delivered += len(events)
+        return events
+
+    def close(self, timeout=5):
+        with self._cond:
+            self.closed = True
+            self._events.clear()
+            self._cond.notify_all()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._events and not self.closed:
+                    self._cond.wait()
+                if self.closed:
+                    return
+                event = self._events.popleft()
+                self.delivered += 1
+            try:
+                self.callback(event)
+            except Exception as e:
+                log.error(f"event subscriber {self.name} failed on {type(event).__name__}: {e}")
+
+    def stats(self):
+        return {"pending": len(self._events), "delivered": self.delivered, "dropped": self.dropped}
+
+
+class EventBus:
+    """Dispatches the events of every monitor to the subscribers of their type (and channel)."""
+
+    def __init__(self):
+        self._subscriptions = ()  # replaced, never mutated: publish() reads it without lock
+        self._lock = threading.Lock()
+
+    def subscribe(self, event_type, callback=None, channel=None, maxsize=None, drop_oldest=None, name=None):
+        """subscribes to the events of a type, of one channel or of all (channel None).
+
+        callback: called in a delivery thread of the subscription; without callback,
+        read the events with get() / drain(). Frames default to a small drop-oldest queue.
+        """
+        is_frame = issubclass(event_type, FrameEvent)
+        if maxsize is None:
+            maxsize = FRAME_QUEUE_SIZE if is_frame else DEFAULT_QUEUE_SIZE
+        if drop_oldest is None:
+            drop_oldest = is_frame
+        subscription = Subscription(event_type, callback, channel, maxsize, drop_oldest, name)
+        with self._lock:
+            self._subscriptions = self._subscriptions + (subscription,)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions = tuple(s for s in self._subscriptions if s is not subscription)
+        subscription.close()
+
+    def publish(self, event):
+        for subscription in self._subscriptions:
+            if subscription.matches(event):
+                subscription.put(event)
+
+    def wants(self, event_type, channel=None):
+        """True when someone subscribed to these events (lets publishers skip building costly ones, e.g. frames)."""
+        return any(s.event_type is event_type and (s.channel is None or channel is None or s.channel == channel)
+                   for s in self._subscriptions)
+
+    def stats(self):
+        return {s.name: s.stats() for s in self._subscriptions}
+
+
+_bus = None
+_bus_lock = threading.Lock()
+
+
+def get_bus():
+    """process-wide bus used by the monitors."""
+    global _bus
+    if _bus is None:
+        with _bus_lock:
+            if _bus is None:
+                _bus = EventBus()
+    return _bus
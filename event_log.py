@@ -0,0 +1,154 @@
+import gzip
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import shutil
+import threading
+import time
+
+# channel event logs: stream_events_<channel>.log, one JSON object per line, rotated when larger than
+# MAX_BYTES or older than ROTATE_INTERVAL seconds; rotated files are gzip-compressed (.1.gz, .2.gz, ...)
+LOG_DIR = os.environ.get("EVENT_LOG_DIR", os.getcwd())
+MAX_BYTES = int(os.environ.get("EVENT_LOG_MAX_BYTES", 10 * 1024 * 1024))
+ROTATE_INTERVAL = int(os.environ.get("EVENT_LOG_ROTATE_INTERVAL", 24 * 3600))
+BACKUP_COUNT = int(os.environ.get("EVENT_LOG_BACKUPS", 14))
+MAX_PENDING = 10000  # records queued before new ones are dropped
+
+
+def log_filename(channel_name):
+    return os.path.join(LOG_DIR, f"stream_events_{channel_name.lower().replace(' ', '_')}.log")
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """one JSON object per record: ts, level, channel, stage, latency_ms (when known), msg."""
+
+    def format(self, record):
+        entry = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S") + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "channel": getattr(record, "channel", None),
+            "stage": getattr(record, "stage", None),
+        }
+        latency = getattr(record, "latency", None)
+        if latency is not None:
+            entry["latency_ms"] = round(latency * 1000, 1)
+        entry["msg"] = record.getMessage()
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class CompressingRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """RotatingFileHandler that also rotates on age and gzips the rotated files."""
+
+    def __init__(self, filename, max_bytes=MAX_BYTES, interval=ROTATE_INTERVAL, backup_count=BACKUP_COUNT):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8", delay=True)
+        self.interval = interval
+        self.namer = lambda name: name + ".gz"
+        self.rotator = self._compress
+        # an existing file keeps its age across restarts
+        started = os.path.getmtime(filename) if os.path.exists(filename) else time.time()
+        self.rollover_at = started + interval
+
+    @staticmethod
+    def _compress(source, dest):
+        with open(source, "rb") as fin, gzip.open(dest, "wb") as fout:
+            shutil.copyfileobj(fin, fout)
+        os.remove(source)
+
+    def shouldRollover(self, record):
+        if self.interval and time.time() >= self.rollover_at and os.path.exists(self.baseFilename):
+            return True
+        return super().shouldRollover(record)
+
+    def doRollover(self):
+        super().doRollover()
+        self.rollover_at = time.time() + self.interval
+
+
+class ChannelRouter(logging.Handler):
+    """writes each record to the file handler of its channel (created on first use)."""
+
+    def __init__(self):
+        super().__init__()
+        self.formatter = JsonLinesFormatter()
+        self.handlers = {}
+
+    def emit(self, record):
+        channel = getattr(record, "channel", None) or "unknown"
+        handler = self.handlers.get(channel)
+        if handler is None:
+            handler = self.handlers[channel] = CompressingRotatingFileHandler(log_filename(channel))
+            handler.setFormatter(self.formatter)
+        handler.handle(record)
+
+    def close(self):
+        for handler in self.handlers.values():
+            handler.close()
+        self.handlers.clear()
+        super().close()
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records instead of blocking when the writer is behind."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # the message is formatted by the writer thread: only merge the arguments here
+        record.msg = record.getMessage()
+        record.args = None
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_queue = queue.Queue(maxsize=MAX_PENDING)
+_queue_handler = _DroppingQueueHandler(_queue)
+_listener = None
+_lock = threading.Lock()
+
+
+def start():
+    """starts the thread writing the channel logs (idempotent)."""
+    global _listener
+    with _lock:
+        if _listener is None:
+            _listener = logging.handlers.QueueListener(_queue, ChannelRouter())
+            _listener.start()
+
+
+def stop():
+    """writes the queued records and closes the log files."""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            for handler in _listener.handlers:
+                handler.close()
+            _listener = None
+
+
+def get_channel_logger(channel_name):
+    """logger of a channel: records only go through a queue, the file I/O runs in the writer thread.
+
+    Pass channel / stage / latency with extra=.
+    """
+    start()
+    logger = logging.getLogger(f"StreamMonitor-{channel_name}")
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    if _queue_handler not in logger.handlers:
+        logger.addHandler(_queue_handler)
+    return logger
+
+
+def dropped():
+    return _queue_handler.dropped
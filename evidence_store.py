@@ -0,0 +1,193 @@
+import hashlib
+import logging
+import os
+import queue
+import threading
+import time
+import cv2
+import incident_store
+
+# evidence thumbnails: the analysed frame at incident time, downscaled and compressed, stored once per
+# distinct picture under data/evidence/<2 first hex digits>/<digest>.<format>
+EVIDENCE_DIR = os.path.join(incident_store.DATA_DIR, "evidence")
+EVIDENCE_FORMAT = os.environ.get("EVIDENCE_FORMAT", "jpg").lower()  # "jpg" or "webp"
+EVIDENCE_QUALITY = int(os.environ.get("EVIDENCE_QUALITY", 70))
+THUMB_WIDTH = 320
+MAX_PENDING = 64  # thumbnails waiting to be encoded before new ones are dropped
+PRUNE_MIN_AGE = 3600  # unreferenced files stored or reused less than this ago (s) are kept: their incident may not be committed yet
+TOUCH_INTERVAL = PRUNE_MIN_AGE // 4  # a file reused by new incidents gets its mtime refreshed at most this often (s)
+
+log = logging.getLogger("evidence_store")
+
+
+def thumbnail(frame, width=THUMB_WIDTH):
+    """small copy of a BGR frame (safe to keep once the ingest buffer is reused)."""
+    h, w = frame.shape[:2]
+    if w <= width:
+        return frame.copy()
+    return cv2.resize(frame, (width, max(1, int(h * width / w))), interpolation=cv2.INTER_AREA)
+
+
+def digest(thumb):
+    # content address of the picture: identical black / frozen frames map to the same file
+    h = hashlib.blake2b(digest_size=16)
+    h.update(str(thumb.shape).encode())
+    h.update(thumb.tobytes())
+    return h.hexdigest()
+
+
+class EvidenceStore:
+    """Content-addressed store of incident thumbnails, encoded by a background thread.
+
+    submit() only hashes the thumbnail in the calling thread: the file system is
+    checked by the encoder thread, which skips the pictures already stored and
+    refreshes their mtime so that prune() keeps them until the incidents reusing
+    them are committed. The returned digest is saved with the incident and
+    resolved to a file by path().
+    """
+
+    def __init__(self, root=EVIDENCE_DIR, fmt=EVIDENCE_FORMAT, quality=EVIDENCE_QUALITY, max_pending=MAX_PENDING):
+        if fmt not in ("jpg", "webp"):
+            raise ValueError(f"unknown evidence format {fmt!r}, expected 'jpg' or 'webp'")
+        self.root = root
+        self.fmt = fmt
+        self.quality = quality
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._known = {}  # digest stored or queued -> time.monotonic() it was last queued
+        self._lock = threading.Lock()
+        self._thread = None
+        self.stored = 0
+        self.deduplicated = 0
+        self.dropped = 0
+
+    def path(self, digest):
+        """file of a digest, or None when it was never stored."""
+        if not digest:
+            return None
+        for ext in (self.fmt, "jpg", "webp"):
+            path = os.path.join(self.root, digest[:2], f"{digest}.{ext}")
+            if os.path.exists(path):
+                return path
+        return None
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, daemon=True, name="EvidenceEncoder")
+            self._thread.start()
+
+    def stop(self, timeout=5):
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join(timeout)
+
+    def submit(self, thumb):
+        """returns the digest of the thumbnail, or None when the encoder is saturated (nothing stored)."""
+        key = digest(thumb)
+        now = time.monotonic()
+        with self._lock:
+            queued = self._known.get(key)
+            if queued is not None:
+                self.deduplicated += 1
+                if now - queued < TOUCH_INTERVAL:
+                    return key
+            self._known[key] = now
+        self.start()
+        try:
+            # also queued again for a known digest: the encoder refreshes the file age (or stores it again if pruned)
+            self._queue.put_nowait((key, thumb, queued is None))
+        except queue.Full:
+            with self._lock:
+                if queued is None:
+                    self._known.pop(key, None)
+                else:
+                    self._known[key] = queued
+            if queued is None:
+                self.dropped += 1
+                return None
+        return key
+
+    def _run(self):
+        params = [cv2.IMWRITE_WEBP_QUALITY, self.quality] if self.fmt == "webp" \
+            else [cv2.IMWRITE_JPEG_QUALITY, self.quality]
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            key, thumb, new = item
+            try:
+                path = self.path(key)
+                if path:
+                    # stored already (earlier run, or reused by a new incident): younger than PRUNE_MIN_AGE again
+                    os.utime(path)
+                    if new:
+                        self.deduplicated += 1
+                    continue
+                ok, data = cv2.imencode(f".{self.fmt}", thumb, params)
+                if not ok:
+                    raise ValueError("encoding failed")
+                directory = os.path.join(self.root, key[:2])
+                os.makedirs(directory, exist_ok=True)
+                path = os.path.join(directory, f"{key}.{self.fmt}")
+                tmp = path + ".tmp"
+                with open(tmp, "wb") as f:
+                    f.write(data.tobytes())
+                os.replace(tmp, path)  # never a half-written file under the final name
+                self.stored += 1
+            except Exception as e:
+                with self._lock:
+                    self._known.pop(key, None)
+                log.error(f"could not store evidence {key}: {e}")
+
+    def prune(self, referenced, min_age=PRUNE_MIN_AGE):
+        """deletes the files of the digests no incident references any more, returns how many."""
+        removed = 0
+        limit = time.time() - min_age
+        if not os.path.isdir(self.root):
+            return 0
+        for directory in os.scandir(self.root):
+            if not directory.is_dir():
+                continue
+            for entry in os.scandir(directory.path):
+                key = entry.name.split(".", 1)[0]
+                if key in referenced:
+                    continue
+                try:
+                    if entry.stat().st_mtime > limit:
+                        continue
+                    os.remove(entry.path)
+                except OSError as e:
+                    log.error(f"could not prune evidence {entry.name}: {e}")
+                    continue
+                with self._lock:
+                    self._known.pop(key, None)
+                removed += 1
+        if removed:
+            log.info(f"evidence pruning: {removed} unreferenced thumbnails removed")
+        return removed
+
+    def stats(self):
+        return {"stored": self.stored, "deduplicated": self.deduplicated, "dropped": self.dropped,
+                "pending": self._queue.qsize()}
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_evidence_store():
+    """process-wide evidence store on data/evidence."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = EvidenceStore()
+    return _store
+
+
+def shutdown():
+    if _store is not None:
+        _store.stop()
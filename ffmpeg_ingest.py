@@ -0,0 +1,477 @@
+import asyncio
+import collections
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# analysis defaults, can be overridden per channel in channels.json
+DEFAULT_ANALYSIS_FPS = 5
+DEFAULT_ANALYSIS_WIDTH = 960
+DEFAULT_ANALYSIS_HEIGHT = 540
+AUDIO_CHUNK = 0.25  # seconds of PCM read at once from the audio pipe
+
+
+class FFmpegIngest:
+    """Long-lived ffmpeg process decoding one stream to rawvideo at the analysis fps and resolution.
+
+    Frames are read straight into a small ring of preallocated numpy buffers; the
+    process is restarted with an exponential backoff whenever the stream drops.
+    When an audio tracker is given, the same process (hence the same connection)
+    also outputs mono s16le PCM on a second pipe, which is fed to the tracker.
+    """
+
+    def __init__(self, stream_url, width=DEFAULT_ANALYSIS_WIDTH, height=DEFAULT_ANALYSIS_HEIGHT,
+                 fps=DEFAULT_ANALYSIS_FPS, buffers=3, reconnect_delay=1, max_reconnect_delay=30,
+                 log=None, ffmpeg_bin='ffmpeg', audio_tracker=None, ring=None):
+        self.stream_url = stream_url
+        self.width = int(width)
+        self.height = int(height)
+        self.fps = float(fps)
+        self.frame_shape = (self.height, self.width, 3)
+        self.frame_size = self.width * self.height * 3
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.ffmpeg_bin = ffmpeg_bin
+        self.log = log or (lambda msg: None)
+        # ring of preallocated frame buffers (at least 3: one being written, one published, one held by the reader).
+        # With a shared memory ring (frame_ring.py) its slots are the buffers: the live preview reads them in place.
+        self.ring = ring
+        if ring is None:
+            self._buffers = [np.empty(self.frame_shape, dtype=np.uint8) for _ in range(max(3, buffers))]
+        elif ring.frame_shape != self.frame_shape:
+            raise ValueError(f"frame ring {ring.frame_shape} does not match the ingest frames {self.frame_shape}")
+        else:
+            self._buffers = ring.frames
+        self._cond = threading.Condition()
+        self._latest = None  # index of the last complete frame
+        self._held = None  # index of the frame currently held by the consumer
+        self._seq = 0
+        self._read_seq = 0
+        self._frame_times = [0.0] * len(self._buffers)
+        self._stderr_tail = collections.deque(maxlen=20)
+        self.proc = None
+        self.running = False
+        self.connected = False
+        self.reconnects = 0
+        self.frames_received = 0
+        self._stop_event = threading.Event()
+        # audio demuxed from the same ingest
+        self.audio_tracker = audio_tracker
+        self.audio_enabled = audio_tracker is not None
+        self.audio_time = None  # wall clock time of the last PCM chunk
+        self._audio_target = None
+
+    def build_command(self):
+        cmd = [self.ffmpeg_bin, '-hide_banner', '-loglevel', 'error', '-nostdin',
+               '-fflags', 'nobuffer', '-flags', 'low_delay']
+        if self.stream_url.startswith(('http://', 'https://')):
+            # let ffmpeg survive short network hiccups before we restart it ourselves
+            cmd += ['-reconnect', '1', '-reconnect_streamed', '1', '-reconnect_delay_max', '5',
+                    '-rw_timeout', '10000000']
+        cmd += ['-i', self.stream_url,
+                '-map', '0:v:0',
+                '-vf', f'fps={self.fps},scale={self.width}:{self.height}',
+                '-pix_fmt', 'bgr24', '-f', 'rawvideo', 'pipe:1']
+        if self._audio_target:
+            cmd += ['-map', '0:a:0?', '-ac', '1', '-ar', str(self.audio_tracker.sample_rate),
+                    '-f', 's16le', self._audio_target]
+        return cmd
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self._stop_event.clear()
+        self.thread = threading.Thread(target=self._run, daemon=True, name=f"FFmpegIngest-{self.stream_url}")
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        self._stop_event.set()
+        self._kill()
+        with self._cond:
+            self._cond.notify_all()
+        if hasattr(self, 'thread') and self.thread is not threading.current_thread():
+            self.thread.join(timeout=5)
+
+    def _spawn(self):
+        if not self.audio_enabled:
+            self._audio_target = None
+            return subprocess.Popen(self.build_command(), stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                                    stderr=subprocess.PIPE, bufsize=0)
+        if sys.platform == "win32":
+            # no fd inheritance on Windows: ffmpeg pushes the PCM to a loopback socket instead
+            server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            server.bind(('127.0.0.1', 0))
+            server.listen(1)
+            self._audio_target = f'tcp://127.0.0.1:{server.getsockname()[1]}'
+            proc = subprocess.Popen(self.build_command(), stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                                    stderr=subprocess.PIPE, bufsize=0)
+            threading.Thread(target=self._accept_audio, args=(proc, server), daemon=True).start()
+            return proc
+        read_fd, write_fd = os.pipe()
+        self._audio_target = f'pipe:{write_fd}'
+        try:
+            proc = subprocess.Popen(self.build_command(), stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                                    stderr=subprocess.PIPE, bufsize=0, pass_fds=(write_fd,))
+        except Exception:
+            os.close(read_fd)
+            raise
+        finally:
+            os.close(write_fd)
+        audio_stream = os.fdopen(read_fd, 'rb', buffering=0)
+        threading.Thread(target=self._read_audio, args=(audio_stream,), daemon=True).start()
+        return proc
+
+    def _accept_audio(self, proc, server):
+        server.settimeout(1.0)
+        try:
+            while self.running and proc.poll() is None:
+                try:
+                    conn, _ = server.accept()
+                except socket.timeout:
+                    continue
+                conn.settimeout(None)
+                self._read_audio(conn.makefile('rb', buffering=0))
+                conn.close()
+                return
+        finally:
+            server.close()
+
+    def _read_audio(self, stream):
+        # PCM is read in small chunks into one preallocated buffer, levels are computed in numpy
+        tracker = self.audio_tracker
+        tracker.reset()
+        samples = np.empty(int(tracker.sample_rate * AUDIO_CHUNK), dtype=np.int16)
+        view = memoryview(samples).cast('B')
+        try:
+            while self.running and self._read_into(stream, view):
+                tracker.feed(samples)
+                self.audio_time = time.time()
+        except (OSError, ValueError):
+            pass  # pipe closed by a restart
+        finally:
+            stream.close()
+
+    def _kill(self):
+        proc = self.proc
+        if proc and proc.poll() is None:
+            try:
+                proc.kill()
+                proc.wait(timeout=5)
+            except Exception:
+                pass
+
+    def _drain_stderr(self, proc):
+        for line in iter(proc.stderr.readline, b''):
+            self._stderr_tail.append(line.decode('utf-8', errors='ignore').strip())
+
+    def _read_into(self, stream, view):
+        # fills the whole buffer, rawvideo frames may arrive in several chunks
+        filled = 0
+        while filled < len(view):
+            n = stream.readinto(view[filled:])
+            if not n:
+                return False
+            filled += n
+        return True
+
+    def _next_buffer(self):
+        # round robin after the latest frame: a published frame is overwritten as late as possible (live preview)
+        with self._cond:
+            count = len(self._buffers)
+            start = 0 if self._latest is None else self._latest + 1
+            for i in range(start, start + count):
+                i %= count
+                if i != self._latest and i != self._held:
+                    return i
+
+    def _run(self):
+        delay = self.reconnect_delay
+        while self.running:
+            try:
+                self.proc = self._spawn()
+            except Exception as e:
+                self.log(f"Ingest start error: {e}")
+                self._stop_event.wait(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+                continue
+            stderr_thread = threading.Thread(target=self._drain_stderr, args=(self.proc,), daemon=True)
+            stderr_thread.start()
+            got_frame = False
+            while self.running:
+                idx = self._next_buffer()
+                if self.ring is not None:
+                    self.ring.begin(idx)
+                view = memoryview(self._buffers[idx].reshape(-1))
+                if not self._read_into(self.proc.stdout, view):
+                    break
+                now = time.time()
+                with self._cond:
+                    self._frame_times[idx] = now
+                    self._latest = idx
+                    self._seq += 1
+                    self._cond.notify_all()
+                if self.ring is not None:
+                    self.ring.publish(idx, now)
+                self.frames_received += 1
+                if not got_frame:
+                    got_frame = True
+                    delay = self.reconnect_delay
+                    self._connected()
+            self._kill()
+            stderr_thread.join(timeout=1)
+            if not self.running:
+                break
+            if self._disconnected(delay):
+                continue
+            self._stop_event.wait(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    def _disconnected(self, delay):
+        """bookkeeping after the ffmpeg process ended; returns True to restart it at once (no backoff)."""
+        self.connected = False
+        if self.audio_enabled and any('does not contain any stream' in l for l in self._stderr_tail):
+            # the optional audio map left the PCM output empty: the stream has no audio track
+            self.audio_enabled = False
+            self._stderr_tail.clear()
+            self.log("No audio track in stream, audio analysis disabled")
+            return True
+        self.reconnects += 1
+        detail = self._stderr_tail[-1] if self._stderr_tail else "stream ended"
+        self.log(f"Ingest disconnected ({detail}), reconnecting in {delay}s")
+        return False
+
+    def _connected(self):
+        self.connected = True
+        self.log(f"Ingest connected ({self.width}x{self.height} @ {self.fps:g} fps)")
+
+    def read(self, timeout=None):
+        """waits for a frame newer than the previous read.
+
+        returns (frame, frame_time) or (None, None) on timeout; the frame buffer
+        stays valid until the next call to read().
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._seq > self._read_seq or not self.running, timeout):
+                return None, None
+            if self._latest is None or self._seq <= self._read_seq:
+                return None, None
+            # frames arriving faster than the analysis are simply skipped: we always analyse the latest one
+            self._read_seq = self._seq
+            self._held = self._latest
+            return self._buffers[self._held], self._frame_times[self._held]
+
+
+class _IngestProtocol(asyncio.SubprocessProtocol):
+    """ffmpeg pipes of AsyncFFmpegIngest: rawvideo chunks go straight into the frame ring, stderr to the tail."""
+
+    def __init__(self, ingest):
+        self.ingest = ingest
+        self.video_closed = asyncio.get_running_loop().create_future()
+        self.exited = asyncio.get_running_loop().create_future()
+        self._stderr = b''
+
+    def pipe_data_received(self, fd, data):
+        if fd == 1:
+            self.ingest._feed(data)
+            return
+        lines = (self._stderr + data).split(b'\n')
+        self._stderr = lines.pop()
+        for line in lines:
+            self.ingest._stderr_tail.append(line.decode('utf-8', errors='ignore').strip())
+
+    def pipe_connection_lost(self, fd, exc):
+        if fd == 1 and not self.video_closed.done():
+            self.video_closed.set_result(None)
+
+    def process_exited(self):
+        if not self.video_closed.done():
+            self.video_closed.set_result(None)
+        if not self.exited.done():
+            self.exited.set_result(None)
+
+
+class AsyncFFmpegIngest(FFmpegIngest):
+    """asyncio variant of FFmpegIngest, driven by the event loop of async_engine.
+
+    The video, audio and stderr pipes are read with non-blocking I/O and the
+    reconnect backoff is an asyncio timer: a channel costs no thread. Video
+    chunks are copied into the same ring of preallocated frame buffers.
+    """
+
+    PIPE_SIZE = 1024 * 1024  # larger video pipe (Linux): fewer loop wake-ups per frame
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._new_frame = asyncio.Event()
+        self._audio_transport = None
+        self._filling = None  # index of the buffer being filled and bytes received in it
+        self._filled = 0
+
+    def start(self):
+        raise RuntimeError("AsyncFFmpegIngest is run by the event loop: await run()")
+
+    def stop(self):
+        raise RuntimeError("AsyncFFmpegIngest is stopped by cancelling its run() task")
+
+    def _feed(self, data):
+        view = memoryview(data)
+        while view:
+            if self._filling is None:
+                self._filling = self._next_buffer()
+                self._filled = 0
+                if self.ring is not None:
+                    self.ring.begin(self._filling)
+            target = self._buffers[self._filling].reshape(-1)
+            n = min(len(view), self.frame_size - self._filled)
+            target[self._filled:self._filled + n] = np.frombuffer(view[:n], dtype=np.uint8)
+            self._filled += n
+            view = view[n:]
+            if self._filled == self.frame_size:
+                # no lock needed: the event loop thread is the only writer and reader of the ring state
+                self._frame_times[self._filling] = time.time()
+                if self.ring is not None:
+                    self.ring.publish(self._filling, self._frame_times[self._filling])
+                self._latest = self._filling
+                self._filling = None
+                self._seq += 1
+                self._new_frame.set()
+                self.frames_received += 1
+                if not self.connected:
+                    self._connected()
+
+    async def _spawn_async(self, loop):
+        """starts ffmpeg, returns (transport, protocol, audio reading task or None)."""
+        kwargs = dict(stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        audio_task = None
+        if not self.audio_enabled:
+            self._audio_target = None
+        elif sys.platform == "win32":
+            # no fd inheritance on Windows: ffmpeg pushes the PCM to a loopback socket instead
+            connected = loop.create_future()
+
+            async def on_connection(reader, writer):
+                if not connected.done():
+                    connected.set_result(None)
+                    try:
+                        await self._read_audio_async(reader)
+                    finally:
+                        writer.close()
+            server = await asyncio.start_server(on_connection, '127.0.0.1', 0)
+            self._audio_target = f'tcp://127.0.0.1:{server.sockets[0].getsockname()[1]}'
+
+            async def serve():
+                try:
+                    await connected
+                finally:
+                    server.close()
+            audio_task = asyncio.create_task(serve())
+        else:
+            read_fd, write_fd = os.pipe()
+            self._audio_target = f'pipe:{write_fd}'
+            kwargs["pass_fds"] = (write_fd,)
+        try:
+            transport, protocol = await loop.subprocess_exec(lambda: _IngestProtocol(self), *self.build_command(),
+                                                             **kwargs)
+        except Exception:
+            if audio_task is not None:
+                audio_task.cancel()
+            elif "pass_fds" in kwargs:
+                os.close(read_fd)
+            raise
+        finally:
+            if "pass_fds" in kwargs:
+                os.close(write_fd)
+        if "pass_fds" in kwargs:
+            reader = asyncio.StreamReader()
+            self._audio_transport, _ = await loop.connect_read_pipe(
+                lambda: asyncio.StreamReaderProtocol(reader), os.fdopen(read_fd, 'rb', buffering=0))
+            audio_task = asyncio.create_task(self._read_audio_async(reader))
+        if fcntl is not None and hasattr(fcntl, "F_SETPIPE_SZ"):
+            try:
+                fcntl.fcntl(transport.get_pipe_transport(1).get_extra_info('pipe').fileno(), fcntl.F_SETPIPE_SZ,
+                            self.PIPE_SIZE)
+            except (OSError, ValueError, AttributeError):
+                pass  # capped by /proc/sys/fs/pipe-max-size, or ffmpeg already exited
+        return transport, protocol, audio_task
+
+    async def _read_audio_async(self, reader):
+        tracker = self.audio_tracker
+        tracker.reset()
+        chunk = int(tracker.sample_rate * AUDIO_CHUNK) * 2  # s16le
+        try:
+            while True:
+                data = await reader.readexactly(chunk)
+                tracker.feed(np.frombuffer(data, dtype=np.int16))
+                self.audio_time = time.time()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass  # pipe closed by a restart
+
+    async def run(self):
+        """decodes the stream until cancelled, restarting ffmpeg with a backoff when it drops."""
+        loop = asyncio.get_running_loop()
+        self.running = True
+        delay = self.reconnect_delay
+        try:
+            while True:
+                try:
+                    transport, protocol, audio_task = await self._spawn_async(loop)
+                except Exception as e:
+                    self.log(f"Ingest start error: {e}")
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, self.max_reconnect_delay)
+                    continue
+                self._filling = None
+                received = self.frames_received
+                try:
+                    # frames are fed by the protocol until the video pipe closes
+                    await asyncio.shield(protocol.video_closed)
+                finally:
+                    if transport.get_returncode() is None:
+                        transport.kill()
+                    try:
+                        await asyncio.wait_for(asyncio.shield(protocol.exited), 5)
+                    except asyncio.TimeoutError:
+                        pass
+                    transport.close()
+                    if audio_task is not None:
+                        audio_task.cancel()
+                    if self._audio_transport is not None:
+                        self._audio_transport.close()
+                        self._audio_transport = None
+                if self.frames_received > received:
+                    delay = self.reconnect_delay  # it was connected: the backoff starts over
+                if self._disconnected(delay):
+                    continue
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+        finally:
+            self.running = False
+            self.connected = False
+
+    async def read(self, timeout=None):
+        """waits for a frame newer than the previous read.
+
+        returns (frame, frame_time) or (None, None) on timeout; the frame buffer
+        stays valid until the next call to read().
+        """
+        if self._seq <= self._read_seq:
+            self._new_frame.clear()
+            try:
+                await asyncio.wait_for(self._new_frame.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None, None
+        # frames arriving faster than the analysis are simply skipped: we always analyse the latest one
+        self._read_seq = self._seq
+        self._held = self._latest
+        return self._buffers[self._held], self._frame_times[self._held]
@@ -0,0 +1,62 @@
+import cv2
+import numpy as np
+
+# analysis thumbnail: black / frozen detection does not need more than this
+THUMB_WIDTH = 160
+THUMB_HEIGHT = 90
+# mean luma (0-255) under which the picture is considered black, independent of resolution
+BLACK_MEAN_THRESHOLD = 10
+# luma difference under which a thumbnail pixel is considered unchanged (absorbs compression noise)
+FROZEN_PIXEL_DELTA = 3
+# fraction of changed thumbnail pixels under which the picture is considered frozen
+# (the former full-resolution rule was < 1000 changed values out of 1920x1080x3)
+FROZEN_CHANGED_RATIO = 0.0002
+
+
+class LumaAnalyzer:
+    """Black screen / frozen frame measurements on a small grayscale thumbnail.
+
+    All intermediate images live in buffers allocated once, the previous
+    thumbnail is kept by swapping buffers instead of copying the frame.
+    """
+
+    def __init__(self, width=THUMB_WIDTH, height=THUMB_HEIGHT, pixel_delta=FROZEN_PIXEL_DELTA):
+        self.size = (int(width), int(height))
+        self.pixels = self.size[0] * self.size[1]
+        self.pixel_delta = pixel_delta
+        self._small = np.empty((self.size[1], self.size[0], 3), dtype=np.uint8)
+        self._luma = np.empty((self.size[1], self.size[0]), dtype=np.uint8)
+        self._previous = np.empty_like(self._luma)
+        self._diff = np.empty_like(self._luma)
+        self.has_previous = False
+
+    @property
+    def luma(self):
+        """grayscale thumbnail of the last analysed frame."""
+        return self._previous if self.has_previous else None
+
+    def reset(self):
+        self.has_previous = False
+
+    def update(self, frame):
+        """returns (mean luma, ratio of changed pixels since previous frame or None)."""
+        cv2.resize(frame, self.size, dst=self._small, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(self._small, cv2.COLOR_BGR2GRAY, dst=self._luma)
+        mean = cv2.mean(self._luma)[0]
+        changed = None
+        if self.has_previous:
+            cv2.absdiff(self._luma, self._previous, dst=self._diff)
+            cv2.threshold(self._diff, self.pixel_delta, 255, cv2.THRESH_BINARY, dst=self._diff)
+            changed = cv2.countNonZero(self._diff) / self.pixels
+        # current thumbnail becomes the previous one, no copy
+        self._luma, self._previous = self._previous, self._luma
+        self.has_previous = True
+        return mean, changed
+
+
+def is_black(mean_luma, threshold=BLACK_MEAN_THRESHOLD):
+    return mean_luma < threshold
+
+
+def is_frozen(changed_ratio, threshold=FROZEN_CHANGED_RATIO):
+    return changed_ratio is not None and changed_ratio < threshold
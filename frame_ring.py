@@ -0,0 +1,176 @@
+import hashlib
+import os
+import sys
+import numpy as np
+from multiprocessing import shared_memory
+
+try:
+    from multiprocessing import resource_tracker
+except ImportError:  # Windows
+    resource_tracker = None
+
+# ring of decoded frames in shared memory: the ffmpeg ingest decodes straight into it, the live preview
+# (GUI, or any process attaching by channel name) reads the latest frame in place, without a stream of its own
+DEFAULT_SLOTS = 4  # one being written, one analysed, the latest and one spare for the preview
+NAME_PREFIX = os.environ.get("FRAME_RING_PREFIX", "supervision")
+SHM_DIR = "/dev/shm"  # checked for free space before creating a ring (a full tmpfs kills the writer with SIGBUS)
+
+MAGIC = 0x46524D52  # "FRMR"
+# header: int64 fields, then the sequence and time of each slot
+MAGIC_FIELD, WIDTH, HEIGHT, SLOTS, LATEST, SEQ, CLOSED = range(7)
+HEADER_FIELDS = 8
+ALIGN = 64
+
+_deferred = []  # segments whose frames were still referenced at close(), closed once released
+
+
+def _close_deferred():
+    for shm in list(_deferred):
+        try:
+            shm.close()
+            _deferred.remove(shm)
+        except BufferError:
+            pass
+
+
+def ring_name(channel_name):
+    """shared memory name of the frame ring of a channel (same in every process)."""
+    return f"{NAME_PREFIX}-{hashlib.blake2b(channel_name.encode('utf-8'), digest_size=8).hexdigest()}"
+
+
+def _layout(width, height, slots):
+    meta = (HEADER_FIELDS + 2 * slots) * 8
+    frames_offset = -(-meta // ALIGN) * ALIGN
+    return frames_offset, frames_offset + slots * width * height * 3
+
+
+class FrameRing:
+    """Fixed ring of BGR frames in shared memory, one writer and any number of readers.
+
+    Each slot has a sequence number, odd while the slot is being written
+    (seqlock): a reader takes the latest slot, uses the frame in place and can
+    check with valid() that it was not overwritten meanwhile. Use create() in
+    the ingest process and attach() in the readers.
+    """
+
+    def __init__(self, shm, owner):
+        self.shm = shm
+        self.owner = owner
+        self.name = shm.name
+        header = np.ndarray((HEADER_FIELDS,), dtype=np.int64, buffer=shm.buf)
+        if header[MAGIC_FIELD] != MAGIC:
+            raise ValueError(f"{shm.name} is not a frame ring")
+        self.width, self.height, self.slots = int(header[WIDTH]), int(header[HEIGHT]), int(header[SLOTS])
+        self.frame_shape = (self.height, self.width, 3)
+        self._header = header
+        self._slot_seq = np.ndarray((self.slots,), dtype=np.int64, buffer=shm.buf, offset=HEADER_FIELDS * 8)
+        self._slot_time = np.ndarray((self.slots,), dtype=np.float64, buffer=shm.buf,
+                                     offset=(HEADER_FIELDS + self.slots) * 8)
+        frames_offset, _ = _layout(self.width, self.height, self.slots)
+        frames = np.ndarray((self.slots,) + self.frame_shape, dtype=np.uint8, buffer=shm.buf, offset=frames_offset)
+        self.frames = list(frames)  # one writable view per slot, used as the ingest frame buffers
+
+    @classmethod
+    def create(cls, name, width, height, slots=DEFAULT_SLOTS):
+        """creates (or replaces a stale) ring; raises OSError when shared memory is missing or full."""
+        _close_deferred()
+        slots = max(3, slots)
+        _, size = _layout(width, height, slots)
+        if os.path.isdir(SHM_DIR):
+            stat = os.statvfs(SHM_DIR)
+            if stat.f_bavail * stat.f_frsize < size:
+                raise OSError(f"not enough space in {SHM_DIR} for a {size // 1024} KB frame ring")
+        try:
+            shm = shared_memory.SharedMemory(name, create=True, size=size)
+        except FileExistsError:
+            # left by a crashed process (or a monitor being replaced): its readers keep their own mapping
+            stale = shared_memory.SharedMemory(name)
+            stale.close()
+            stale.unlink()
+            shm = shared_memory.SharedMemory(name, create=True, size=size)
+        header = np.ndarray((HEADER_FIELDS,), dtype=np.int64, buffer=shm.buf)
+        header[:] = 0
+        header[WIDTH], header[HEIGHT], header[SLOTS], header[LATEST] = width, height, slots, -1
+        header[MAGIC_FIELD] = MAGIC  # written last: readers attaching meanwhile see no ring yet
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        """opens the ring of another process (or of this one) for reading; raises FileNotFoundError."""
+        _close_deferred()
+        shm = shared_memory.SharedMemory(name)
+        if resource_tracker is not None and sys.version_info < (3, 13) and os.name == "posix":
+            # the tracker would unlink the segment when this reader exits (fixed by track=False in 3.13)
+            resource_tracker.unregister(shm._name, "shared_memory")
+        try:
+            return cls(shm, owner=False)
+        except ValueError:
+            shm.close()
+            raise
+
+    # --- writer ---
+
+    def begin(self, slot):
+        """marks a slot as being written (its sequence becomes odd)."""
+        if not self._slot_seq[slot] & 1:
+            self._slot_seq[slot] += 1
+
+    def publish(self, slot, frame_time):
+        """the slot holds a complete frame: it becomes the latest one."""
+        self._slot_time[slot] = frame_time
+        self._slot_seq[slot] += 1
+        self._header[LATEST] = slot
+        self._header[SEQ] += 1
+
+    # --- readers ---
+
+    @property
+    def seq(self):
+        """number of frames published so far."""
+        header = self._header
+        return int(header[SEQ]) if header is not None else 0
+
+    @property
+    def closed(self):
+        """True once the ring was closed, here or by the writer (a new one may exist under the same name)."""
+        header = self._header
+        return header is None or bool(header[CLOSED])
+
+    def latest(self):
+        """(frame, frame_time, token) of the latest frame, or (None, None, None).
+
+        The frame is a view into shared memory: it stays valid while valid(token) is True.
+        """
+        header, frames, slot_seq, slot_time = self._header, self.frames, self._slot_seq, self._slot_time
+        if header is None:
+            return None, None, None
+        slot = int(header[LATEST])
+        if slot < 0:
+            return None, None, None
+        seq = int(slot_seq[slot])
+        if seq & 1:
+            return None, None, None  # overwritten right now, the next call gets the newer frame
+        return frames[slot], float(slot_time[slot]), (slot, seq)
+
+    def valid(self, token):
+        slot_seq = self._slot_seq
+        slot, seq = token
+        return slot_seq is not None and int(slot_seq[slot]) == seq
+
+    def close(self):
+        if self._header is None:
+            return
+        if self.owner:
+            self._header[CLOSED] = 1
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+        self.frames = []
+        self._header = self._slot_seq = self._slot_time = None
+        try:
+            self.shm.close()
+        except BufferError:
+            # frames still referenced (ingest buffers, preview image): unmapping now would crash their readers
+            _deferred.append(self.shm)
+        _close_deferred()
@@ -2,12 +2,16 @@ import os
 import sys
 import ctypes
 from PyQt5.QtWidgets import (
-    QMainWindow, QLabel, QVBoxLayout, QWidget, QTextEdit, QHBoxLayout, QMessageBox, QPushButton, QSizePolicy, QSpacerItem, QFrame, QSlider, QStackedLayout, QTabWidget, QTableWidget, QTableWidgetItem, QHeaderView, QFileDialog, QComboBox, QDateEdit, QGridLayout, QGroupBox
+    QMainWindow, QLabel, QVBoxLayout, QWidget, QTextEdit, QHBoxLayout, QMessageBox, QPushButton, QSizePolicy, QSpacerItem, QFrame, QSlider, QStackedLayout, QTabWidget, QTableView, QAbstractItemView, QHeaderView, QFileDialog, QComboBox, QDateEdit, QGridLayout, QGroupBox
 )
-from PyQt5.QtGui import QPixmap, QIcon, QFont, QPalette, QColor, QLinearGradient, QBrush, QPainter, QPen, QPaintEvent, QFontDatabase, QPainterPath
-from PyQt5.QtCore import Qt, QSize, QTimer, QPropertyAnimation, QRect, QEasingCurve, QThread, pyqtSignal, QDate
+from PyQt5.QtGui import QPixmap, QImage, QIcon, QFont, QPalette, QColor, QLinearGradient, QBrush, QPainter, QPen, QPaintEvent, QFontDatabase, QPainterPath
+from PyQt5.QtCore import Qt, QSize, QTimer, QPropertyAnimation, QRect, QEasingCurve, QThread, pyqtSignal, QDate, QAbstractTableModel, QModelIndex
 from PyQt5.QtMultimedia import QSound
-from stream_monitor import StreamMonitor
+from supervisor import SupervisorPool
+import incident_store
+import event_bus
+import evidence_store
+import incident_export
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 import matplotlib.pyplot as plt
@@ -17,7 +21,10 @@ from PyQt5.QtGui import QLinearGradient, QColor, QBrush, QFont
 from PyQt5.QtWidgets import QGraphicsSimpleTextItem
 import collections
 import datetime
-import csv
+import re
+import threading
+import time
+import numpy as np
 
 # helper PyInstaller for resource access
 
@@ -31,7 +38,17 @@ def resource_path(relative_path):
 if sys.platform == "win32":
     vlc_dll_path = resource_path('libvlc.dll')
     ctypes.CDLL(vlc_dll_path)
-import vlc
+try:
+    import vlc
+except ImportError:  # only needed by the "vlc" preview
+    vlc = None
+
+# live preview: "shared" paints the frames decoded by the channel monitor (frame_ring.py, no extra stream
+# connection, video only at the analysis fps), "vlc" plays the stream with its own connection (with sound)
+PREVIEW_MODE = os.environ.get("SUPERVISION_PREVIEW", "shared")
+if vlc is None:
+    PREVIEW_MODE = "shared"
+PREVIEW_INTERVAL_MS = 100  # shared preview refresh period
 
 # utility to load SVG as QPixmap
 from PyQt5.QtSvg import QSvgWidget
@@ -142,14 +159,174 @@ class StatusIndicator(QLabel):
         self.animation.setEndValue(rect.adjusted(2, 2, -2, -2))
         self.animation.start()
 
-class IncidentTable(QTableWidget):
-    def __init__(self, parent=None):
+# log view: lines are buffered and shown in batches LOG_REFRESH_INTERVAL ms apart, at most
+# LOG_BUFFER_SIZE lines wait between two refreshes and LOG_MAX_LINES lines are kept in the view
+LOG_REFRESH_INTERVAL = 250
+LOG_BUFFER_SIZE = 500
+LOG_MAX_LINES = 2000
+LOG_TIME_PREFIX = re.compile(r"^\d\d:\d\d:\d\d - ")
+
+class LogRingBuffer:
+    """Log lines waiting for the next refresh of the log view.
+
+    append() can be called from any thread. Consecutive duplicates (same text,
+    time prefix ignored) are merged into one line with a repeat count; beyond
+    `size` waiting lines the oldest are dropped.
+    """
+
+    def __init__(self, size=LOG_BUFFER_SIZE):
+        self.lines = collections.deque(maxlen=size) # [text, repeats, arrival time]
+        self.dropped = 0
+        self.merged = 0
+        self._lock = threading.Lock()
+
+    def append(self, message):
+        with self._lock:
+            if self.lines:
+                last = self.lines[-1]
+                if LOG_TIME_PREFIX.sub("", last[0]) == LOG_TIME_PREFIX.sub("", message):
+                    last[1] += 1
+                    self.merged += 1
+                    return
+            if len(self.lines) == self.lines.maxlen:
+                self.dropped += 1
+            self.lines.append([message, 1, time.strftime('%H:%M:%S')])
+
+    def drain(self):
+        with self._lock:
+            lines = list(self.lines)
+            self.lines.clear()
+        return lines
+
+    def clear(self):
+        with self._lock:
+            self.lines.clear()
+
+EXPORT_FILE_FILTERS = {
+    "CSV Files (*.csv)": "csv",
+    "JSON Lines (*.jsonl)": "jsonl",
+    "Parquet (*.parquet)": "parquet",
+}
+
+def format_duration(seconds):
+    """'1h02m03s' style duration of an incident episode, 'Terminé' when unknown (former incidents)."""
+    if seconds is None:
+        return "Terminé"
+    seconds = int(round(seconds))
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    if hours:
+        return f"{hours}h{minutes:02d}m{seconds:02d}s"
+    if minutes:
+        return f"{minutes}m{seconds:02d}s"
+    return f"{seconds}s"
+
+class IncidentTableModel(QAbstractTableModel):
+    """Incidents of the store, fetched page by page as the view scrolls.
+
+    Filters and sort order are passed to the store queries; only the pages
+    scrolled into view are held in memory, so the table stays responsive
+    whatever the size of the history.
+    """
+    HEADERS = ["Timestamp", "Type", "Durée", "Actions"]
+    SORT_COLUMNS = ("ts", "type", "duration", "end_ts")
+    PAGE_SIZE = 200
+    EVIDENCE_ROLE = Qt.UserRole + 1 # digest of the evidence thumbnail
+
+    def __init__(self, store, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.filters = None # store filters (channel, date, incident_type), None: empty table
+        self.order_by = "ts"
+        self.descending = True
+        self.rows = []
+        self._after = None # keyset of the last fetched row
+        self._exhausted = True
+
+    def set_filters(self, filters):
+        self.filters = filters
+        self.reload()
+
+    def reload(self):
+        self.beginResetModel()
+        self.rows = []
+        self._after = None
+        self._exhausted = self.filters is None
+        self.endResetModel()
+        if self.canFetchMore(QModelIndex()):
+            self.fetchMore(QModelIndex())
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        incident_id, _, timestamp, incident_type, _, end_ts, duration, evidence = self.rows[index.row()]
+        if role == Qt.UserRole:
+            return incident_id # row id in the store, used to delete the incident
+        if role == self.EVIDENCE_ROLE:
+            return evidence
+        if role != Qt.DisplayRole:
+            return None
+        column = index.column()
+        if column == 0:
+            return timestamp
+        if column == 1:
+            return incident_type
+        if column == 2:
+            return "En cours..." if end_ts is None else format_duration(duration)
+        return "🔍 Surveillé" if end_ts is None else "✅ Résolu"
+
+    def canFetchMore(self, parent):
+        return not parent.isValid() and not self._exhausted
+
+    def fetchMore(self, parent):
+        if parent.isValid() or self._exhausted:
+            return
+        rows, self._after = self.store.page(self.PAGE_SIZE, after=self._after, order_by=self.order_by,
+                                            descending=self.descending, **self.filters)
+        self._exhausted = self._after is None
+        if not rows:
+            return
+        self.beginInsertRows(QModelIndex(), len(self.rows), len(self.rows) + len(rows) - 1)
+        self.rows.extend(rows)
+        self.endInsertRows()
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self.order_by = self.SORT_COLUMNS[column]
+        self.descending = order == Qt.DescendingOrder
+        self.reload()
+
+    def incident_at(self, row):
+        return self.rows[row]
+
+    def remove_row(self, row):
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self.rows[row]
+        self.endRemoveRows()
+
+class IncidentTable(QTableView):
+    def __init__(self, model, parent=None):
         super().__init__(parent)
-        self.setColumnCount(4)
-        self.setHorizontalHeaderLabels(["Timestamp", "Type", "Durée", "Actions"])
+        self.setModel(model)
+        self.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.verticalHeader().setVisible(False)
         self.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        # sorting is delegated to the model, i.e. to the store query
+        self.horizontalHeader().setSortIndicator(0, Qt.DescendingOrder)
+        self.setSortingEnabled(True)
         self.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 background: #111;
                 border: 1px solid #ff003c;
                 border-radius: 15px;
@@ -157,11 +334,11 @@ class IncidentTable(QTableWidget):
                 color: white;
                 font-size: 14px;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 8px;
                 border-bottom: 1px solid #222;
             }
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 background: #ff003c;
                 color: #fff;
             }
@@ -211,12 +388,86 @@ class AspectRatioVideoWidget(QWidget):
         self.setGeometry(x, y, target_w, target_h)
         super().resizeEvent(event)
 
+class FramePreview(QWidget):
+    """Live picture of a monitor, read from the shared memory frame ring of its ingest."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        self.monitor = None
+        self.paused = False
+        self._ring = None
+        self._token = None
+        # the latest slot is copied into one of two buffers and checked against the seqlock before it is shown:
+        # the ingest may come back to that slot while it is read
+        self._buffers = [None, None]
+        self._image = None
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(PREVIEW_INTERVAL_MS)
+
+    def set_monitor(self, monitor):
+        self.monitor = monitor
+        self._ring = self._token = self._image = None
+        self.update()
+
+    def refresh(self):
+        if self.paused or self.monitor is None or not self.isVisible():
+            return
+        ring = self.monitor.frame_ring
+        if ring is None:
+            if self._image is not None:
+                self._ring = self._token = self._image = None
+                self.update()
+            return
+        frame, frame_time, token = ring.latest()
+        if token is None or (ring is self._ring and token == self._token):
+            return
+        back = self._buffers[1]
+        if back is None or back.shape != frame.shape:
+            back = self._buffers[1] = np.empty(frame.shape, dtype=np.uint8)
+        np.copyto(back, frame)
+        if not ring.valid(token):
+            return  # overwritten while copied (torn): the next refresh takes the newer frame
+        height, width = frame.shape[:2]
+        # the image wraps the buffer just copied, the other one is filled by the next refresh
+        self._image = QImage(back.data, width, height, back.strides[0], QImage.Format_BGR888)
+        self._buffers = [back, self._buffers[0]]
+        self._ring, self._token = ring, token
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), Qt.black)
+        if self._image is not None:
+            size = self._image.size().scaled(self.size(), Qt.KeepAspectRatio)
+            target = QRect((self.width() - size.width()) // 2, (self.height() - size.height()) // 2,
+                           size.width(), size.height())
+            painter.setRenderHint(QPainter.SmoothPixmapTransform)
+            painter.drawImage(target, self._image)
+        painter.end()
+
 class MainWindow(QMainWindow):
+    # bus events delivered to the GUI thread (the bus calls subscribers from its own threads)
+    bus_event_signal = pyqtSignal(object)
+    # channels whose incidents were just committed by the incident writer (emitted from its thread)
+    incidents_committed_signal = pyqtSignal(object)
+
     def __init__(self, channels):
         super().__init__()
         self.all_channels = channels
-        self.monitors = {} # dictionary to store monitors for each channel
-        self.active_monitor = None # currently active monitor
+        # every channel is supervised at the same time, the GUI only follows the selected one
+        self.supervisor = SupervisorPool(preview=PREVIEW_MODE == "shared")
+        self.monitors = self.supervisor.monitors # dictionary of monitors for each channel
+        self.bus_subscriptions = [] # bus subscriptions of the selected channel
+        self.bus_event_signal.connect(self.on_bus_event)
+        self.active_monitor = None # currently displayed monitor
+        self.store = incident_store.get_store() # incident history of every channel (data/incidents.sqlite3)
+        # the table is reloaded once the writer committed new rows, never by waiting on it
+        self.incidents_committed_signal.connect(self.on_incidents_committed)
+        self.commit_listener = self.incidents_committed_signal.emit
+        incident_store.get_writer().add_listener(self.commit_listener)
+        self.stats_dirty = True # statistics charts out of date
         
         self.setWindowTitle("Supervision")
         self.setMinimumSize(640, 480)  # default size larger
@@ -242,13 +493,13 @@ class MainWindow(QMainWindow):
 
     def init_ui(self):
         # single video widget and single player
-        self.vlc_video_widget = QWidget()
-        self.vlc_video_widget.setStyleSheet("background: #000; border-radius: 10px; border: 2px solid #c2185b;")
-        self.vlc_video_widget.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        self.video_widget = FramePreview() if PREVIEW_MODE == "shared" else QWidget()
+        self.video_widget.setStyleSheet("background: #000; border-radius: 10px; border: 2px solid #c2185b;")
+        self.video_widget.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
         # placeholder layouts for each tab
         self.live_video_layout = None
-        self.vlc_video_widget_mini_placeholder = QVBoxLayout()
-        self.vlc_video_widget_logs_placeholder = QVBoxLayout()
+        self.video_widget_mini_placeholder = QVBoxLayout()
+        self.video_widget_logs_placeholder = QVBoxLayout()
         
         central_widget = QWidget()
         self.setCentralWidget(central_widget)
@@ -452,7 +703,7 @@ class MainWindow(QMainWindow):
         video_layout.setSpacing(0)
         self.live_video_layout = video_layout
 
-        video_layout.addWidget(self.vlc_video_widget)
+        video_layout.addWidget(self.video_widget)
         live_layout.addWidget(video_frame, stretch=1)
         self.tab_widget.addTab(live_tab, "Live")
         
@@ -467,7 +718,13 @@ class MainWindow(QMainWindow):
         incidents_left = QVBoxLayout()
         
         # incidents table
-        self.incidents_table = IncidentTable()
+        self.incident_model = IncidentTableModel(self.store)
+        self.incidents_table = IncidentTable(self.incident_model)
+        # new episodes are shown by reloading the first page, at most once per second
+        self.incidents_reload_timer = QTimer(self)
+        self.incidents_reload_timer.setSingleShot(True)
+        self.incidents_reload_timer.setInterval(1000)
+        self.incidents_reload_timer.timeout.connect(self.load_incidents)
         incidents_left.addWidget(self.incidents_table)
 
         # search filters
@@ -483,7 +740,7 @@ class MainWindow(QMainWindow):
         filter_layout.addWidget(self.date_filter)
         self.type_filter = QComboBox()
         self.type_filter.addItem('Tous')
-        self.type_filter.addItems(['BLACK SCREEN', 'LAG', 'ERROR', 'SILENCE AUDIO'])
+        self.type_filter.addItems(incident_store.INCIDENT_TYPES)  # completed with the recorded types per channel
         self.type_filter.setStyleSheet('color: white; background: #222; border-radius: 8px; padding: 4px 12px;')
         type_label = QLabel('Type :')
         type_label.setStyleSheet('color: white; font-weight: 600;')
@@ -518,6 +775,7 @@ class MainWindow(QMainWindow):
         incidents_left.addLayout(actions_layout)
         
         incidents_horizontal.addLayout(incidents_left, stretch=7)
+        incidents_right = QVBoxLayout()
         
         # mini video (right)
         video_mini_frame = GlassmorphismFrame()
@@ -530,9 +788,28 @@ class MainWindow(QMainWindow):
         video_mini_layout.addWidget(mini_title)
         
         # add shared video widget (will be moved dynamically)
-        video_mini_layout.addLayout(self.vlc_video_widget_mini_placeholder)
-        
-        incidents_horizontal.addWidget(video_mini_frame, stretch=3)
+        video_mini_layout.addLayout(self.video_widget_mini_placeholder)
+        incidents_right.addWidget(video_mini_frame)
+        
+        # evidence thumbnail of the selected incident (right, under the mini video)
+        evidence_frame = GlassmorphismFrame()
+        evidence_frame.setFixedSize(300, 220)
+        evidence_layout = QVBoxLayout(evidence_frame)
+        evidence_title = QLabel("Capture de l'incident")
+        evidence_title.setAlignment(Qt.AlignCenter)
+        evidence_title.setStyleSheet("color: white; font-weight: 600; font-size: 14px; margin-bottom: 5px;")
+        evidence_layout.addWidget(evidence_title)
+        self.evidence_label = QLabel()
+        self.evidence_label.setAlignment(Qt.AlignCenter)
+        self.evidence_label.setStyleSheet("color: #888;")
+        evidence_layout.addWidget(self.evidence_label, stretch=1)
+        incidents_right.addWidget(evidence_frame)
+        incidents_right.addStretch()
+        self.incidents_table.selectionModel().currentRowChanged.connect(self.show_evidence)
+        self.incident_model.modelReset.connect(lambda: self.show_evidence(QModelIndex()))
+        self.show_evidence(QModelIndex())
+        
+        incidents_horizontal.addLayout(incidents_right, stretch=3)
         incidents_layout.addLayout(incidents_horizontal)
         
         self.tab_widget.addTab(incidents_tab, "Incidents")
@@ -560,7 +837,17 @@ class MainWindow(QMainWindow):
                 padding: 15px;
             }
         """)
+        self.log_text.document().setMaximumBlockCount(LOG_MAX_LINES) # oldest lines are discarded
         logs_left.addWidget(self.log_text)
+        self.log_stats_label = QLabel("")
+        self.log_stats_label.setStyleSheet("color: rgba(255, 255, 255, 0.6); font-size: 12px;")
+        logs_left.addWidget(self.log_stats_label)
+        # log lines are coalesced in a ring buffer and written to the view at a fixed rate
+        self.log_buffer = LogRingBuffer()
+        self.log_timer = QTimer(self)
+        self.log_timer.setInterval(LOG_REFRESH_INTERVAL)
+        self.log_timer.timeout.connect(self.flush_logs)
+        self.log_timer.start()
         
         logs_horizontal.addLayout(logs_left, stretch=7)
         
@@ -575,7 +862,7 @@ class MainWindow(QMainWindow):
         logs_video_mini_layout.addWidget(logs_mini_title)
         
         # Ajout du widget vidéo partagé (sera déplacé dynamiquement)
-        logs_video_mini_layout.addLayout(self.vlc_video_widget_logs_placeholder)
+        logs_video_mini_layout.addLayout(self.video_widget_logs_placeholder)
         
         logs_horizontal.addWidget(logs_video_mini_frame, stretch=3)
         logs_layout.addLayout(logs_horizontal)
@@ -635,7 +922,7 @@ class MainWindow(QMainWindow):
         stats_grid.addWidget(self.stats_box1, 0, 0)
         stats_grid.addWidget(self.stats_box3, 0, 1)
         stats_grid.addWidget(self.stats_box4, 1, 0, 1, 2)
-        self.tab_widget.addTab(stats_tab, "Statistiques")
+        self.stats_tab_index = self.tab_widget.addTab(stats_tab, "Statistiques")
         self.tab_widget.currentChanged.connect(self.on_tab_changed)
         
         content_layout.addWidget(self.tab_widget)
@@ -691,11 +978,15 @@ class MainWindow(QMainWindow):
         # connect tab change
         self.tab_widget.currentChanged.connect(self.on_tab_changed)
         
-        # VLC initialization
-        self.init_vlc_player()
+        # VLC initialization (the shared preview needs no player nor connection of its own)
+        self.player = None
+        if PREVIEW_MODE == "vlc":
+            self.init_vlc_player()
+        else:
+            self.volume_slider.setEnabled(False)
+            self.volume_slider.setToolTip("Aperçu sans son (SUPERVISION_PREVIEW=vlc pour l'écoute)")
 
     def setup_channels(self):
-        from stream_monitor import StreamMonitor # import here to avoid circular dependency
         self.channel_combo.blockSignals(True) # block signals during population
         self.channel_combo.clear()
         
@@ -704,8 +995,8 @@ class MainWindow(QMainWindow):
 
         for i, channel in enumerate(self.all_channels):
             self.channel_combo.addItem(channel["name"])
-            # create a new StreamMonitor for each channel
-            self.monitors[channel["name"]] = StreamMonitor(channel["url"], channel["db_name"], channel["name"])
+        # start monitors of new channels, already running ones are kept
+        self.supervisor.sync(self.all_channels)
         
         if self.all_channels:
                         self.channel_combo.setCurrentIndex(0) # set index after population
@@ -716,14 +1007,8 @@ class MainWindow(QMainWindow):
             if index < 0 or index >= len(self.all_channels):
                 return
 
-            # stop previous channel's monitor and VLC player
-            if self.active_monitor:
-                try:
-                    self.active_monitor.status_signal.disconnect(self.update_status)
-                    self.active_monitor.log_signal.disconnect(self.append_log)
-                except TypeError:
-                    pass # signal was not connected
-                self.active_monitor.stop()
+            # unsubscribe from previous channel's monitor (it keeps running) and stop VLC player
+            self.detach_active_monitor()
 
             if hasattr(self, 'player') and self.player:
                 self.player.stop()
@@ -742,21 +1027,31 @@ class MainWindow(QMainWindow):
             # update interface display
             self.update_channel_display(selected_channel_name)
             
-            # connect signals and start new monitor
-            self.active_monitor.status_signal.connect(self.update_status)
-            self.active_monitor.log_signal.connect(self.append_log)
-            self.active_monitor.start()
+            # subscribe to the events of the new monitor, started by the supervisor if needed
+            bus = self.supervisor.bus
+            self.bus_subscriptions = [
+                bus.subscribe(event_bus.StatusEvent, self.bus_event_signal.emit, channel=selected_channel_name),
+                # log lines are only buffered (no Qt event per line), the log timer shows them
+                bus.subscribe(event_bus.LogEvent, self.buffer_log_event, channel=selected_channel_name),
+            ]
+            if not self.active_monitor.is_alive():
+                self.active_monitor.start()
+            self.alert_shown = self.active_monitor.status not in ("OK", "INIT")
+            self.status_indicator.set_status(self.active_monitor.status)
+            self.status_label.setText(f"Statut: {self.active_monitor.status}")
             
-            # start VLC player for new channel
+            # start VLC player for new channel, or show the frames of its monitor
             if hasattr(self, 'player') and self.player:
                 media = self.instance.media_new(self.active_monitor.stream_url)
                 self.player.set_media(media)
                 self.player.play()
+            elif isinstance(self.video_widget, FramePreview):
+                self.video_widget.set_monitor(self.active_monitor)
             
             # load incidents and update statistics for new channel
             self.load_incidents()
             self.update_stats_tab()
-            self.log_text.clear() # clear previous logs
+            self.clear_logs() # clear previous logs
             self.append_log(f"<span style='color:#4ecdc4'>Supervision démarrée pour : {selected_channel_name}</span>")
         except Exception as e:
             self.append_log(f"<span style='color:#ff6b6b'>❌ Erreur critique lors de la sélection de la chaîne : {e}</span>")
@@ -764,6 +1059,14 @@ class MainWindow(QMainWindow):
             with open("crash.log", "a", encoding="utf-8") as f:
                 f.write(traceback.format_exc())
 
+    def detach_active_monitor(self):
+        if not self.active_monitor:
+            return
+        for subscription in self.bus_subscriptions:
+            self.supervisor.bus.unsubscribe(subscription)
+        self.bus_subscriptions = []
+        self.active_monitor = None
+
     def update_channel_display(self, channel_name):
         self.setWindowTitle(f"Supervision {channel_name}")
         self.title_label.setText(f"SUPERVISION {channel_name.upper()}")
@@ -776,12 +1079,14 @@ class MainWindow(QMainWindow):
         self.logo_label.clear()
         self.status_indicator.set_status("NONE")
         self.status_label.setText("Statut: Aucune chaîne")
-        self.log_text.clear()
-        self.incidents_table.setRowCount(0)
+        self.clear_logs()
+        self.incident_model.set_filters(None)
         self.update_stats_tab() # will display empty graphs
         if hasattr(self, 'player') and self.player:
             self.player.stop()
-        self.active_monitor = None
+        if isinstance(self.video_widget, FramePreview):
+            self.video_widget.set_monitor(None)
+        self.detach_active_monitor()
 
     def add_channel(self):
         from PyQt5.QtWidgets import QDialog, QFormLayout, QLineEdit, QDialogButtonBox
@@ -830,7 +1135,7 @@ class MainWindow(QMainWindow):
             self.all_channels.append(new_channel)
             
             # save updated channels
-            from main import save_channels # import here to avoid circular dependency
+            from startup import save_channels
             save_channels(self.all_channels)
             
             # update ComboBox and monitors
@@ -840,7 +1145,7 @@ class MainWindow(QMainWindow):
             self.append_log(f"<span style='color:#4CAF50'>Channel '{channel_name}' added successfully.</span>")
 
     def delete_channel(self):
-        from main import save_channels # Import here to avoid circular dependency
+        from startup import save_channels
         
         current_channel_name = self.channel_combo.currentText()
         
@@ -860,20 +1165,13 @@ class MainWindow(QMainWindow):
                     break
             
             if channel_to_delete:
-                # delete database files
-                data_dir = os.path.join(os.getcwd(), "data")
-                db_path = os.path.join(data_dir, channel_to_delete["db_name"])
-                csv_path = os.path.join(data_dir, channel_to_delete["db_name"].replace(".db", ".csv"))
-                
-                if os.path.exists(db_path):
-                    os.remove(db_path)
-                if os.path.exists(csv_path):
-                    os.remove(csv_path)
+                # delete the channel's incidents
+                self.store.clear(current_channel_name)
                 
                 # delete associated monitor
-                if current_channel_name in self.monitors:
-                    self.monitors[current_channel_name].stop()
-                    del self.monitors[current_channel_name]
+                if self.active_monitor is self.monitors.get(current_channel_name):
+                    self.detach_active_monitor()
+                self.supervisor.remove_channel(current_channel_name)
                 
                 # remove channel from list
                 self.all_channels.remove(channel_to_delete)
@@ -901,11 +1199,11 @@ class MainWindow(QMainWindow):
             self.instance = vlc.Instance()
             self.player = self.instance.media_player_new()
             if sys.platform.startswith('linux'):
-                self.player.set_xwindow(int(self.vlc_video_widget.winId()))
+                self.player.set_xwindow(int(self.video_widget.winId()))
             elif sys.platform == "win32":
-                self.player.set_hwnd(int(self.vlc_video_widget.winId()))
+                self.player.set_hwnd(int(self.video_widget.winId()))
             elif sys.platform == "darwin":
-                self.player.set_nsobject(int(self.vlc_video_widget.winId()))
+                self.player.set_nsobject(int(self.video_widget.winId()))
             self.player.play()
             self.player.audio_set_volume(self.volume_slider.value())
             import time
@@ -914,28 +1212,28 @@ class MainWindow(QMainWindow):
             import traceback
             with open("crash.log", "a", encoding="utf-8") as f:
                 f.write(traceback.format_exc())
-            self.log_text.append(f"<span style='color:#ff6b6b'>Erreur VLC/vidéo : {e}</span>")
+            self.append_log(f"<span style='color:#ff6b6b'>Erreur VLC/vidéo : {e}</span>")
             msg = QMessageBox(self)
             msg.setIcon(QMessageBox.Critical)
             msg.setWindowTitle("Erreur VLC/vidéo")
             msg.setText(f"Impossible d'initialiser la vidéo : {e}")
             msg.setStandardButtons(QMessageBox.Ok)
             msg.show()
-            self.vlc_video_widget.setVisible(False)
+            self.video_widget.setVisible(False)
 
     def toggle_play_pause(self):
         try:
-            if hasattr(self, 'player') and self.player is not None:
-                if not hasattr(self, 'is_paused'):
-                    self.is_paused = False
-            if self.is_paused:
-                self.player.play()
-                self.play_pause_btn.setText("⏸")
+            if not hasattr(self, 'is_paused'):
                 self.is_paused = False
+            if self.player is None:
+                # shared preview: freezes the picture, the monitor keeps analysing
+                self.video_widget.paused = not self.is_paused
+            elif self.is_paused:
+                self.player.play()
             else:
                 self.player.pause()
-                self.play_pause_btn.setText("▶️")
-                self.is_paused = True
+            self.is_paused = not self.is_paused
+            self.play_pause_btn.setText("▶️" if self.is_paused else "⏸")
         except Exception as e:
             import traceback
             with open("crash.log", "a", encoding="utf-8") as f:
@@ -955,7 +1253,8 @@ class MainWindow(QMainWindow):
             self.status_label.setText(f"Statut: {status}")
             
             if status != "OK":
-                self.add_incident(status)
+                # the monitor records the episode itself, the table is reloaded once it is committed
+                self.update_stats_tab()
                 
             if status in ("LAG", "BLACK SCREEN", "ERROR") and not self.alert_shown:
                 self.alert_shown = True
@@ -965,27 +1264,46 @@ class MainWindow(QMainWindow):
         except Exception as e:
             self.append_log(f"<span style='color:#ff6b6b'>❌ Erreur mise à jour statut : {e}</span>")
 
+    def on_bus_event(self, event):
+        # GUI thread; ignores the events still queued for a channel that is no longer selected
+        if not self.active_monitor or event.channel != self.active_monitor.channel_name:
+            return
+        if isinstance(event, event_bus.StatusEvent):
+            self.update_status(event.status)
+
+    def buffer_log_event(self, event):
+        # called in the bus delivery thread: the buffer is thread-safe
+        self.log_buffer.append(f"{time.strftime('%H:%M:%S', time.localtime(event.ts))} - {event.message}")
+
     def append_log(self, message):
+        self.log_buffer.append(message)
+
+    def flush_logs(self):
         try:
-            timestamp = QTimer().remainingTime()
-            self.log_text.append(f"<span style='color:#4ecdc4'>[{timestamp}]</span> {message}")
-            self.log_text.verticalScrollBar().setValue(self.log_text.verticalScrollBar().maximum())
+            lines = self.log_buffer.drain()
+            if not lines:
+                return
+            scrollbar = self.log_text.verticalScrollBar()
+            follow = scrollbar.value() >= scrollbar.maximum() - 4 # keep the position if the user scrolled up
+            self.log_text.setUpdatesEnabled(False)
+            for message, repeats, timestamp in lines:
+                suffix = f" <span style='color:#ffb300'>(x{repeats})</span>" if repeats > 1 else ""
+                self.log_text.append(f"<span style='color:#4ecdc4'>[{timestamp}]</span> {message}{suffix}")
+            self.log_text.setUpdatesEnabled(True)
+            if follow:
+                scrollbar.setValue(scrollbar.maximum())
+            buffer = self.log_buffer
+            if buffer.dropped or buffer.merged:
+                self.log_stats_label.setText(f"{buffer.merged} lignes fusionnées, {buffer.dropped} lignes perdues")
         except Exception as e:
             print(f"Log error: {e}")
 
+    def clear_logs(self):
+        self.log_buffer.clear()
+        self.log_text.clear()
+
     def add_incident(self, incident_type):
         try:
-            from datetime import datetime
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            
-            row = self.incidents_table.rowCount()
-            self.incidents_table.insertRow(row)
-            
-            self.incidents_table.setItem(row, 0, QTableWidgetItem(timestamp))
-            self.incidents_table.setItem(row, 1, QTableWidgetItem(incident_type))
-            self.incidents_table.setItem(row, 2, QTableWidgetItem("En cours..."))
-            self.incidents_table.setItem(row, 3, QTableWidgetItem("🔍 Surveillé"))
-            
             # save incident via active monitor
             if self.active_monitor:
                 self.active_monitor.add_incident(incident_type, f"Incident detected on stream {self.active_monitor.channel_name}.")
@@ -996,32 +1314,45 @@ class MainWindow(QMainWindow):
 
     def load_incidents(self):
         try:
-            self.incidents_table.setRowCount(0) # clear table before reloading
-            data_dir = os.path.join(os.getcwd(), "data")
-            db_path = os.path.join(data_dir, self.active_monitor.db_name)
-            
-            if not os.path.exists(db_path):
-                with open(db_path, 'w', encoding='utf-8') as f:
-                    pass # create the file
-
-            if os.path.exists(db_path):
-                with open(db_path, "r", encoding="utf-8") as f:
-                    for line in f:
-                        if line.strip():
-                            parts = line.strip().split("|", 2)
-                            if len(parts) == 3:
-                                timestamp, incident_type, message = [p.strip() for p in parts]
-                                
-                                row = self.incidents_table.rowCount()
-                                self.incidents_table.insertRow(row)
-                                
-                                self.incidents_table.setItem(row, 0, QTableWidgetItem(timestamp))
-                                self.incidents_table.setItem(row, 1, QTableWidgetItem(incident_type))
-                                self.incidents_table.setItem(row, 2, QTableWidgetItem("Terminé"))
-                                self.incidents_table.setItem(row, 3, QTableWidgetItem("✅ Résolu"))
+            if not self.active_monitor:
+                return
+            filters = self.incident_model.filters
+            if not filters or filters.get('channel') != self.active_monitor.channel_name:
+                filters = {'channel': self.active_monitor.channel_name}
+            self.incident_model.set_filters(filters)
+            self.update_type_filter()
         except Exception as e:
             self.append_log(f"<span style='color:#ff6b6b'>❌ Erreur chargement incidents : {e}</span>")
 
+    def update_type_filter(self):
+        """lists the known types and those recorded for the active channel (rollups), keeping the selection."""
+        types = ['Tous'] + self.store.incident_types(self.active_monitor.channel_name)
+        if types == [self.type_filter.itemText(i) for i in range(self.type_filter.count())]:
+            return
+        selected = self.type_filter.currentText()
+        self.type_filter.blockSignals(True)
+        self.type_filter.clear()
+        self.type_filter.addItems(types)
+        self.type_filter.setCurrentIndex(max(0, self.type_filter.findText(selected)))
+        self.type_filter.blockSignals(False)
+
+    def on_incidents_committed(self, channels):
+        # GUI thread; reloads are grouped by the single-shot timer
+        if self.active_monitor and self.active_monitor.channel_name in channels:
+            self.incidents_reload_timer.start()
+
+    def show_evidence(self, index, previous=None):
+        """shows the thumbnail saved with the selected incident (files are small, loaded on selection only)."""
+        digest = self.incident_model.data(index, IncidentTableModel.EVIDENCE_ROLE) if index.isValid() else None
+        path = evidence_store.get_evidence_store().path(digest)
+        if path is None:
+            self.evidence_label.setPixmap(QPixmap())
+            self.evidence_label.setText("Aucune capture" if index.isValid() else "")
+            return
+        pixmap = QPixmap(path)
+        self.evidence_label.setPixmap(pixmap.scaled(self.evidence_label.width(), self.evidence_label.height(),
+                                                    Qt.KeepAspectRatio, Qt.SmoothTransformation))
+
     def refresh_incidents(self):
         try:
             self.load_incidents()
@@ -1037,17 +1368,9 @@ class MainWindow(QMainWindow):
                                        QMessageBox.Yes | QMessageBox.No)
             
             if reply == QMessageBox.Yes:
-                self.incidents_table.setRowCount(0)
-                
-                # clear active channel files
-                data_dir = os.path.join(os.getcwd(), "data")
-                db_path = os.path.join(data_dir, self.active_monitor.db_name)
-                csv_path = os.path.join(data_dir, self.active_monitor.db_name.replace(".db", ".csv"))
-                
-                if os.path.exists(db_path):
-                    os.remove(db_path)
-                if os.path.exists(csv_path):
-                    os.remove(csv_path)
+                # clear active channel incidents
+                self.store.clear(self.active_monitor.channel_name)
+                self.incident_model.reload()
                 
                 self.append_log(f"🗑️ All incidents for {self.active_monitor.channel_name} have been cleared")
                 self.update_stats_tab() # update stats after clearing
@@ -1056,25 +1379,35 @@ class MainWindow(QMainWindow):
 
     def export_incidents(self):
         try:
-            filename, _ = QFileDialog.getSaveFileName(
-                self, "Export Incidents", 
-                f"incidents_{self.active_monitor.channel_name.lower().replace(' ', '_')}.csv", 
-                "CSV Files (*.csv)"
-            )
-            
-            if filename:
-                data_dir = os.path.join(os.getcwd(), "data")
-                csv_path = os.path.join(data_dir, self.active_monitor.db_name.replace(".db", ".csv"))
-                
-                if os.path.exists(csv_path):
-                    import shutil
-                    shutil.copy2(csv_path, filename)
-                    self.append_log(f"📊 Export successful: {filename}")
-                else:
-                    self.append_log("<span style='color:#ff6b6b'>❌ No incidents to export for this channel</span>")
+            channel_name = self.active_monitor.channel_name
+            if not self.store.total_count(channel_name):
+                self.append_log("<span style='color:#ff6b6b'>❌ No incidents to export for this channel</span>")
+                return
+            self.ask_export("Export Incidents", f"incidents_{channel_name.lower().replace(' ', '_')}",
+                            {'channel': channel_name})
         except Exception as e:
             self.append_log(f"<span style='color:#ff6b6b'>❌ Export error: {e}</span>")
 
+    def ask_export(self, title, basename, filters):
+        filename, selected = QFileDialog.getSaveFileName(self, title, f"{basename}.csv", ";;".join(EXPORT_FILE_FILTERS))
+        if not filename:
+            return
+        fmt = EXPORT_FILE_FILTERS.get(selected, "csv")
+        if not os.path.splitext(filename)[1]:
+            filename += f".{fmt}"
+        # streamed from the store in a background thread, the window stays responsive on large histories
+        threading.Thread(target=self.run_export, args=(filename, fmt, filters), daemon=True, name="IncidentExport").start()
+
+    def run_export(self, filename, fmt, filters):
+        try:
+            incident_store.get_writer().flush()
+            count = incident_export.export(filename, fmt, store=self.store, **filters)
+            self.append_log(f"📊 Export successful: {filename} ({count} incidents)")
+        except Exception as e:
+            self.append_log(f"<span style='color:#ff6b6b'>❌ Export error: {e}</span>")
+        finally:
+            self.store.close() # connection of this thread
+
     def restart_stream(self):
         try:
             import time
@@ -1116,58 +1449,34 @@ class MainWindow(QMainWindow):
         self.add_incident("SIMULATION")
         self.append_log("<span style='color:#ffb300'>⚡ Simulated incident added</span>")
 
-    def apply_filters(self):
+    def current_filters(self):
         date_str = self.date_filter.date().toString('yyyy-MM-dd')
         type_str = self.type_filter.currentText()
-        self.incidents_table.setRowCount(0)
-        data_dir = os.path.join(os.getcwd(), 'data')
-        db_path = os.path.join(data_dir, self.active_monitor.db_name)
-        if os.path.exists(db_path):
-            with open(db_path, 'r', encoding='utf-8') as f:
-                for line in f:
-                    if line.strip():
-                        parts = line.strip().split('|', 2)
-                        if len(parts) == 3:
-                            timestamp, incident_type, message = [p.strip() for p in parts]
-                            if (date_str in timestamp) and (type_str == 'Tous' or type_str in incident_type):
-                                row = self.incidents_table.rowCount()
-                                self.incidents_table.insertRow(row)
-                                self.incidents_table.setItem(row, 0, QTableWidgetItem(timestamp))
-                                self.incidents_table.setItem(row, 1, QTableWidgetItem(incident_type))
-                                self.incidents_table.setItem(row, 2, QTableWidgetItem('Terminé'))
-                                self.incidents_table.setItem(row, 3, QTableWidgetItem('✅ Résolu'))
+        return {
+            'channel': self.active_monitor.channel_name,
+            'date': date_str,
+            'incident_type': None if type_str == 'Tous' else type_str,
+        }
+
+    def apply_filters(self):
+        # filtered by the store indexes (channel, timestamp, type), not by reading the history
+        self.incident_model.set_filters(self.current_filters())
 
     def export_filtered_incidents(self):
-        from PyQt5.QtWidgets import QFileDialog
         date_str = self.date_filter.date().toString('yyyy-MM-dd')
-        type_str = self.type_filter.currentText()
-        filename, _ = QFileDialog.getSaveFileName(self, 'Exporter incidents filtrés', f'incidents_filtres_{self.active_monitor.channel_name.lower().replace(" ", "_")}_{date_str}.csv', 'CSV Files (*.csv)')
-        if filename:
-            data_dir = os.path.join(os.getcwd(), 'data')
-            db_path = os.path.join(data_dir, self.active_monitor.db_name)
-            if os.path.exists(db_path):
-                with open(db_path, 'r', encoding='utf-8') as f, open(filename, 'w', encoding='utf-8', newline='') as fout:
-                    writer = csv.writer(fout)
-                    writer.writerow(['Timestamp', 'Type', 'Message'])
-                    for line in f:
-                        if line.strip():
-                            parts = line.strip().split('|', 2)
-                            if len(parts) == 3:
-                                timestamp, incident_type, message = [p.strip() for p in parts]
-                                if (date_str in timestamp) and (type_str == 'Tous' or type_str in incident_type):
-                                    writer.writerow([timestamp, incident_type, message])
-
-
+        self.ask_export('Exporter incidents filtrés',
+                        f'incidents_filtres_{self.active_monitor.channel_name.lower().replace(" ", "_")}_{date_str}',
+                        self.current_filters())
 
     def closeEvent(self, event):
         try:
             # clean shutdown of all supervision threads
-            for channel_name, monitor_instance in self.monitors.items():
-                if monitor_instance:
-                    try:
-                        monitor_instance.stop()
-                    except Exception as e:
-                        self.append_log(f"<span style='color:#ff6b6b'>Error stopping monitor {channel_name}: {e}</span>")
+            self.detach_active_monitor()
+            incident_store.get_writer().remove_listener(self.commit_listener)
+            try:
+                self.supervisor.stop_all()
+            except Exception as e:
+                self.append_log(f"<span style='color:#ff6b6b'>Error stopping monitors: {e}</span>")
             
             # clean shutdown of VLC player
             if hasattr(self, 'player') and self.player is not None:
@@ -1187,23 +1496,29 @@ class MainWindow(QMainWindow):
     def on_tab_changed(self, index):
         try:
             # dynamically move video widget to current tab layout
-            parent = self.vlc_video_widget.parentWidget()
+            parent = self.video_widget.parentWidget()
             if parent:
                 layout = parent.layout()
                 if layout:
-                    layout.removeWidget(self.vlc_video_widget)
+                    layout.removeWidget(self.video_widget)
             if index == 0:  # live
-                self.live_video_layout.addWidget(self.vlc_video_widget)
+                self.live_video_layout.addWidget(self.video_widget)
             elif index == 1:
-                self.vlc_video_widget_mini_placeholder.addWidget(self.vlc_video_widget)
+                self.video_widget_mini_placeholder.addWidget(self.video_widget)
             elif index == 2:
-                self.vlc_video_widget_logs_placeholder.addWidget(self.vlc_video_widget)
-            # do nothing for statistics
-            self.vlc_video_widget.update()
+                self.video_widget_logs_placeholder.addWidget(self.video_widget)
+            elif index == self.stats_tab_index and self.stats_dirty:
+                self.update_stats_tab() # incidents arrived while the tab was hidden
+            self.video_widget.update()
         except Exception as e:
             self.append_log(f"<span style='color:#ff6b6b'>Tab change error (video widget move): {e}</span>") 
 
     def update_stats_tab(self):
+        # charts are only rebuilt when visible, otherwise when the tab is opened
+        if self.tab_widget.currentIndex() != self.stats_tab_index:
+            self.stats_dirty = True
+            return
+        self.stats_dirty = False
         for chartview in [self.stats_chartview1, self.stats_chartview3, self.stats_chartview4]:
             chart = QChart()
             chart.setBackgroundBrush(QBrush(QColor(24, 24, 36)))
@@ -1215,34 +1530,27 @@ class MainWindow(QMainWindow):
         if not self.active_monitor:
             return
 
-        data_dir = os.path.join(os.getcwd(), 'data')
-        db_path = os.path.join(data_dir, self.active_monitor.db_name)
-
-        if not os.path.exists(db_path):
-            return
-
-        rows = []
+        # rollups maintained by the store with every write: the cost does not depend on the history size
+        channel_name = self.active_monitor.channel_name
         try:
-            with open(db_path, 'r', encoding='utf-8') as f:
-                for line in f:
-                    if line.strip():
-                        parts = line.strip().split('|', 2)
-                        if len(parts) == 3:
-                            timestamp, incident_type, _ = [p.strip() for p in parts]
-                            date, heure = timestamp.split(' ')
-                            rows.append({'date': date, 'heure': heure, 'type': incident_type})
+            type_counts = self.store.type_counts(channel_name)
+            total_incidents = self.store.total_count(channel_name)
+            last_date = self.store.last_date(channel_name)
+            hour_counts = self.store.hour_counts(channel_name, last_date) if last_date else {}
+            now = datetime.datetime.now()
+            downtime = self.store.downtime(channel_name, (now - datetime.timedelta(days=1)).strftime(incident_store.TIMESTAMP_FORMAT),
+                                           now.strftime(incident_store.TIMESTAMP_FORMAT))
         except Exception as e:
             self.append_log(f"<span style='color:#ff6b6b'>DB read error: {e}</span>")
             return
 
-        if not rows:
+        if not total_incidents:
             return
 
         # --- Chart 1: Incidents by Type (Bar Chart) ---
         chart1 = QChart()
         chart1.setAnimationOptions(QChart.SeriesAnimations)
         chart1.setBackgroundBrush(QBrush(QColor(24, 24, 36)))
-        type_counts = collections.Counter([r['type'] for r in rows])
         bar_set = QBarSet("Incidents")
         bar_set.setColor(QColor(255, 0, 60))
         for t in type_counts:
@@ -1266,11 +1574,12 @@ class MainWindow(QMainWindow):
         chart3 = QChart()
         chart3.setAnimationOptions(QChart.SeriesAnimations)
         chart3.setBackgroundBrush(QBrush(QColor(24, 24, 36)))
-        chart3.setTitle("Availability (24h Approximation)")
+        chart3.setTitle("Availability (last 24h)")
         chart3.setTitleBrush(QBrush(QColor(255, 255, 255)))
 
+        # outage episodes only (incident_store.OUTAGE_TYPES), overlapping ones counted once
         total_minutes = 24 * 60
-        incident_minutes = len(rows) # approximation: 1 incident = 1 minute of unavailability
+        incident_minutes = downtime / 60
         ok_minutes = max(total_minutes - incident_minutes, 0)
 
         pie_series = QPieSeries()
@@ -1292,8 +1601,6 @@ class MainWindow(QMainWindow):
         chart4 = QChart()
         chart4.setAnimationOptions(QChart.SeriesAnimations)
         chart4.setBackgroundBrush(QBrush(QColor(24, 24, 36)))
-        last_date = sorted(rows, key=lambda x: x['date'])[-1]['date']
-        hour_counts = collections.Counter([r['heure'].split(':')[0] for r in rows if r['date'] == last_date])
         bar_set_heat = QBarSet(f"Hours of {last_date}")
         bar_set_heat.setColor(QColor(255, 0, 60))
         for h in range(24):
@@ -1313,44 +1620,18 @@ class MainWindow(QMainWindow):
         self.stats_chartview4.setChart(chart4) 
 
     def delete_selected_incident(self):
-        row = self.incidents_table.currentRow()
+        row = self.incidents_table.currentIndex().row()
         if row < 0:
             self.append_log("<span style='color:#ffb300'>No incident selected.</span>")
             return
-        # get incident (timestamp, type, message)
-        timestamp = self.incidents_table.item(row, 0).text()
-        incident_type = self.incidents_table.item(row, 1).text()
-        # remove from table
-        self.incidents_table.removeRow(row)
-        # remove from incidents.db file
-        data_dir = os.path.join(os.getcwd(), "data")
-        db_path = os.path.join(data_dir, self.active_monitor.db_name)
-        if os.path.exists(db_path):
-            with open(db_path, "r", encoding="utf-8") as f:
-                lines = f.readlines()
-            with open(db_path, "w", encoding="utf-8") as f:
-                for line in lines:
-                    if timestamp not in line or incident_type not in line:
-                        f.write(line)
-        # remove from incidents.csv file
-        csv_path = os.path.join(data_dir, self.active_monitor.db_name.replace(".db", ".csv"))
-        if os.path.exists(csv_path):
-            import csv
-            rows = []
-            with open(csv_path, "r", encoding="utf-8") as fin:
-                reader = csv.reader(fin)
-                header = next(reader, None)
-                for r in reader:
-                    if len(r) < 3 or r[0] != timestamp.split()[0] or r[1] != timestamp.split()[1] or r[2] != incident_type:
-                        rows.append(r)
-            with open(csv_path, "w", encoding="utf-8", newline='') as fout:
-                writer = csv.writer(fout)
-                if header:
-                    writer.writerow(header)
-                writer.writerows(rows)
+        # get incident (id, timestamp, type)
+        incident_id, _, timestamp, incident_type = self.incident_model.incident_at(row)[:4]
+        # remove from table and from the store
+        self.incident_model.remove_row(row)
+        self.store.delete(incident_id)
         self.append_log(f"<span style='color:#ff003c'>Incident deleted: {timestamp} | {incident_type}</span>")
         # refresh statistics graphs
         try:
             self.update_stats_tab()
         except Exception as e:
-            self.append_log(f"<span style='color:#ff6b6b'>Statistics update error: {e}</span>") 
\ No newline at end of file
+            self.append_log(f"<span style='color:#ff6b6b'>Statistics update error: {e}</span>")
@@ -0,0 +1,110 @@
+"""Headless supervision daemon: runs every channel of channels.json without Qt nor display.
+
+The monitors, detectors, incident store and channel logs are the same as in
+the GUI (main.py); only the window is missing. SIGTERM or SIGINT (Ctrl+C)
+stop the monitors, commit the queued incidents and exit with status 0.
+
+With --processes N the channels are spread over N worker processes (one per
+CPU core by default with --processes 0), see sharding.py.
+
+usage: python headless.py [--channels channels.json] [--engine threads|asyncio] [--processes N]
+                          [--report-interval 60] [--duration SECONDS]
+"""
+import time
+STARTUP_T0 = time.perf_counter()  # measured before the heavy imports below
+import argparse
+import logging
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+import incident_store
+import event_bus
+from supervisor import SupervisorPool, DEFAULT_ENGINE
+from sharding import ShardedSupervisor, DEFAULT_PROCESSES
+from startup import CHANNELS_FILE, startup_log, setup_startup_log, load_channels, migrate_incidents
+
+REPORT_INTERVAL = 60  # seconds between two status lines
+
+
+def status_report(pool):
+    statuses = pool.statuses()
+    incidents = sorted(name for name, status in statuses.items() if status not in ("OK", "INIT"))
+    writer = incident_store.get_writer().stats()
+    report = f"{len(statuses)} channels, {len(statuses) - len(incidents)} OK"
+    if incidents:
+        report += ", incidents on: " + ", ".join(f"{name} ({statuses[name]})" for name in incidents)
+    return report + f" | incidents written={writer['written']} pending={writer['pending']} dropped={writer['dropped']}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the stream supervision without GUI.")
+    parser.add_argument("--channels", default=CHANNELS_FILE, help="channel configuration (default: ./channels.json)")
+    parser.add_argument("--report-interval", type=float, default=REPORT_INTERVAL,
+                        help="seconds between two status lines on stderr (default: 60)")
+    parser.add_argument("--engine", choices=("threads", "asyncio"), default=DEFAULT_ENGINE,
+                        help="one thread per channel, or one event loop and an analysis pool (many channels)")
+    parser.add_argument("--processes", type=int, default=1,
+                        help=f"worker processes sharing the channels, 0 for one per CPU ({DEFAULT_PROCESSES}); "
+                             f"1 runs everything in this process (default)")
+    parser.add_argument("--duration", type=float, help="stop after this many seconds (benchmarks)")
+    args = parser.parse_args(argv)
+
+    setup_startup_log()
+    console = logging.StreamHandler()
+    console.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+    startup_log.addHandler(console)
+    startup_log.info(f"Imports done in {time.perf_counter() - STARTUP_T0:.2f}s (headless)")
+
+    if not os.path.exists(args.channels):
+        startup_log.error(f"{args.channels} not found")
+        return 1
+    channels = load_channels(args.channels)
+    if not channels:
+        startup_log.error(f"{args.channels} is empty, add a channel first")
+        return 1
+    migrate_incidents(channels)
+
+    stop = threading.Event()
+
+    def request_stop(signum, frame):
+        startup_log.info(f"{signal.Signals(signum).name} received, stopping")
+        stop.set()
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGTERM, request_stop)
+
+    # status changes on stderr, delivered by the bus thread of this subscription
+    bus = event_bus.get_bus()
+    status_changes = bus.subscribe(
+        event_bus.StatusEvent, lambda e: startup_log.info(f"{e.channel}: {e.previous or 'INIT'} -> {e.status}"))
+    if args.processes == 1:
+        pool = SupervisorPool(channels, bus=bus, engine=args.engine)
+    else:
+        pool = ShardedSupervisor(channels, processes=args.processes or DEFAULT_PROCESSES, bus=bus, engine=args.engine)
+    startup_log.info(f"Supervision started in {time.perf_counter() - STARTUP_T0:.2f}s ({len(channels)} channels"
+                     f"{f', {pool.processes} processes' if args.processes != 1 else ''})")
+    deadline = time.monotonic() + args.duration if args.duration else None
+    try:
+        while not stop.is_set():
+            timeout = args.report_interval
+            if deadline is not None:
+                timeout = min(timeout, max(0.0, deadline - time.monotonic()))
+            if stop.wait(timeout):
+                break
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            startup_log.info(status_report(pool))
+    finally:
+        stopping = time.perf_counter()
+        # monitors first, then the incident writer and the channel logs (see SupervisorPool.stop_all)
+        pool.stop_all()
+        bus.unsubscribe(status_changes)
+        startup_log.info(f"Supervision stopped in {time.perf_counter() - stopping:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    # frozen executable: spawned workers (sharding, moderation service) must not start another daemon
+    multiprocessing.freeze_support()
+    sys.exit(main())
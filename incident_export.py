@@ -0,0 +1,133 @@
+"""Streaming export of the incident store to CSV, JSON lines or Parquet.
+
+Rows are read from an indexed query through a cursor and written as they come,
+the history is never loaded in memory.
+
+usage: python incident_export.py -o report.csv [--channel NAME ...] [--type TYPE]
+                                 [--date YYYY-MM-DD | --yesterday | --start TS --end TS]
+                                 [--format csv|jsonl|parquet]
+"""
+import argparse
+import csv
+import datetime
+import json
+import os
+import sys
+import incident_store
+
+try:
+    # optional: only needed for the Parquet format
+    import pyarrow
+    import pyarrow.parquet as pq
+except ImportError:
+    pyarrow = pq = None
+
+FORMATS = ("csv", "jsonl", "parquet")
+PARQUET_ROW_GROUP = 10000  # rows buffered per Parquet row group
+
+
+def format_from_path(path):
+    ext = os.path.splitext(path)[1].lower().lstrip(".")
+    if ext == "json":
+        ext = "jsonl"
+    if ext not in FORMATS:
+        raise ValueError(f"unknown export format {ext!r}, expected one of {', '.join(FORMATS)}")
+    return ext
+
+
+def _write_csv(path, rows):
+    count = 0
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(incident_store.COLUMNS)
+        for row in rows:
+            writer.writerow(["" if value is None else value for value in row])
+            count += 1
+    return count
+
+
+def _write_jsonl(path, rows):
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(dict(zip(incident_store.COLUMNS, row)), ensure_ascii=False))
+            f.write("\n")
+            count += 1
+    return count
+
+
+def _write_parquet(path, rows):
+    if pq is None:
+        raise RuntimeError("Parquet export requires the optional pyarrow package: pip install pyarrow "
+                           "(or pip install -r requirements-optional.txt)")
+    schema = pyarrow.schema([
+        ("id", pyarrow.int64()), ("channel", pyarrow.string()), ("ts", pyarrow.string()),
+        ("type", pyarrow.string()), ("message", pyarrow.string()), ("end_ts", pyarrow.string()),
+        ("duration", pyarrow.float64()), ("evidence", pyarrow.string()),
+    ])
+    count = 0
+    with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= PARQUET_ROW_GROUP:
+                writer.write_table(pyarrow.Table.from_pylist([dict(zip(incident_store.COLUMNS, r)) for r in batch], schema))
+                count += len(batch)
+                batch = []
+        if batch:
+            writer.write_table(pyarrow.Table.from_pylist([dict(zip(incident_store.COLUMNS, r)) for r in batch], schema))
+            count += len(batch)
+    return count
+
+
+WRITERS = {"csv": _write_csv, "jsonl": _write_jsonl, "parquet": _write_parquet}
+
+
+def export(path, fmt=None, store=None, channel=None, date=None, start=None, end=None, incident_type=None):
+    """writes the matching incidents (all channels when channel is None) ordered by time, returns the row count.
+
+    channel: name or list of names; date: 'YYYY-MM-DD'; start / end: 'YYYY-MM-DD HH:MM:SS' (end excluded).
+    """
+    fmt = fmt or format_from_path(path)
+    if fmt not in WRITERS:
+        raise ValueError(f"unknown export format {fmt!r}, expected one of {', '.join(FORMATS)}")
+    store = store or incident_store.get_store()
+    rows = store.iter_query(channel=channel, date=date, start=start, end=end, incident_type=incident_type,
+                            order_by="ts")
+    return WRITERS[fmt](path, rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export the incident history (CSV, JSON lines or Parquet).")
+    parser.add_argument("-o", "--output", required=True, help="output file, the format defaults to its extension")
+    parser.add_argument("-f", "--format", choices=FORMATS)
+    parser.add_argument("-c", "--channel", action="append", help="channel name (repeatable, default: all channels)")
+    parser.add_argument("-t", "--type", dest="incident_type", help="incident type, e.g. 'BLACK SCREEN'")
+    period = parser.add_mutually_exclusive_group()
+    period.add_argument("--date", help="single day, YYYY-MM-DD")
+    period.add_argument("--yesterday", action="store_true", help="the previous day (nightly reports)")
+    parser.add_argument("--start", help="first timestamp, 'YYYY-MM-DD[ HH:MM:SS]'")
+    parser.add_argument("--end", help="end timestamp (excluded), 'YYYY-MM-DD[ HH:MM:SS]'")
+    parser.add_argument("--db", help="incident store file (default: data/incidents.sqlite3)")
+    args = parser.parse_args(argv)
+
+    date = args.date
+    if args.yesterday:
+        date = (datetime.date.today() - datetime.timedelta(days=1)).isoformat()
+    if date and (args.start or args.end):
+        parser.error("--start/--end cannot be combined with --date/--yesterday")
+    start = f"{args.start} 00:00:00" if args.start and len(args.start) == 10 else args.start
+    end = f"{args.end} 00:00:00" if args.end and len(args.end) == 10 else args.end
+    store = incident_store.IncidentStore(args.db) if args.db else incident_store.get_store()
+    try:
+        count = export(args.output, args.format, store=store, channel=args.channel, date=date, start=start,
+                       end=end, incident_type=args.incident_type)
+    except (ValueError, RuntimeError) as e:
+        print(f"export failed: {e}", file=sys.stderr)
+        return 1
+    print(f"{count} incidents exported to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
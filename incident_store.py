@@ -0,0 +1,828 @@
+import collections
+import csv
+import datetime
+import itertools
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+DATA_DIR = os.path.join(os.getcwd(), "data")
+DB_FILE = "incidents.sqlite3"
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"  # stored as text: sorts chronologically and matches the former files
+# background writer: incidents are committed in batches, at most every FLUSH_INTERVAL seconds.
+# SYNC_POLICY is the SQLite synchronous mode of the writer connection:
+#   "off" (no fsync), "normal" (fsync at WAL checkpoints, default), "full" (fsync on every batch)
+FLUSH_INTERVAL = float(os.environ.get("INCIDENT_FLUSH_INTERVAL", 0.5))
+SYNC_POLICY = os.environ.get("INCIDENT_SYNC", "normal").lower()
+MAX_BATCH = 500  # incidents per transaction
+MAX_PENDING = 10000  # incidents queued before new ones are dropped
+SYNC_MODES = {"off": "OFF", "normal": "NORMAL", "full": "FULL"}
+
+log = logging.getLogger("incident_store")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS incidents (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    channel TEXT NOT NULL,
+    ts TEXT NOT NULL,
+    type TEXT NOT NULL,
+    message TEXT NOT NULL DEFAULT '',
+    end_ts TEXT,
+    duration REAL,
+    last_seen TEXT,
+    deleted INTEGER NOT NULL DEFAULT 0,
+    evidence TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_incidents_channel_ts ON incidents(channel, ts);
+CREATE INDEX IF NOT EXISTS idx_incidents_channel_type_ts ON incidents(channel, type, ts);
+CREATE INDEX IF NOT EXISTS idx_incidents_ts ON incidents(ts);
+-- tombstones waiting for the compaction job
+CREATE INDEX IF NOT EXISTS idx_incidents_deleted ON incidents(id) WHERE deleted = 1;
+-- sort orders of the incidents table (the rowid is implicitly the last key of each index)
+CREATE INDEX IF NOT EXISTS idx_incidents_channel_type ON incidents(channel, type);
+CREATE INDEX IF NOT EXISTS idx_incidents_channel_duration ON incidents(channel, COALESCE(duration, -1));
+CREATE INDEX IF NOT EXISTS idx_incidents_channel_end ON incidents(channel, COALESCE(end_ts, '9999'));
+CREATE TABLE IF NOT EXISTS rollups (
+    channel TEXT NOT NULL,
+    period TEXT NOT NULL,
+    bucket TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (channel, period, bucket)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS migrations (
+    source TEXT PRIMARY KEY,
+    channel TEXT NOT NULL,
+    imported_at TEXT NOT NULL,
+    rows INTEGER NOT NULL
+);
+"""
+
+# an incident is an episode: opened when a condition starts (ts), extended while it lasts (last_seen)
+# and closed with its end and duration (seconds). end_ts is NULL while the episode is open.
+# evidence: digest of the thumbnail of the analysed frame in the evidence store (evidence_store.py), if any.
+COLUMNS = ("id", "channel", "ts", "type", "message", "end_ts", "duration", "evidence")
+# sort expressions: NULLs are mapped so that keyset paging can compare them
+SORT_EXPRESSIONS = {
+    "id": "id",
+    "channel": "channel",
+    "ts": "ts",
+    "type": "type",
+    "message": "message",
+    "end_ts": "COALESCE(end_ts, '9999')",  # open episodes end last
+    "duration": "COALESCE(duration, -1)",
+    "evidence": "COALESCE(evidence, '')",
+}
+# incident counts maintained with every write, per channel and:
+#   "total" (bucket ''), "type" (bucket = type), "day" ('YYYY-MM-DD'), "hour" ('YYYY-MM-DD HH')
+ROLLUP_PERIODS = ("total", "type", "day", "hour")
+# incident types raised by the monitors, offered by the filters before any was recorded
+INCIDENT_TYPES = ("BLACK SCREEN", "LAG", "ERROR", "SILENCE AUDIO", "LOGO", "FORBIDDEN TEXT", "NSFW")
+# the types that are outages of the stream itself (availability); moderation episodes (LOGO, NSFW, ...) are not
+OUTAGE_TYPES = ("ERROR", "BLACK SCREEN", "LAG", "SILENCE AUDIO")
+# columns added to the first version of the table
+UPGRADE_COLUMNS = {"end_ts": "TEXT", "duration": "REAL", "last_seen": "TEXT", "deleted": "INTEGER NOT NULL DEFAULT 0",
+                   "evidence": "TEXT"}
+# retention: incidents older than this many days are expired by the compaction job (0 keeps everything).
+# Overridable per channel in channels.json with "retention_days".
+DEFAULT_RETENTION_DAYS = int(os.environ.get("INCIDENT_RETENTION_DAYS", 90))
+COMPACTION_INTERVAL = 3600  # seconds between two compaction runs
+COMPACTION_DELAY = 60  # seconds after start-up before the first run
+COMPACTION_BATCH = 1000  # rows per transaction, so that the writer is never blocked for long
+
+
+def _day_bounds(date):
+    """[start, end) timestamps of a 'YYYY-MM-DD' day."""
+    day = datetime.datetime.strptime(date, "%Y-%m-%d")
+    return day.strftime(TIMESTAMP_FORMAT), (day + datetime.timedelta(days=1)).strftime(TIMESTAMP_FORMAT)
+
+
+class IncidentStore:
+    """Embedded SQLite incident store (WAL mode), shared by every channel.
+
+    Each thread gets its own connection; incidents are indexed by channel,
+    timestamp and type so that filters never scan the whole history.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(DATA_DIR, DB_FILE)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._local = threading.local()
+        conn = self._conn()
+        self._upgrade(conn)
+        has_rollups = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'rollups'").fetchone()
+        conn.executescript(SCHEMA)
+        conn.commit()
+        if not has_rollups:
+            self.rebuild_rollups()
+
+    @staticmethod
+    def _upgrade(conn):
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(incidents)")}
+        if not columns:
+            return
+        with conn:
+            for name, sql_type in UPGRADE_COLUMNS.items():
+                if name not in columns:
+                    conn.execute(f"ALTER TABLE incidents ADD COLUMN {name} {sql_type}")
+            if "end_ts" not in columns:
+                # rows written before episodes are single events of unknown duration
+                conn.execute("UPDATE incidents SET end_ts = ts WHERE end_ts IS NULL")
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            # only effective on a new database (before WAL mode writes its header): pages freed by the
+            # compaction can then be returned to the file system
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # --- writes ---
+
+    def add(self, channel, incident_type, message="", ts=None, conn=None):
+        """records a one-off incident (an episode that starts and ends at ts)."""
+        ts = ts or datetime.datetime.now().strftime(TIMESTAMP_FORMAT)
+        if conn is None:
+            with self._conn() as conn:
+                return self.add(channel, incident_type, message, ts, conn=conn)
+        cur = conn.execute("INSERT INTO incidents (channel, ts, type, message, end_ts, duration, last_seen) "
+                           "VALUES (?, ?, ?, ?, ?, 0, ?)", (channel, ts, incident_type, message, ts, ts))
+        self._bump(conn, channel, incident_type, ts)
+        return cur.lastrowid
+
+    def open_episode(self, channel, incident_type, message="", ts=None, evidence=None, conn=None):
+        ts = ts or datetime.datetime.now().strftime(TIMESTAMP_FORMAT)
+        if conn is None:
+            with self._conn() as conn:
+                return self.open_episode(channel, incident_type, message, ts, evidence, conn=conn)
+        cur = conn.execute("INSERT INTO incidents (channel, ts, type, message, last_seen, evidence) "
+                           "VALUES (?, ?, ?, ?, ?, ?)", (channel, ts, incident_type, message, ts, evidence))
+        self._bump(conn, channel, incident_type, ts)
+        return cur.lastrowid
+
+    def update_episode(self, incident_id, last_seen, conn=None):
+        conn = conn or self._conn()
+        conn.execute("UPDATE incidents SET last_seen = ? WHERE id = ? AND end_ts IS NULL", (last_seen, incident_id))
+
+    def close_episode(self, incident_id, end_ts, duration, conn=None):
+        conn = conn or self._conn()
+        conn.execute("UPDATE incidents SET end_ts = ?, last_seen = ?, duration = ? WHERE id = ?",
+                     (end_ts, end_ts, duration, incident_id))
+
+    def close_stale_episodes(self):
+        """closes the episodes left open by a previous run at the last time they were seen."""
+        conn = self._conn()
+        with conn:
+            cur = conn.execute(
+                "UPDATE incidents SET end_ts = COALESCE(last_seen, ts), "
+                "duration = CAST(strftime('%s', COALESCE(last_seen, ts)) AS INTEGER) - CAST(strftime('%s', ts) AS INTEGER) "
+                "WHERE end_ts IS NULL")
+        return cur.rowcount
+
+    def delete(self, incident_ids):
+        """tombstones incidents: hidden at once, physically removed by compact()."""
+        if isinstance(incident_ids, int):
+            incident_ids = [incident_ids]
+        conn = self._conn()
+        with conn:
+            for incident_id in incident_ids:
+                row = conn.execute("SELECT channel, type, ts FROM incidents WHERE id = ? AND deleted = 0",
+                                   (incident_id,)).fetchone()
+                if row is None:
+                    continue
+                conn.execute("UPDATE incidents SET deleted = 1 WHERE id = ?", (incident_id,))
+                self._bump(conn, *row, delta=-1)
+
+    def clear(self, channel):
+        """tombstones every incident of a channel."""
+        conn = self._conn()
+        with conn:
+            conn.execute("UPDATE incidents SET deleted = 1 WHERE channel = ? AND deleted = 0", (channel,))
+            conn.execute("DELETE FROM rollups WHERE channel = ?", (channel,))
+
+    # --- retention and compaction ---
+
+    def expire(self, channel, before, batch=COMPACTION_BATCH):
+        """tombstones the channel's closed episodes that started before the `before` timestamp."""
+        conn = self._conn()
+        expired = 0
+        while True:
+            with conn:
+                rows = conn.execute(
+                    "SELECT id, type, ts FROM incidents WHERE channel = ? AND ts < ? AND deleted = 0 "
+                    "AND end_ts IS NOT NULL LIMIT ?", (channel, before, batch)).fetchall()
+                if not rows:
+                    break
+                conn.executemany("UPDATE incidents SET deleted = 1 WHERE id = ?", [(row[0],) for row in rows])
+                buckets = collections.Counter()
+                for _, incident_type, ts in rows:
+                    buckets.update((("total", ""), ("type", incident_type), ("day", ts[:10]), ("hour", ts[:13])))
+                conn.executemany("UPDATE rollups SET count = count - ? WHERE channel = ? AND period = ? AND bucket = ?",
+                                 [(n, channel, period, bucket) for (period, bucket), n in buckets.items()])
+            expired += len(rows)
+            if len(rows) < batch:
+                break
+        return expired
+
+    def purge(self, batch=COMPACTION_BATCH):
+        """physically removes the tombstoned rows, batch by batch."""
+        conn = self._conn()
+        purged = 0
+        while True:
+            with conn:
+                cur = conn.execute("DELETE FROM incidents WHERE id IN "
+                                   "(SELECT id FROM incidents WHERE deleted = 1 LIMIT ?)", (batch,))
+            purged += cur.rowcount
+            if cur.rowcount < batch:
+                break
+        return purged
+
+    def compact(self, retention=None, default_days=DEFAULT_RETENTION_DAYS, now=None):
+        """applies the retention policy, purges the tombstones and gives the free space back.
+
+        retention: {channel: days} (channels not listed keep default_days, 0 or None keeps everything).
+        Returns {"expired": rows, "purged": rows}.
+        """
+        retention = retention or {}
+        now = now or datetime.datetime.now()
+        conn = self._conn()
+        channels = set(retention) | {row[0] for row in conn.execute(
+            "SELECT DISTINCT channel FROM rollups WHERE period = 'total'")}
+        expired = 0
+        for channel in sorted(channels):
+            days = retention.get(channel, default_days)
+            if days:
+                expired += self.expire(channel, (now - datetime.timedelta(days=days)).strftime(TIMESTAMP_FORMAT))
+        purged = self.purge()
+        with conn:
+            conn.execute("DELETE FROM rollups WHERE count <= 0")
+        if purged:
+            # executescript steps the pragma to completion (one step frees one page); no-op without auto_vacuum
+            conn.executescript("PRAGMA incremental_vacuum;")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return {"expired": expired, "purged": purged}
+
+    def evidence_digests(self):
+        """digests of the evidence thumbnails still referenced by an incident (tombstones included)."""
+        return {row[0] for row in self._conn().execute(
+            "SELECT DISTINCT evidence FROM incidents WHERE evidence IS NOT NULL")}
+
+    # --- rollups ---
+
+    @staticmethod
+    def _bump(conn, channel, incident_type, ts, delta=1):
+        """adds delta to the rollup counters of one incident (same transaction as the incident)."""
+        conn.executemany(
+            "INSERT INTO rollups (channel, period, bucket, count) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (channel, period, bucket) DO UPDATE SET count = count + excluded.count",
+            [(channel, "total", "", delta), (channel, "type", incident_type, delta),
+             (channel, "day", ts[:10], delta), (channel, "hour", ts[:13], delta)])
+
+    def rebuild_rollups(self):
+        """recomputes every rollup from the incidents (upgrade of a store created without them)."""
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM rollups")
+            for period, bucket in (("total", "''"), ("type", "type"), ("day", "substr(ts, 1, 10)"),
+                                   ("hour", "substr(ts, 1, 13)")):
+                conn.execute(f"INSERT INTO rollups (channel, period, bucket, count) "
+                             f"SELECT channel, '{period}', {bucket}, COUNT(*) FROM incidents WHERE deleted = 0 GROUP BY channel, {bucket}")
+
+    def _rollup(self, channel, period, start=None, end=None):
+        sql, params = "SELECT bucket, count FROM rollups WHERE channel = ? AND period = ? AND count > 0", [channel, period]
+        if start is not None:
+            sql += " AND bucket >= ?"
+            params.append(start)
+        if end is not None:
+            sql += " AND bucket < ?"
+            params.append(end)
+        return dict(self._conn().execute(sql + " ORDER BY bucket", params).fetchall())
+
+    def channel_counts(self):
+        """total number of incidents of every channel."""
+        return dict(self._conn().execute(
+            "SELECT channel, count FROM rollups WHERE period = 'total' AND count > 0 ORDER BY channel").fetchall())
+
+    def day_counts(self, channel, start=None, end=None):
+        """incidents per day ('YYYY-MM-DD'), optionally between two days (end excluded)."""
+        return self._rollup(channel, "day", start, end)
+
+    # --- queries ---
+
+    def _where(self, channel=None, date=None, start=None, end=None, incident_type=None):
+        clauses, params = ["deleted = 0"], []
+        if isinstance(channel, (list, tuple, set)):
+            channel = list(channel)
+            clauses.append(f"channel IN ({', '.join('?' * len(channel))})")
+            params.extend(channel)
+        elif channel is not None:
+            clauses.append("channel = ?")
+            params.append(channel)
+        if date is not None:
+            start, end = _day_bounds(date)
+        if start is not None:
+            clauses.append("ts >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append("ts < ?")
+            params.append(end)
+        if incident_type is not None:
+            clauses.append("type = ?")
+            params.append(incident_type)
+        return " WHERE " + " AND ".join(clauses), params
+
+    def _select(self, channel=None, date=None, start=None, end=None, incident_type=None,
+                order_by="ts", descending=False, limit=None, offset=0, after=None, with_key=False):
+        if order_by not in SORT_EXPRESSIONS:
+            raise ValueError(f"cannot sort incidents by {order_by!r}")
+        where, params = self._where(channel, date, start, end, incident_type)
+        key = SORT_EXPRESSIONS[order_by]
+        if after is not None:
+            # keyset paging: rows after the (sort key, id) of the previous page, no OFFSET scan
+            where += f" AND ({key}, id) {'<' if descending else '>'} (?, ?)"
+            params += list(after)
+        direction = "DESC" if descending else "ASC"
+        columns = ", ".join(COLUMNS) + (f", {key}" if with_key else "")
+        sql = f"SELECT {columns} FROM incidents{where} ORDER BY {key} {direction}, id {direction}"
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params += [limit, offset]
+        return self._conn().execute(sql, params)
+
+    def query(self, **filters):
+        """incidents as (id, channel, ts, type, message) tuples.
+
+        filters: channel (name or list of names), date ('YYYY-MM-DD'), start / end timestamps, incident_type,
+        order_by, descending, limit, offset.
+        """
+        return self._select(**filters).fetchall()
+
+    def iter_query(self, **filters):
+        """same as query(), streamed from the cursor instead of loaded at once."""
+        cur = self._select(**filters)
+        while True:
+            rows = cur.fetchmany(1000)
+            if not rows:
+                break
+            yield from rows
+
+    def page(self, limit, after=None, **filters):
+        """one page of query() results and the key to pass as after for the next page (None at the end).
+
+        Pages are delimited by the last row's (sort key, id) instead of an offset, so
+        reading deep into millions of rows costs the same as the first page.
+        """
+        rows = self._select(limit=limit, after=after, with_key=True, **filters).fetchall()
+        if len(rows) < limit:
+            next_after = None
+        else:
+            next_after = (rows[-1][-1], rows[-1][0])
+        return [row[:-1] for row in rows], next_after
+
+    def count(self, channel=None, date=None, start=None, end=None, incident_type=None):
+        where, params = self._where(channel, date, start, end, incident_type)
+        return self._conn().execute(f"SELECT COUNT(*) FROM incidents{where}", params).fetchone()[0]
+
+    def downtime(self, channel, start, end):
+        """seconds of outage (OUTAGE_TYPES episodes) of the channel between the start and end timestamps.
+
+        Open episodes count up to end; overlapping episodes (black and silent at once) count once.
+        """
+        # timestamps sort as text: the episodes come ordered by start, clipped to the period
+        rows = self._conn().execute(
+            f"SELECT MAX(ts, ?), MIN(COALESCE(end_ts, ?), ?) FROM incidents "
+            f"WHERE channel = ? AND type IN ({', '.join('?' * len(OUTAGE_TYPES))}) "
+            f"AND ts < ? AND (end_ts IS NULL OR end_ts > ?) AND deleted = 0 ORDER BY ts",
+            (start, end, end, channel, *OUTAGE_TYPES, end, start)).fetchall()
+        total, covered = 0.0, None  # covered: end of the union of the intervals seen so far
+        for ep_start, ep_end in rows:
+            ep_start = datetime.datetime.strptime(ep_start, TIMESTAMP_FORMAT)
+            ep_end = datetime.datetime.strptime(ep_end, TIMESTAMP_FORMAT)
+            if covered is not None and ep_start < covered:
+                ep_start = covered
+            if ep_end > ep_start:
+                total += (ep_end - ep_start).total_seconds()
+                covered = ep_end
+        return total
+
+    def type_counts(self, channel):
+        return self._rollup(channel, "type")
+
+    def incident_types(self, channel=None):
+        """INCIDENT_TYPES followed by any other type recorded (for a channel, or any channel)."""
+        sql, params = "SELECT DISTINCT bucket FROM rollups WHERE period = 'type' AND count > 0", []
+        if channel is not None:
+            sql += " AND channel = ?"
+            params.append(channel)
+        recorded = [row[0] for row in self._conn().execute(sql + " ORDER BY bucket", params)]
+        return list(INCIDENT_TYPES) + [t for t in recorded if t not in INCIDENT_TYPES]
+
+    def total_count(self, channel):
+        return self._rollup(channel, "total").get("", 0)
+
+    def last_date(self, channel):
+        row = self._conn().execute(
+            "SELECT MAX(bucket) FROM rollups WHERE channel = ? AND period = 'day' AND count > 0", (channel,)).fetchone()
+        return row[0] if row else None
+
+    def hour_counts(self, channel, date):
+        """incidents per hour ('00'..'23') of one day."""
+        hours = self._rollup(channel, "hour", f"{date} 00", f"{date} 24")
+        return {bucket[11:13]: count for bucket, count in hours.items()}
+
+    # --- migration of the former flat files ---
+
+    def _parse_text_db(self, path):
+        # former "<date> <time> | <type> | <message>" lines
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                parts = [p.strip() for p in line.strip().split("|", 2)]
+                if len(parts) == 3 and parts[0]:
+                    yield parts[0], parts[1], parts[2]
+
+    def _parse_csv(self, path):
+        # former "Date, Heure, Type, Message" rows
+        with open(path, "r", encoding="utf-8", errors="replace", newline="") as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            for row in reader:
+                if len(row) >= 4 and row[0]:
+                    yield f"{row[0]} {row[1]}".strip(), row[2], row[3]
+
+    def import_legacy(self, channel, db_path, csv_path=None):
+        """imports a channel's former pipe-delimited .db file (or its CSV copy if the .db is missing).
+
+        Imported files are renamed to *.migrated so that they are never imported twice.
+        """
+        if os.path.exists(db_path) and not self._is_sqlite(db_path):
+            source, rows = db_path, self._parse_text_db(db_path)
+        elif csv_path and os.path.exists(csv_path):
+            source, rows = csv_path, self._parse_csv(csv_path)
+        else:
+            return 0
+        conn = self._conn()
+        key = os.path.abspath(source)
+        if conn.execute("SELECT 1 FROM migrations WHERE source = ?", (key,)).fetchone():
+            return 0
+        with conn:
+            count = 0
+            buckets = collections.Counter()
+            for ts, typ, msg in rows:
+                conn.execute("INSERT INTO incidents (channel, ts, type, message, end_ts, last_seen) "
+                             "VALUES (?, ?, ?, ?, ?, ?)", (channel, ts, typ, msg, ts, ts))
+                buckets.update((("total", ""), ("type", typ), ("day", ts[:10]), ("hour", ts[:13])))
+                count += 1
+            conn.executemany(
+                "INSERT INTO rollups (channel, period, bucket, count) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (channel, period, bucket) DO UPDATE SET count = count + excluded.count",
+                [(channel, period, bucket, n) for (period, bucket), n in buckets.items()])
+            conn.execute("INSERT INTO migrations (source, channel, imported_at, rows) VALUES (?, ?, ?, ?)",
+                         (key, channel, datetime.datetime.now().strftime(TIMESTAMP_FORMAT), count))
+        for path in (db_path, csv_path):
+            if path and os.path.exists(path) and not self._is_sqlite(path):
+                os.replace(path, path + ".migrated")
+        return count
+
+    def migrate_channels(self, channels, data_dir=DATA_DIR):
+        """imports the former files of every channel, returns {channel: imported rows}."""
+        imported = {}
+        for channel in channels:
+            db_name = channel.get("db_name")
+            if not db_name:
+                continue
+            db_path = os.path.join(data_dir, db_name)
+            csv_path = os.path.join(data_dir, db_name.replace(".db", ".csv"))
+            count = self.import_legacy(channel["name"], db_path, csv_path)
+            if count:
+                imported[channel["name"]] = count
+        return imported
+
+    @staticmethod
+    def _is_sqlite(path):
+        try:
+            with open(path, "rb") as f:
+                return f.read(16) == b"SQLite format 3\x00"
+        except OSError:
+            return False
+
+
+class IncidentWriter:
+    """Background thread committing incidents to the store in batches.
+
+    submit() and the episode calls only queue the operation, so the monitor
+    threads never wait on the disk; the writer groups everything queued within
+    flush_interval seconds (up to max_batch operations) into one transaction.
+    Episodes are identified by the key returned by open_episode(), the writer
+    maps it to the row id once the row exists.
+    """
+
+    def __init__(self, store, flush_interval=FLUSH_INTERVAL, sync=SYNC_POLICY, max_batch=MAX_BATCH,
+                 max_pending=MAX_PENDING):
+        if sync not in SYNC_MODES:
+            raise ValueError(f"unknown sync policy {sync!r}, expected one of {', '.join(SYNC_MODES)}")
+        self.store = store
+        self.flush_interval = flush_interval
+        self.sync = sync
+        self.max_batch = max_batch
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = None
+        self._lock = threading.Lock()
+        self._keys = itertools.count()
+        self._rows = {}  # episode key -> row id, owned by the writer thread
+        self._lost = set()  # keys of episodes whose row was rolled back with a failed batch
+        self._episode_channels = {}  # episode key -> channel, to tell listeners which channels changed
+        self._listeners = ()  # called with the set of changed channels after each commit (writer thread)
+        self.written = 0
+        self.batches = 0
+        self.dropped = 0
+        self.errors = 0
+        self.orphaned = 0  # episode updates / closes dropped because their row was never committed
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        with self._lock:
+            if self.running:
+                return
+            self._thread = threading.Thread(target=self._run, daemon=True, name="IncidentWriter")
+            self._thread.start()
+
+    def stop(self, timeout=10):
+        """writes what is still queued, then stops the thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._queue.put(None)
+        thread.join(timeout)
+
+    def _put(self, op):
+        try:
+            self._queue.put_nowait(op)
+        except queue.Full:
+            self.dropped += 1
+            return False
+        return True
+
+    def submit(self, channel, incident_type, message="", ts=None):
+        """queues a one-off incident, returns False when the queue is full (the incident is dropped)."""
+        ts = ts or datetime.datetime.now().strftime(TIMESTAMP_FORMAT)
+        return self._put(("add", channel, incident_type, message, ts))
+
+    def open_episode(self, channel, incident_type, message="", ts=None, evidence=None):
+        """queues the start of an episode, returns its key. evidence: thumbnail digest (evidence store)."""
+        ts = ts or datetime.datetime.now().strftime(TIMESTAMP_FORMAT)
+        key = next(self._keys)
+        self._put(("open", key, channel, incident_type, message, ts, evidence))
+        return key
+
+    def update_episode(self, key, last_seen):
+        return self._put(("update", key, last_seen))
+
+    def close_episode(self, key, end_ts, duration):
+        return self._put(("close", key, end_ts, duration))
+
+    def add_listener(self, callback):
+        """callback(channels) is called in the writer thread after each committed batch (e.g. GUI reload)."""
+        with self._lock:
+            self._listeners = self._listeners + (callback,)
+
+    def remove_listener(self, callback):
+        with self._lock:
+            self._listeners = tuple(c for c in self._listeners if c != callback)
+
+    def flush(self, timeout=5):
+        """blocks until everything queued so far is committed (GUI / tests / shutdown).
+
+        Returns False when that did not happen within timeout seconds (saturated or stuck writer).
+        """
+        if not self.running:
+            return self._queue.empty()
+        deadline = time.monotonic() + timeout
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(max(0, deadline - time.monotonic()))
+
+    def _run(self):
+        conn = self.store._conn()
+        conn.execute(f"PRAGMA synchronous={SYNC_MODES[self.sync]}")
+        stop = False
+        while not stop:
+            item = self._queue.get()
+            batch, waiters = [], []
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if item is None:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    batch.append(item)
+                if stop or waiters or len(batch) >= self.max_batch:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            if stop:
+                # drain what was queued before the stop request
+                while True:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if isinstance(item, threading.Event):
+                        waiters.append(item)
+                    elif item is not None:
+                        batch.append(item)
+            if batch:
+                self._write(batch)
+            for waiter in waiters:
+                waiter.set()
+        self.store.close()
+
+    def _row(self, key, closing=False):
+        row_id = self._rows.pop(key, None) if closing else self._rows.get(key)
+        if row_id is None and key in self._lost:
+            self.orphaned += 1
+            if closing:
+                self._lost.discard(key)
+                log.warning(f"episode {key} closed but never written (its batch failed)")
+        return row_id
+
+    def _write(self, batch):
+        store = self.store
+        conn = store._conn()
+        rows = dict(self._rows)  # restored if the transaction is rolled back
+        channels = set()
+        try:
+            with conn:
+                for op in batch:
+                    kind = op[0]
+                    if kind == "add":
+                        _, channel, incident_type, message, ts = op
+                        store.add(channel, incident_type, message, ts, conn=conn)
+                        channels.add(channel)
+                    elif kind == "open":
+                        _, key, channel, incident_type, message, ts, evidence = op
+                        self._rows[key] = store.open_episode(channel, incident_type, message, ts, evidence,
+                                                             conn=conn)
+                        self._episode_channels[key] = channel
+                        channels.add(channel)
+                    elif kind == "update":
+                        row_id = self._row(op[1])
+                        if row_id is not None:
+                            store.update_episode(row_id, op[2], conn=conn)
+                    elif kind == "close":
+                        row_id = self._row(op[1], closing=True)
+                        if row_id is not None:
+                            store.close_episode(row_id, op[2], op[3], conn=conn)
+                            channels.add(self._episode_channels.get(op[1]))
+            self.written += len(batch)
+            self.batches += 1
+            for key in [op[1] for op in batch if op[0] == "close"]:
+                self._episode_channels.pop(key, None)
+        except sqlite3.Error as e:
+            # rolled back: the episodes opened by the batch have no row, those it closed are still open
+            # (closed at the next start by close_stale_episodes)
+            self._rows = rows
+            lost = {op[1] for op in batch if op[0] == "open"}
+            self._lost.update(lost)
+            self.errors += 1
+            log.error(f"could not write {len(batch)} incident operations ({len(lost)} episodes lost): {e}")
+            for key in lost:
+                self._episode_channels.pop(key, None)
+            return
+        channels.discard(None)
+        for callback in self._listeners:
+            try:
+                callback(channels)
+            except Exception as e:
+                log.error(f"incident commit listener failed: {e}")
+
+    def stats(self):
+        return {"written": self.written, "batches": self.batches, "dropped": self.dropped,
+                "errors": self.errors, "orphaned": self.orphaned, "pending": self._queue.qsize()}
+
+
+class CompactionJob:
+    """Background thread applying the retention policy and compacting the store every `interval` seconds.
+
+    retention: callable returning {channel: retention days}, read at each run so
+    that channel configuration changes are taken into account.
+    after: optional callable run after each compaction (e.g. pruning the evidence files).
+    """
+
+    def __init__(self, store, retention=None, interval=COMPACTION_INTERVAL, delay=COMPACTION_DELAY, after=None):
+        self.store = store
+        self.retention = retention or (lambda: {})
+        self.after = after
+        self.interval = interval
+        self.delay = delay
+        self._stop = threading.Event()
+        self._thread = None
+        self.last_run = None  # {"expired", "purged", "seconds"} of the last run
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="IncidentCompaction")
+        self._thread.start()
+
+    def stop(self, timeout=10):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def run_once(self):
+        started = time.perf_counter()
+        result = self.store.compact(self.retention())
+        if self.after is not None:
+            self.after()
+        result["seconds"] = round(time.perf_counter() - started, 3)
+        self.last_run = result
+        if result["expired"] or result["purged"]:
+            log.info(f"incident compaction: {result['expired']} expired, {result['purged']} purged "
+                     f"in {result['seconds']}s")
+        return result
+
+    def _run(self):
+        if self._stop.wait(self.delay):
+            return
+        try:
+            while True:
+                try:
+                    self.run_once()
+                except sqlite3.Error as e:
+                    log.error(f"incident compaction failed: {e}")
+                if self._stop.wait(self.interval):
+                    break
+        finally:
+            self.store.close()
+
+
+_store = None
+_writer = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """process-wide store on data/incidents.sqlite3."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = IncidentStore()
+    return _store
+
+
+def get_writer():
+    """process-wide background writer of get_store(), started on first use."""
+    global _writer
+    if _writer is None:
+        store = get_store()
+        with _store_lock:
+            if _writer is None:
+                _writer = IncidentWriter(store)
+    _writer.start()
+    return _writer
+
+
+def use_writer(writer):
+    """replaces the process-wide writer, e.g. by one forwarding the incidents of a worker process (sharding.py)."""
+    global _writer
+    with _store_lock:
+        _writer = writer
+
+
+def shutdown():
+    """flushes and stops the background writer."""
+    if _writer is not None:
+        _writer.stop()
@@ -0,0 +1,103 @@
+import os
+import threading
+import time
+import cv2
+
+# template scales, relative to the size of the logo files (logos cut from 1080p frames are
+# matched at 0.5 on the default 960x540 analysis frames)
+LOGO_SCALES = (0.25, 0.35, 0.5, 0.7, 1.0)
+# regions searched for a logo, as (x, y, width, height) fractions of the frame.
+# Overridable per channel in channels.json with "logo_regions".
+DEFAULT_LOGO_REGIONS = {
+    "top_left": [0.0, 0.0, 0.3, 0.25],
+    "top_right": [0.7, 0.0, 0.3, 0.25],
+    "bottom_left": [0.0, 0.75, 0.3, 0.25],
+    "bottom_right": [0.7, 0.75, 0.3, 0.25],
+}
+MATCH_THRESHOLD = 0.8
+MIN_TEMPLATE_SIZE = 12  # pixels, smaller templates match anything
+RELOAD_CHECK_INTERVAL = 10  # seconds between two checks of the logos directory
+
+
+class LogoIndex:
+    """Authorized logos, loaded once as grayscale template pyramids.
+
+    The directory is re-scanned at most every RELOAD_CHECK_INTERVAL seconds and
+    the index rebuilt only when a file was added, removed or modified.
+    """
+
+    def __init__(self, logos_dir, scales=LOGO_SCALES, threshold=MATCH_THRESHOLD):
+        self.logos_dir = logos_dir
+        self.scales = scales
+        self.threshold = threshold
+        self.logos = []  # [(name, [template, ...])], templates from the largest to the smallest
+        self._signature = None
+        self._last_check = 0
+        self._lock = threading.Lock()
+
+    def _dir_signature(self):
+        if not os.path.isdir(self.logos_dir):
+            return ()
+        entries = []
+        for entry in os.scandir(self.logos_dir):
+            if entry.is_file():
+                stat = entry.stat()
+                entries.append((entry.name, stat.st_mtime, stat.st_size))
+        return tuple(sorted(entries))
+
+    def refresh(self, force=False):
+        now = time.monotonic()
+        if not force and now - self._last_check < RELOAD_CHECK_INTERVAL:
+            return
+        with self._lock:
+            self._last_check = now
+            signature = self._dir_signature()
+            if signature == self._signature:
+                return
+            self.logos = self._build(signature)
+            self._signature = signature
+
+    def _build(self, signature):
+        logos = []
+        for name, _, _ in signature:
+            logo = cv2.imread(os.path.join(self.logos_dir, name), cv2.IMREAD_GRAYSCALE)
+            if logo is None:
+                continue
+            pyramid = []
+            for scale in sorted(self.scales, reverse=True):
+                w, h = int(logo.shape[1] * scale), int(logo.shape[0] * scale)
+                if min(w, h) < MIN_TEMPLATE_SIZE:
+                    continue
+                interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR
+                pyramid.append(logo if scale == 1 else cv2.resize(logo, (w, h), interpolation=interpolation))
+            if pyramid:
+                logos.append((name, pyramid))
+        return logos
+
+    def __len__(self):
+        return len(self.logos)
+
+    def find(self, frame, regions=None):
+        """name of the first authorized logo found in the regions of a BGR frame, or None."""
+        self.refresh()
+        logos = self.logos
+        if not logos:
+            return None
+        regions = DEFAULT_LOGO_REGIONS if regions is None else regions
+        h, w = frame.shape[:2]
+        for x, y, rw, rh in regions.values():
+            x0, y0 = int(x * w), int(y * h)
+            x1, y1 = min(w, int((x + rw) * w)), min(h, int((y + rh) * h))
+            if x1 - x0 < MIN_TEMPLATE_SIZE or y1 - y0 < MIN_TEMPLATE_SIZE:
+                continue
+            # only the searched corner is converted to grayscale
+            crop = cv2.cvtColor(frame[y0:y1, x0:x1], cv2.COLOR_BGR2GRAY)
+            for name, pyramid in logos:
+                for template in pyramid:
+                    if template.shape[0] > crop.shape[0] or template.shape[1] > crop.shape[1]:
+                        continue
+                    res = cv2.matchTemplate(crop, template, cv2.TM_CCOEFF_NORMED)
+                    _, max_val, _, _ = cv2.minMaxLoc(res)
+                    if max_val > self.threshold:
+                        return name
+        return None
@@ -1,65 +1,39 @@
+import time
+STARTUP_T0 = time.perf_counter()  # measured before the heavy imports below
 import sys
-import os
-import csv
-import json
-from PyQt5.QtWidgets import QApplication
-from gui import MainWindow
-from stream_monitor import StreamMonitor
+import multiprocessing
+from startup import startup_log, setup_startup_log, load_channels, migrate_incidents
+# Qt, the GUI and its chart / vlc dependencies are imported under __main__ only: the spawned workers
+# (moderation service) re-import this module as __mp_main__ and must not load them for nothing
 
-CHANNELS_FILE = os.path.join(os.getcwd(), "channels.json")
-
-def load_channels():
-    if not os.path.exists(CHANNELS_FILE):
-        # create default channels.json file if it doesn't exist
-        default_channels = [
-            {
-                "name": "Test Channel",
-                "url": "YOUR_TEST_STREAM_URL_HERE",
-                "db_name": "incidents_test.db"
-            }
-        ]
-        with open(CHANNELS_FILE, 'w', encoding='utf-8') as f:
-            json.dump(default_channels, f, indent=4)
-    
-    with open(CHANNELS_FILE, 'r', encoding='utf-8') as f:
-        return json.load(f)
-
-def save_channels(channels):
-    with open(CHANNELS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(channels, f, indent=4)
-
-def export_incidents_to_csv(db_name):
-    db_path = os.path.join(os.getcwd(), "data", db_name)
-    csv_path = os.path.join(os.getcwd(), "data", db_name.replace(".db", ".csv"))
-    if os.path.exists(db_path):
-        with open(db_path, "r", encoding="utf-8") as fin, open(csv_path, "w", encoding="utf-8", newline='') as fout:
-            writer = csv.writer(fout)
-            writer.writerow(["Date", "Time", "Type", "Message"])
-            for line in fin:
-                if line.strip():
-                    parts = [p.strip() for p in line.strip().split("|", 2)]
-                    if len(parts) == 3:
-                        dateheure, typ, msg = parts
-                        if " " in dateheure:
-                            date, heure = dateheure.split(" ", 1)
-                        else:
-                            date, heure = dateheure, ""
-                        writer.writerow([date, heure, typ, msg])
-                    else:
-                        writer.writerow(["", "", "", line.strip()])
+def export_incidents_to_csv(channel_name, csv_path):
+    # streamed from the incident store, see incident_export for the other formats and the command line
+    import incident_export
+    return incident_export.export(csv_path, "csv", channel=channel_name)
 
 if __name__ == "__main__":
+    # frozen exe (build_exe.py): the spawned workers (moderation service) run their target, not the GUI again
+    multiprocessing.freeze_support()
     try:
+        from PyQt5.QtWidgets import QApplication
+        from PyQt5.QtCore import QTimer
+        from gui import MainWindow
+        setup_startup_log()
+        startup_log.info(f"Imports done in {time.perf_counter() - STARTUP_T0:.2f}s")
         app = QApplication(sys.argv)
         
         channels = load_channels()
         if not channels:
             print("The channels.json file is empty or doesn't exist. Please add a channel.")
             sys.exit(1)
+        migrate_incidents(channels)
 
         # we no longer create a monitor here, we just pass the channel list
         window = MainWindow(channels)
         window.show()
+        # first event loop iteration = window actually on screen; models keep loading in the background
+        QTimer.singleShot(0, lambda: startup_log.info(
+            f"UI ready in {time.perf_counter() - STARTUP_T0:.2f}s ({len(channels)} channels)"))
         exit_code = app.exec_()
         
         # shutdown handling is now done in the main window
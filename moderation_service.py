@@ -0,0 +1,161 @@
+import itertools
+import multiprocessing as mp
+import queue
+import threading
+import time
+import cv2
+import numpy as np
+
+MAX_BATCH = 16  # frames per inference call
+MAX_WAIT = 0.05  # seconds the service waits to fill a batch
+MAX_PENDING = 256  # requests queued before new ones are dropped
+INPUT_SIZE = 320  # NudeNet works at 320x320: frames are downscaled before crossing the process boundary
+
+
+def _service_main(requests, results, max_batch, max_wait):
+    # runs in its own process: the model, its memory and its GIL stay out of the monitors' process
+    import content_moderation
+    # warm the model up before the first request, off the GUI / monitor process
+    try:
+        content_moderation.get_detector()
+        results.put(("ready", content_moderation.detector_load_time))
+    except Exception:
+        results.put(("ready", None))
+    stop = False
+    while not stop:
+        item = requests.get()
+        if item is None:
+            break
+        batch = [item]
+        deadline = time.monotonic() + max_wait
+        while len(batch) < max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = requests.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                stop = True
+                break
+            batch.append(item)
+        ids = [request_id for request_id, _, _ in batch]
+        try:
+            frames = [np.frombuffer(data, dtype=np.uint8).reshape(shape) for _, shape, data in batch]
+            scores = content_moderation.nsfw_scores_batch(frames)
+            results.put([(request_id, score, None) for request_id, score in zip(ids, scores)])
+        except Exception as e:
+            results.put([(request_id, None, str(e)) for request_id in ids])
+    results.put(None)
+
+
+class ModerationService:
+    """Central NSFW inference process shared by every channel.
+
+    Monitors submit frames with a callback; the service groups the frames of all
+    channels into micro-batches (up to max_batch frames or max_wait seconds) and
+    runs one batched ONNX inference per group. Callbacks are called from a
+    collector thread with (score, error).
+    """
+
+    def __init__(self, max_batch=MAX_BATCH, max_wait=MAX_WAIT, max_pending=MAX_PENDING, on_ready=None):
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.on_ready = on_ready  # on_ready(seconds) once the model is loaded in the service process
+        self.load_time = None
+        self._ctx = mp.get_context('spawn')
+        self._requests = self._ctx.Queue(maxsize=max_pending)
+        self._results = self._ctx.Queue()
+        self._callbacks = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        self.process = None
+        self.submitted = 0
+        self.completed = 0
+        self.dropped = 0
+
+    @property
+    def running(self):
+        return self.process is not None and self.process.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self.process = self._ctx.Process(target=_service_main, name="ModerationService", daemon=True,
+                                         args=(self._requests, self._results, self.max_batch, self.max_wait))
+        self.process.start()
+        self._collector = threading.Thread(target=self._collect, daemon=True, name="ModerationService-results")
+        self._collector.start()
+
+    def stop(self, timeout=5):
+        if self.process is None:
+            return
+        try:
+            self._requests.put(None, timeout=1)
+        except queue.Full:
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.process = None
+        self._fail_pending("moderation service stopped")
+
+    def submit(self, frame, callback):
+        """queues a BGR frame, returns False when the service is saturated (the frame is dropped)."""
+        if not self.running:
+            return False
+        h, w = frame.shape[:2]
+        scale = INPUT_SIZE / max(h, w)
+        if scale < 1:
+            frame = cv2.resize(frame, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+        frame = np.ascontiguousarray(frame)
+        request_id = next(self._ids)
+        with self._lock:
+            self._callbacks[request_id] = callback
+        try:
+            self._requests.put_nowait((request_id, frame.shape, frame.tobytes()))
+        except queue.Full:
+            with self._lock:
+                self._callbacks.pop(request_id, None)
+            self.dropped += 1
+            return False
+        self.submitted += 1
+        return True
+
+    def _collect(self):
+        while True:
+            try:
+                batch = self._results.get()
+            except (EOFError, OSError):
+                break
+            if batch is None:
+                break
+            if isinstance(batch, tuple) and batch[0] == "ready":
+                self.load_time = batch[1]
+                if self.on_ready:
+                    self.on_ready(self.load_time)
+                continue
+            for request_id, score, error in batch:
+                with self._lock:
+                    callback = self._callbacks.pop(request_id, None)
+                self.completed += 1
+                if callback:
+                    try:
+                        callback(score, error)
+                    except Exception:
+                        pass
+
+    def _fail_pending(self, error):
+        with self._lock:
+            callbacks = list(self._callbacks.values())
+            self._callbacks.clear()
+        for callback in callbacks:
+            try:
+                callback(None, error)
+            except Exception:
+                pass
+
+    def stats(self):
+        return {"submitted": self.submitted, "completed": self.completed, "dropped": self.dropped,
+                "pending": len(self._callbacks)}
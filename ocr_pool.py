@@ -0,0 +1,159 @@
+import concurrent.futures
+import logging
+import os
+import queue
+import threading
+import cv2
+import numpy as np
+
+try:
+    # C API bindings: one tesseract engine kept alive per worker, no process spawned per call
+    import tesserocr
+except ImportError:
+    tesserocr = None
+import pytesseract
+
+# regions OCR'd by default, as (x, y, width, height) fractions of the frame.
+# Overridable per channel in channels.json with "ocr_regions".
+DEFAULT_OCR_REGIONS = {
+    "lower_third": [0.0, 0.66, 1.0, 0.22],
+    "ticker": [0.0, 0.88, 1.0, 0.12],
+    "center": [0.15, 0.35, 0.7, 0.3],  # "no signal" style slates
+    "corner_bug": [0.75, 0.0, 0.25, 0.15],
+}
+DEFAULT_OCR_WORKERS = min(4, os.cpu_count() or 1)
+MAX_PENDING = 64
+STITCH_GAP = 16  # blank rows between two regions stitched for pytesseract
+
+log = logging.getLogger("ocr_pool")
+_degraded_logged = False
+
+
+def crop_regions(frame, regions=None):
+    """grayscale crops of the configured regions of a BGR frame."""
+    regions = DEFAULT_OCR_REGIONS if regions is None else regions
+    h, w = frame.shape[:2]
+    crops = []
+    for x, y, rw, rh in regions.values():
+        x0, y0 = int(x * w), int(y * h)
+        x1, y1 = min(w, int((x + rw) * w)), min(h, int((y + rh) * h))
+        if x1 - x0 < 8 or y1 - y0 < 8:
+            continue
+        crops.append(cv2.cvtColor(frame[y0:y1, x0:x1], cv2.COLOR_BGR2GRAY))
+    return crops
+
+
+def stitch(crops):
+    """stacks grayscale crops vertically on a white background, separated by STITCH_GAP rows."""
+    width = max(crop.shape[1] for crop in crops)
+    height = sum(crop.shape[0] for crop in crops) + STITCH_GAP * (len(crops) - 1)
+    image = np.full((height, width), 255, dtype=np.uint8)
+    y = 0
+    for crop in crops:
+        image[y:y + crop.shape[0], :crop.shape[1]] = crop
+        y += crop.shape[0] + STITCH_GAP
+    return image
+
+
+class _Engine:
+    """one OCR engine, owned by a single thread."""
+
+    def __init__(self, lang='eng'):
+        global _degraded_logged
+        self.api = tesserocr.PyTessBaseAPI(lang=lang) if tesserocr else None
+        self.lang = lang
+        if self.api is None and not _degraded_logged:
+            _degraded_logged = True
+            log.warning("tesserocr cannot be imported: OCR falls back to one tesseract process per check "
+                        "(pytesseract), install tesserocr (requirements.txt) for persistent engines")
+
+    def read(self, gray):
+        if self.api is None:
+            return pytesseract.image_to_string(gray, lang=self.lang)
+        gray = gray if gray.flags['C_CONTIGUOUS'] else gray.copy()
+        self.api.SetImageBytes(gray.tobytes(), gray.shape[1], gray.shape[0], 1, gray.shape[1])
+        return self.api.GetUTF8Text()
+
+    def read_all(self, crops):
+        """text of every crop, newline separated."""
+        if not crops:
+            return ""
+        if self.api is None:
+            # pytesseract spawns a tesseract process per call: all the regions go in a single image
+            return pytesseract.image_to_string(stitch(crops), lang=self.lang)
+        return "\n".join(self.read(crop) for crop in crops)
+
+    def close(self):
+        if self.api is not None:
+            self.api.End()
+
+
+_local = threading.local()
+
+
+def ocr_crops(crops, lang='eng'):
+    """OCR in the calling thread, with an engine kept alive for that thread."""
+    engine = getattr(_local, 'engine', None)
+    if engine is None:
+        engine = _local.engine = _Engine(lang)
+    return engine.read_all(crops)
+
+
+class OcrPool:
+    """Pool of long-lived OCR workers, each keeping its own tesseract engine loaded.
+
+    submit() returns a concurrent.futures.Future resolved with the text of all
+    the crops, or None when the pool is saturated.
+    """
+
+    def __init__(self, workers=DEFAULT_OCR_WORKERS, lang='eng', max_pending=MAX_PENDING):
+        self.workers = max(1, workers)
+        self.lang = lang
+        self._tasks = queue.Queue(maxsize=max_pending)
+        self._threads = []
+        self.dropped = 0
+
+    @property
+    def running(self):
+        return bool(self._threads)
+
+    def start(self):
+        if self._threads:
+            return
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, daemon=True, name=f"OcrWorker-{i}")
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        for _ in self._threads:
+            self._tasks.put(None)
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads = []
+
+    def submit(self, crops):
+        future = concurrent.futures.Future()
+        try:
+            self._tasks.put_nowait((crops, future))
+        except queue.Full:
+            self.dropped += 1
+            return None
+        return future
+
+    def _worker(self):
+        engine = _Engine(self.lang)
+        try:
+            while True:
+                task = self._tasks.get()
+                if task is None:
+                    break
+                crops, future = task
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    future.set_result(engine.read_all(crops))
+                except Exception as e:
+                    future.set_exception(e)
+        finally:
+            engine.close()
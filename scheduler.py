@@ -0,0 +1,100 @@
+import threading
+
+# default cadence of each detector: cheap checks run on every analysed frame,
+# expensive models only on a sampled subset. Overridable per channel in channels.json:
+#   "detectors": {"nsfw": {"interval": 2}, "forbidden_text": {"every_n_frames": 25}, "logo": {"enabled": false}}
+# A channel cadence (every_n_frames and / or interval) replaces the default one of the detector,
+# "enabled" alone keeps it.
+DEFAULT_CADENCES = {
+    "black": {"every_n_frames": 1},
+    "frozen": {"every_n_frames": 1},
+    "nsfw": {"interval": 5.0},
+    "forbidden_text": {"interval": 10.0},
+    "logo": {"interval": 30.0},
+}
+CADENCE_KEYS = {"every_n_frames", "interval"}
+
+
+class DetectorScheduler:
+    """Decides which detector runs on the current frame and measures their effective rate.
+
+    A detector is due when at least `every_n_frames` frames and `interval`
+    seconds have passed since its previous run (both default to "no constraint").
+    """
+
+    def __init__(self, cadences=None, defaults=DEFAULT_CADENCES):
+        self.cadences = {}
+        for name, cadence in defaults.items():
+            self.cadences[name] = dict(cadence)
+        for name, cadence in (cadences or {}).items():
+            if CADENCE_KEYS.intersection(cadence):
+                self.cadences[name] = dict(cadence)
+            else:
+                self.cadences.setdefault(name, {}).update(cadence)
+        self._frame = 0
+        self._last_frame = {}
+        self._last_time = {}
+        self._lock = threading.Lock()
+        # counters since the last report
+        self._runs = {}
+        self._busy = {}
+        self._window_start = None
+        self._frames_in_window = 0
+
+    def enabled(self, name):
+        cadence = self.cadences.get(name)
+        return cadence is not None and cadence.get("enabled", True)
+
+    def tick(self, now):
+        """to be called once per analysed frame."""
+        self._frame += 1
+        self._frames_in_window += 1
+        if self._window_start is None:
+            self._window_start = now
+
+    def due(self, name, now):
+        if not self.enabled(name):
+            return False
+        cadence = self.cadences[name]
+        last_frame = self._last_frame.get(name)
+        if last_frame is not None:
+            if self._frame - last_frame < cadence.get("every_n_frames", 1):
+                return False
+            if now - self._last_time[name] < cadence.get("interval", 0):
+                return False
+        self._last_frame[name] = self._frame
+        self._last_time[name] = now
+        return True
+
+    def record(self, name, duration):
+        """records one run of a detector and the time it took (seconds)."""
+        with self._lock:
+            self._runs[name] = self._runs.get(name, 0) + 1
+            self._busy[name] = self._busy.get(name, 0.0) + duration
+
+    def rates(self, now, reset=True):
+        """effective rate (runs/s) and mean run time (s) of each detector since the last reset."""
+        with self._lock:
+            elapsed = max(now - (self._window_start or now), 1e-6)
+            result = {"frames": self._frames_in_window / elapsed}
+            for name in self.cadences:
+                if not self.enabled(name):
+                    continue
+                runs = self._runs.get(name, 0)
+                result[name] = (runs / elapsed, self._busy.get(name, 0.0) / runs if runs else 0.0)
+            if reset:
+                self._runs.clear()
+                self._busy.clear()
+                self._window_start = now
+                self._frames_in_window = 0
+        return result
+
+    @staticmethod
+    def format_rates(rates):
+        parts = [f"frames={rates.get('frames', 0.0):.2f}/s"]
+        for name, value in rates.items():
+            if name == "frames":
+                continue
+            rate, mean = value
+            parts.append(f"{name}={rate:.2f}/s ({mean * 1000:.0f} ms)")
+        return ", ".join(parts)
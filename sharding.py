@@ -0,0 +1,391 @@
+import datetime
+import itertools
+import logging
+import multiprocessing
+import queue
+import signal
+import threading
+import time
+import event_bus
+import event_log
+import evidence_store
+import incident_store
+from async_engine import cpu_budget
+from supervisor import DEFAULT_ENGINE, START_STAGGER
+
+# channels spread over worker processes, each running its own SupervisorPool: the analysis of different
+# channels no longer shares one interpreter (GIL) nor one process's memory
+DEFAULT_PROCESSES = cpu_budget("SUPERVISION_PROCESSES", minimum=1)
+HEARTBEAT_INTERVAL = 1.0  # seconds between two worker reports
+RESPAWN_DELAY = 1  # first delay before a dead worker is restarted, doubled up to MAX_RESPAWN_DELAY
+MAX_RESPAWN_DELAY = 30
+STABLE_AFTER = 60  # a worker alive this long (s) resets its respawn delay
+
+log = logging.getLogger("sharding")
+
+
+class RemoteIncidentWriter:
+    """IncidentWriter stand-in of a worker process: operations are sent to the coordinator, which writes them.
+
+    Episode keys are local to the worker; the coordinator maps them to its own writer keys.
+    """
+
+    def __init__(self, worker_id, results):
+        self.worker_id = worker_id
+        self.results = results
+        self._keys = itertools.count(1)
+        self.sent = 0
+
+    def start(self):
+        pass
+
+    def stop(self, timeout=None):
+        pass
+
+    def flush(self, timeout=None):
+        pass
+
+    def _send(self, op):
+        self.results.put(("incident", self.worker_id, op))
+        self.sent += 1
+        return True
+
+    def submit(self, channel, incident_type, message="", ts=None):
+        ts = ts or datetime.datetime.now().strftime(incident_store.TIMESTAMP_FORMAT)
+        return self._send(("add", channel, incident_type, message, ts))
+
+    def open_episode(self, channel, incident_type, message="", ts=None, evidence=None):
+        ts = ts or datetime.datetime.now().strftime(incident_store.TIMESTAMP_FORMAT)
+        key = next(self._keys)
+        self._send(("open", key, channel, incident_type, message, ts, evidence))
+        return key
+
+    def update_episode(self, key, last_seen):
+        return self._send(("update", key, last_seen))
+
+    def close_episode(self, key, end_ts, duration):
+        return self._send(("close", key, end_ts, duration))
+
+    def stats(self):
+        return {"written": self.sent, "batches": 0, "dropped": 0, "errors": 0, "pending": 0}
+
+
+def _worker_main(worker_id, commands, results, engine, max_workers, monitor_class):
+    """entry point of a worker process: runs the channels it is told to, reports events, incidents and load."""
+    # the coordinator decides when workers stop (Ctrl+C / SIGTERM reach the whole process group)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    from supervisor import SupervisorPool
+    incident_store.use_writer(RemoteIncidentWriter(worker_id, results))
+    bus = event_bus.get_bus()
+    bus.subscribe(event_bus.StatusEvent, lambda e: results.put(("event", worker_id, e)), name="coordinator-status")
+    bus.subscribe(event_bus.LogEvent, lambda e: results.put(("event", worker_id, e)), name="coordinator-log")
+    pool = SupervisorPool(max_workers=max_workers, bus=bus, engine=engine, compaction=False)
+    if monitor_class is not None:
+        pool.monitor_class = monitor_class
+    parent = multiprocessing.parent_process()
+    pending = 0  # channels added since the last report, started with the usual stagger
+    try:
+        while True:
+            try:
+                command = commands.get(timeout=HEARTBEAT_INTERVAL)
+            except queue.Empty:
+                if parent is not None and not parent.is_alive():
+                    break  # orphaned: the coordinator died
+                pending = 0
+                monitors = list(pool.monitors.values())
+                results.put(("heartbeat", worker_id, {
+                    "channels": len(monitors),
+                    "frames": sum(m.frames_analysed for m in monitors),
+                    "statuses": pool.statuses(),
+                }))
+                continue
+            kind = command[0]
+            if kind == "add":
+                pool.add_channel(command[1], delay=pending * START_STAGGER)
+                pending += 1
+            elif kind == "remove":
+                pool.remove_channel(command[1])
+            elif kind == "stop":
+                break
+    finally:
+        pool.stop_all()
+        results.put(("stopped", worker_id, None))
+
+
+class _Worker:
+    def __init__(self, slot):
+        self.slot = slot
+        self.process = None
+        self.commands = None
+        self.channels = set()
+        self.started_at = None
+        self.respawn_delay = RESPAWN_DELAY
+        self.respawn_at = None  # monotonic time of the next start attempt when dead
+        self.stats = {}
+
+
+class ShardedSupervisor:
+    """Spreads the channels over N worker processes and aggregates what they report.
+
+    Each worker runs a SupervisorPool on its share of the channels. Status and
+    log events are republished on the coordinator bus, incident operations are
+    written by the coordinator's incident writer, so the store has one writer.
+    A new channel goes to the least loaded worker; when a worker dies its
+    channels are spread over the others at once, and the worker is restarted
+    (with a backoff) and given its share back.
+    """
+
+    def __init__(self, channels=None, processes=None, engine=DEFAULT_ENGINE, max_workers=None, bus=None,
+                 monitor_class=None):
+        self.processes = processes or DEFAULT_PROCESSES
+        self.engine = engine
+        self.max_workers = max_workers  # analysis threads per worker (None: SupervisorPool default)
+        self.monitor_class = monitor_class
+        self.bus = bus or event_bus.get_bus()
+        self._context = multiprocessing.get_context("spawn")
+        self._results = self._context.Queue()
+        self._workers = [_Worker(slot) for slot in range(self.processes)]
+        self._channels = {}  # channel name -> channel config
+        self._assignment = {}  # channel name -> worker slot (None: waiting for a live worker)
+        self._statuses = {}
+        self._episodes = {}  # (worker slot, worker key) -> (coordinator key, start ts)
+        self._lock = threading.RLock()
+        self._stopping = False
+        self.writer = incident_store.get_writer()
+        store = incident_store.get_store()
+        self.compaction = incident_store.CompactionJob(
+            store, self.retention_days,
+            after=lambda: evidence_store.get_evidence_store().prune(store.evidence_digests()))
+        for worker in self._workers:
+            self._spawn(worker)
+        self._thread = threading.Thread(target=self._run, daemon=True, name="ShardCoordinator")
+        self._thread.start()
+        self.compaction.start()
+        if channels:
+            self.sync(channels)
+
+    # --- worker processes ---
+
+    def _spawn(self, worker):
+        if worker.commands is not None:
+            worker.commands.close()  # queue of the dead process
+        worker.commands = self._context.Queue()
+        worker.process = self._context.Process(
+            target=_worker_main, name=f"SupervisionWorker-{worker.slot}",
+            args=(worker.slot, worker.commands, self._results, self.engine, self.max_workers, self.monitor_class),
+            daemon=True)
+        worker.process.start()
+        worker.started_at = time.monotonic()
+        worker.respawn_at = None
+        worker.channels = set()
+        worker.stats = {}
+        log.info(f"worker {worker.slot} started (pid {worker.process.pid})")
+
+    def _alive(self):
+        return [w for w in self._workers if w.respawn_at is None and w.process is not None]
+
+    def _send(self, worker, command):
+        worker.commands.put(command)
+
+    def _assign(self, name):
+        workers = self._alive()
+        if not workers:
+            self._assignment[name] = None  # started when a worker is back
+            return
+        self._channels_to(min(workers, key=lambda w: (len(w.channels), w.slot)), name)
+
+    def _unassign(self, name):
+        slot = self._assignment.pop(name, None)
+        if slot is not None:
+            worker = self._workers[slot]
+            worker.channels.discard(name)
+            if worker.respawn_at is None:
+                self._send(worker, ("remove", name))
+
+    def rebalance(self):
+        """moves channels from the most to the least loaded workers until they differ by one at most."""
+        with self._lock:
+            for name in [n for n, slot in self._assignment.items() if slot is None]:
+                self._assign(name)
+            while True:
+                workers = self._alive()
+                if len(workers) < 2:
+                    return
+                busiest = max(workers, key=lambda w: len(w.channels))
+                idlest = min(workers, key=lambda w: len(w.channels))
+                if len(busiest.channels) - len(idlest.channels) <= 1:
+                    return
+                name = sorted(busiest.channels)[0]
+                self._unassign(name)
+                self._channels_to(idlest, name)
+
+    def _channels_to(self, worker, name):
+        worker.channels.add(name)
+        self._assignment[name] = worker.slot
+        self._send(worker, ("add", self._channels[name]))
+
+    def _worker_died(self, worker):
+        code = worker.process.exitcode
+        lived = time.monotonic() - worker.started_at
+        worker.respawn_delay = RESPAWN_DELAY if lived >= STABLE_AFTER else min(worker.respawn_delay * 2,
+                                                                               MAX_RESPAWN_DELAY)
+        worker.respawn_at = time.monotonic() + worker.respawn_delay
+        orphans = sorted(worker.channels)
+        worker.channels = set()
+        log.warning(f"worker {worker.slot} died (exit code {code}) with {len(orphans)} channels, "
+                    f"restarted in {worker.respawn_delay}s")
+        self._close_episodes(worker.slot)
+        for name in orphans:
+            self._assignment[name] = None
+            self._assign(name)
+
+    def _close_episodes(self, slot):
+        # the episodes of a dead worker end now: nobody observes their condition any more
+        now = datetime.datetime.now()
+        for (worker_slot, key), (local_key, start) in list(self._episodes.items()):
+            if worker_slot != slot:
+                continue
+            del self._episodes[(worker_slot, key)]
+            started = datetime.datetime.strptime(start, incident_store.TIMESTAMP_FORMAT)
+            self.writer.close_episode(local_key, now.strftime(incident_store.TIMESTAMP_FORMAT),
+                                      round((now - started).total_seconds(), 1))
+
+    def _check_workers(self):
+        with self._lock:
+            if self._stopping:
+                return
+            respawned = False
+            for worker in self._workers:
+                if worker.respawn_at is None:
+                    if not worker.process.is_alive():
+                        self._worker_died(worker)
+                elif time.monotonic() >= worker.respawn_at:
+                    self._spawn(worker)
+                    respawned = True
+            if respawned:
+                self.rebalance()
+
+    # --- reports of the workers ---
+
+    def _run(self):
+        last_check = time.monotonic()
+        while True:
+            try:
+                message = self._results.get(timeout=0.5)
+            except queue.Empty:
+                message = None
+            except (EOFError, OSError):
+                return
+            if message is not None:
+                kind, slot, payload = message
+                if kind == "quit":
+                    return
+                try:
+                    with self._lock:
+                        self._handle(kind, slot, payload)
+                except Exception as e:
+                    log.error(f"could not handle {kind} of worker {slot}: {e}")
+            if time.monotonic() - last_check >= HEARTBEAT_INTERVAL:
+                last_check = time.monotonic()
+                self._check_workers()
+
+    def _handle(self, kind, slot, payload):
+        if kind == "event":
+            if isinstance(payload, event_bus.StatusEvent):
+                self._statuses[payload.channel] = payload.status
+            self.bus.publish(payload)
+        elif kind == "incident":
+            self._write_incident(slot, payload)
+        elif kind == "heartbeat":
+            self._workers[slot].stats = payload
+            for name, status in payload["statuses"].items():
+                self._statuses.setdefault(name, status)
+        elif kind == "stopped":
+            self._close_episodes(slot)
+
+    def _write_incident(self, slot, op):
+        kind = op[0]
+        if kind == "add":
+            self.writer.submit(*op[1:])
+        elif kind == "open":
+            _, key, channel, incident_type, message, ts, evidence = op
+            self._episodes[(slot, key)] = (self.writer.open_episode(channel, incident_type, message, ts, evidence), ts)
+        elif kind == "update":
+            episode = self._episodes.get((slot, op[1]))
+            if episode is not None:
+                self.writer.update_episode(episode[0], op[2])
+        elif kind == "close":
+            episode = self._episodes.pop((slot, op[1]), None)
+            if episode is not None:
+                self.writer.close_episode(episode[0], op[2], op[3])
+
+    # --- SupervisorPool interface ---
+
+    def add_channel(self, channel):
+        with self._lock:
+            name = channel["name"]
+            if name in self._channels:
+                return
+            self._channels[name] = dict(channel)
+            self._assign(name)
+
+    def remove_channel(self, name):
+        with self._lock:
+            if self._channels.pop(name, None) is None:
+                return
+            self._unassign(name)
+            self._statuses.pop(name, None)
+            self.rebalance()
+
+    def sync(self, channels):
+        """aligns the supervised channels on the list (new ones added, removed or changed ones stopped)."""
+        wanted = {c["name"]: c for c in channels}
+        for name in list(self._channels):
+            if name not in wanted or self._channels[name] != wanted[name]:
+                self.remove_channel(name)
+        for name, channel in wanted.items():
+            if name not in self._channels:
+                self.add_channel(channel)
+
+    def retention_days(self):
+        with self._lock:
+            return {name: channel.get("retention_days", incident_store.DEFAULT_RETENTION_DAYS)
+                    for name, channel in self._channels.items()}
+
+    def statuses(self):
+        with self._lock:
+            return {name: self._statuses.get(name, "INIT") for name in self._channels}
+
+    def assignment(self):
+        """channel name -> worker slot (None while waiting for a live worker)."""
+        with self._lock:
+            return dict(self._assignment)
+
+    def frames_analysed(self):
+        """frames analysed by the live workers since they started (last reports)."""
+        return sum(w.stats.get("frames", 0) for w in self._workers)
+
+    def stop_all(self, timeout=30):
+        with self._lock:
+            self._stopping = True
+            workers = [w for w in self._workers if w.respawn_at is None]
+        for worker in workers:
+            self._send(worker, ("stop",))
+        deadline = time.monotonic() + timeout
+        for worker in workers:
+            worker.process.join(max(0.1, deadline - time.monotonic()))
+            if worker.process.is_alive():
+                log.warning(f"worker {worker.slot} did not stop in time, killed")
+                worker.process.kill()
+        # the reports still queued (last incident closes) are handled before the writer stops
+        self._results.put(("quit", None, None))
+        self._thread.join(10)
+        for worker in self._workers:
+            self._close_episodes(worker.slot)
+            if worker.commands is not None:
+                worker.commands.close()
+        self._results.close()
+        self.compaction.stop()
+        incident_store.shutdown()
+        event_log.stop()
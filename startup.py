@@ -0,0 +1,49 @@
+import json
+import logging
+import os
+import time
+import incident_store
+
+# start-up helpers shared by the GUI (main.py) and the headless daemon (headless.py), without any Qt import
+CHANNELS_FILE = os.path.join(os.getcwd(), "channels.json")
+
+startup_log = logging.getLogger("startup")
+
+def setup_startup_log():
+    startup_log.setLevel(logging.INFO)
+    handler = logging.FileHandler("startup.log", encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+    startup_log.addHandler(handler)
+
+def load_channels(path=CHANNELS_FILE):
+    if not os.path.exists(path):
+        # create default channels.json file if it doesn't exist
+        default_channels = [
+            {
+                "name": "Test Channel",
+                "url": "YOUR_TEST_STREAM_URL_HERE",
+                "db_name": "incidents_test.db"
+            }
+        ]
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(default_channels, f, indent=4)
+
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def save_channels(channels, path=CHANNELS_FILE):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(channels, f, indent=4)
+
+def migrate_incidents(channels):
+    # closes the episodes interrupted by a crash, then imports (once) the former per-channel .db/.csv files
+    t0 = time.perf_counter()
+    store = incident_store.get_store()
+    closed = store.close_stale_episodes()
+    if closed:
+        startup_log.info(f"Closed {closed} incident episodes left open by the previous run")
+    imported = store.migrate_channels(channels)
+    for channel_name, count in imported.items():
+        startup_log.info(f"Imported {count} incidents of {channel_name} into the incident store")
+    if imported:
+        startup_log.info(f"Incident migration done in {time.perf_counter() - t0:.2f}s")
@@ -1,64 +1,253 @@
 import cv2
-import numpy as np
 import threading
+import contextlib
 import time
-import logging
 from datetime import datetime
-import os
-import csv
-import ffmpeg
-import io
-import wave
-import numpy as np
 import content_moderation
-from PyQt5.QtCore import QObject, pyqtSignal
+import incident_store
+import evidence_store
+import event_log
+import event_bus
+import frame_analysis
+import frame_ring
+from scheduler import DetectorScheduler
+from ffmpeg_ingest import FFmpegIngest, DEFAULT_ANALYSIS_FPS, DEFAULT_ANALYSIS_WIDTH, DEFAULT_ANALYSIS_HEIGHT
+from audio_analysis import SilenceTracker, DEFAULT_SILENCE_THRESHOLD_DB, DEFAULT_SILENCE_MIN_DURATION
 
-class StreamMonitor(QObject):
-    status_signal = pyqtSignal(str)
-    log_signal = pyqtSignal(str)
+# how often the detection latency and the detector rates are written to the channel log (seconds)
+LATENCY_REPORT_INTERVAL = 60
+# default durations before a black / frozen picture becomes an incident (former rule: 10 frames ~ 5 s)
+BLACK_MIN_DURATION = 5
+FROZEN_MIN_DURATION = 5
+# a moderation request without answer after this delay (s) no longer blocks new ones
+MODERATION_PENDING_TIMEOUT = 30
+# detectors turned off by "moderation": false in channels.json
+MODERATION_DETECTORS = ("nsfw", "forbidden_text")
+# how often (s) the last_seen time of an open incident episode is written to the store
+EPISODE_UPDATE_INTERVAL = 30
+# statuses that are not incidents
+NORMAL_STATUSES = ("OK", "INIT")
+# conditions with an episode of their own, in the order of precedence of the displayed status
+CONDITION_STATUSES = incident_store.OUTAGE_TYPES  # also the downtime of the availability chart
 
-    def __init__(self, stream_url, db_name, channel_name):
-        super().__init__()
+class StreamMonitor:
+    """Supervises one stream; status, log and frame events are published on the event bus."""
+
+    def __init__(self, stream_url, db_name, channel_name, worker_slots=None, config=None, moderation_service=None,
+                 ocr_pool=None, bus=None, engine=None, preview=False):
         self.stream_url = stream_url
         self.db_name = db_name
         self.channel_name = channel_name
         self.status = "INIT"
         self.incidents = []
+        # incident type -> open episode {"key", "start", "updated"}: one row per condition, not per frame
+        self.episodes = {}
+        self._episodes_lock = threading.Lock()
+        # thumbnail of the analysed frame saved with each new episode ("evidence": false in channels.json to disable)
+        self.evidence_enabled = (config or {}).get("evidence", True)
+        self._current_frame = None  # frame being analysed, valid until the next ingest read
+        # decoded frames published in a shared memory ring for the live preview, which then needs no stream
+        # connection of its own (GUI default; "preview": true / false in channels.json)
+        self.preview_enabled = (config or {}).get("preview", preview)
+        self.frame_ring = None
         self.running = False
-        self.logger = logging.getLogger(f"StreamMonitor-{channel_name}")
-        self.logger.setLevel(logging.INFO)
-        # Chaque moniteur aura son propre fichier de log
-        handler = logging.FileHandler(f"stream_events_{channel_name.lower().replace(' ', '_')}.log", encoding="utf-8")
-        self.logger.addHandler(handler)
-        self.frame_callback = None  # Pour envoyer les frames à la GUI
-        self.last_frame = None
+        # Chaque moniteur aura son propre fichier de log (JSON lines, rotated, written by the event_log thread)
+        self.logger = event_log.get_channel_logger(channel_name)
+        # status / log / frame events for the GUI, the headless daemon and any other subscriber
+        self.bus = bus or event_bus.get_bus()
+        # asyncio engine running the ffmpeg ingest of this monitor (async_engine.py), None: dedicated thread
+        self.engine = engine
         self.last_status = None
         self.frozen_count = 0
         self.black_count = 0
         self.error_count = 0
         self.silence_threshold = 25  # Seuil RMS pour le silence (ajusté pour éviter les faux positifs)
+        # shared semaphore bounding how many monitors analyse a frame at the same time
+        self.worker_slots = worker_slots
+        self._wake = threading.Event()
+        # per-channel options from channels.json
+        self.config = config or {}
+        self.ingest_mode = self.config.get("ingest", "ffmpeg")  # "ffmpeg" (persistent decode pipe) or "opencv"
+        self.frame_timeout = self.config.get("frame_timeout", 5)  # seconds without frame before ERROR
+        self.ingest = None
+        self.last_audio_check = 0
+        self.silence_detected = False
+        self.audio_timeout_count = 0  # Compteur de timeouts consécutifs
+        # continuous silence detection on the PCM of the ffmpeg ingest (same connection as the video)
+        self.silence_tracker = None
+        if self.ingest_mode == "ffmpeg" and self.config.get("audio", True):
+            self.silence_tracker = SilenceTracker(
+                threshold_db=self.config.get("silence_threshold_db", DEFAULT_SILENCE_THRESHOLD_DB),
+                min_duration=self.config.get("silence_min_duration", DEFAULT_SILENCE_MIN_DURATION),
+            )
+        # black / frozen detection on a downscaled luma thumbnail, thresholds are resolution independent
+        self.luma = frame_analysis.LumaAnalyzer()
+        self.black_threshold = self.config.get("black_threshold", frame_analysis.BLACK_MEAN_THRESHOLD)
+        self.frozen_threshold = self.config.get("frozen_threshold", frame_analysis.FROZEN_CHANGED_RATIO)
+        # durations (s) a condition must last before an incident, so they do not depend on the analysis fps
+        self.black_min_duration = self.config.get("black_min_duration", BLACK_MIN_DURATION)
+        self.frozen_min_duration = self.config.get("frozen_min_duration", FROZEN_MIN_DURATION)
+        self.black_since = None
+        self.frozen_since = None
+        # per-detector cadence ("detectors" in channels.json) and measured effective rates
+        # "moderation": false disables NSFW / OCR for the channel, their models are then never loaded
+        self.moderation_enabled = self.config.get("moderation", True)
+        detectors = dict(self.config.get("detectors") or {})
+        if not self.moderation_enabled:
+            for name in MODERATION_DETECTORS:
+                detectors[name] = {"enabled": False}
+        self.scheduler = DetectorScheduler(detectors)
+        self.detector_rates = {}
+        # shared batched NSFW inference process (None: inference in this thread)
+        self.moderation_service = moderation_service
+        # persistent OCR workers (None: OCR in this thread), run on the configured regions only
+        self.ocr_pool = ocr_pool
+        self.ocr_regions = self.config.get("ocr_regions")
+        self.logo_regions = self.config.get("logo_regions")
+        self._pending = {}  # detector -> submit time of the request in flight
+        self.latency_samples = []
+        self.frames_analysed = 0
+        self.last_latency = None
+        self.last_latency_report = time.time()
 
     
 
-    def start(self):
+    def start(self, delay=0):
+        if self.engine is not None and self.ingest_mode == "ffmpeg":
+            self.running = True
+            self.engine.run(self, delay)
+            return
+        if self.running and getattr(self, 'thread', None) and self.thread.is_alive():
+            return
         self.running = True
-        self.thread = threading.Thread(target=self.monitor_loop, daemon=True)
+        self._wake.clear()
+        self.thread = threading.Thread(target=self._run, args=(delay,), daemon=True,
+                                       name=f"StreamMonitor-{self.channel_name}")
         self.thread.start()
 
-    def stop(self):
+    def stop(self, wait=True):
         self.running = False
-        if hasattr(self, 'thread'):
+        self._wake.set()  # interrupt any pending sleep
+        if self.engine is not None and self.engine.is_running(self):
+            self.engine.cancel(self, wait)
+        if wait and hasattr(self, 'thread'):
             self.thread.join()
 
+    def is_alive(self):
+        if self.engine is not None and self.engine.is_running(self):
+            return True
+        return hasattr(self, 'thread') and self.thread.is_alive()
+
+    def _sleep(self, seconds):
+        # interruptible sleep so that stop() does not wait for reconnect delays
+        self._wake.wait(seconds)
+
+    def _run(self, delay):
+        # staggered start: avoids every channel opening its stream at the same instant
+        if delay:
+            self._sleep(delay)
+        if self.running:
+            try:
+                self.monitor_loop()
+            finally:
+                # the conditions are no longer observed once the monitor stops
+                self.close_all_episodes()
+                self.close_frame_ring()
+
 
 
 
     def monitor_loop(self):
+        if self.ingest_mode == "ffmpeg":
+            self._ffmpeg_loop()
+        else:
+            self._opencv_loop()
+
+    def create_ingest(self, ingest_class=FFmpegIngest):
+        # a single long-lived ffmpeg process decodes the stream at the analysis fps/resolution
+        width = int(self.config.get("analysis_width", DEFAULT_ANALYSIS_WIDTH))
+        height = int(self.config.get("analysis_height", DEFAULT_ANALYSIS_HEIGHT))
+        return ingest_class(
+            self.stream_url,
+            width=width,
+            height=height,
+            fps=self.config.get("analysis_fps", DEFAULT_ANALYSIS_FPS),
+            log=lambda msg: self._log_event(msg, stage="ingest"),
+            audio_tracker=self.silence_tracker,
+            ring=self.open_frame_ring(width, height),
+        )
+
+    def open_frame_ring(self, width, height):
+        """frame ring of the live preview (None when disabled or when shared memory is unavailable)."""
+        if not self.preview_enabled:
+            return None
+        ring = self.frame_ring
+        if ring is not None and not ring.closed and (ring.width, ring.height) == (width, height):
+            return ring
+        self.close_frame_ring()
+        try:
+            self.frame_ring = frame_ring.FrameRing.create(frame_ring.ring_name(self.channel_name), width, height)
+        except (OSError, ValueError) as e:
+            self._log_event(f"Live preview unavailable, no frame ring: {e}", stage="ingest")
+            self.preview_enabled = False
+        return self.frame_ring
+
+    def close_frame_ring(self):
+        ring, self.frame_ring = self.frame_ring, None
+        if ring is not None:
+            ring.close()
+
+    def _publish_preview(self, frame, frame_time):
+        # opencv ingest: frames are decoded by VideoCapture, copied into the ring for the preview
+        height, width = frame.shape[:2]
+        ring = self.open_frame_ring(width, height)
+        if ring is None:
+            return
+        slot = (ring.seq + 1) % ring.slots
+        ring.begin(slot)
+        ring.frames[slot][...] = frame
+        ring.publish(slot, frame_time)
+
+    def on_frame(self, frame, frame_time):
+        """analysis of one ingested frame (monitor thread, or executor of the asyncio engine)."""
+        self._check_audio_levels()
+        self._analyse_frame(frame, time.time())
+        self._record_latency(frame_time)
+
+    def on_no_frame(self, now, no_frame_since):
+        """called when a read timed out, returns the new start of the frameless period."""
+        # no frame for a while: stream lost, the ingest keeps reconnecting on its own
+        if now - no_frame_since > self.frame_timeout:
+            self._stream_error(f"No frame received for {self.frame_timeout}s")
+            self.error_count += 1
+            self.luma.reset()  # do not compare frames across a reconnection
+            return now
+        return no_frame_since
+
+    def _ffmpeg_loop(self):
+        self.ingest = self.create_ingest()
+        self.ingest.start()
+        no_frame_since = time.time()
+        try:
+            while self.running:
+                try:
+                    frame, frame_time = self.ingest.read(timeout=1.0)
+                    now = time.time()
+                    if frame is None:
+                        no_frame_since = self.on_no_frame(now, no_frame_since)
+                        continue
+                    no_frame_since = now
+                    self.on_frame(frame, frame_time)
+                except Exception as loop_err:
+                    self._log_event(f"Exception in monitor_loop: {loop_err}")
+                    self._sleep(2)
+        except Exception as fatal_err:
+            self._log_event(f"Fatal crash of monitor_loop thread: {fatal_err}")
+        finally:
+            self.ingest.stop()
+
+    def _opencv_loop(self):
         cap = None
-        last_audio_check = 0
-        silence_detected = False
-        timeout_count = 0
-        audio_timeout_count = 0  # Compteur de timeouts consécutifs
         try:
             while self.running:
                 try:
@@ -67,156 +256,354 @@ class StreamMonitor(QObject):
                         try:
                             cap = cv2.VideoCapture(self.stream_url)
                             if not cap.isOpened():
-                                self._set_status("ERROR")
-                                self._log_event("Stream inaccessible")
+                                self._stream_error("Stream inaccessible")
                                 self.error_count += 1
-                                time.sleep(5)
+                                self._sleep(5)
                                 continue
                         except Exception as e:
-                            self._set_status("ERROR")
-                            self._log_event(f"Stream opening error: {e}")
+                            self._stream_error(f"Stream opening error: {e}")
                             self.error_count += 1
-                            time.sleep(5)
+                            self._sleep(5)
                             continue
                     ret, frame = cap.read()
+                    frame_time = time.time()
                     if not ret or frame is None:
-                        self._set_status("ERROR")
-                        self._log_event("Connection loss or empty frame")
+                        self._stream_error("Connection loss or empty frame")
                         self.error_count += 1
-                        time.sleep(2)
+                        self._sleep(2)
                         continue
-                    # Détection écran noir
-                    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-                    mean_pixel = np.mean(gray)
-                    if mean_pixel < 10:
-                        self.black_count += 1
-                        if self.black_count > 10:
-                            self._set_status("BLACK SCREEN")
-                            self._log_event("Black screen detected")
-                    else:
-                        self.black_count = 0
-                    # Détection image figée
-                    if self.last_frame is not None:
-                        diff = cv2.absdiff(frame, self.last_frame)
-                        nonzero = np.count_nonzero(diff)
-                        if nonzero < 1000:
-                            self.frozen_count += 1
-                            if self.frozen_count > 10:
-                                self._set_status("LAG")
-                                self._log_event("Frozen frame detected")
-                        else:
-                            self.frozen_count = 0
-                    self.last_frame = frame.copy()
-                    # Détection silence audio (analyse toutes les 2 minutes avec silencedetect)
-                    if now - last_audio_check > 120:
-                        last_audio_check = now
-                        try:
-                            import subprocess
-                            # Utilisation de silencedetect sur 5s
-                            cmd = [
-                                'ffmpeg', '-y', '-i', self.stream_url,
-                                '-af', 'silencedetect=noise=-40dB:d=10',
-                                '-t', '3',  # Durée analysée réduite à 3s
-                                '-f', 'null', '-'
-                            ]
-                            proc = subprocess.run(cmd, capture_output=True, text=True, timeout=7)
-                            audio_timeout_count = 0  # Reset si succès
-                            # Correction : proc.stderr est déjà str si text=True
-                            err_str = proc.stderr if isinstance(proc.stderr, str) else proc.stderr.decode('utf-8', errors='ignore')
-                            # Chercher la durée du silence détecté
-                            import re
-                            silences = re.findall(r'silence_start: (.*?)\n|silence_end: (.*?) \| silence_duration: (.*?)\n', err_str)
-                            silence_long = False
-                            for silence in silences:
-                                if silence[2]:
-                                    try:
-                                        duration = float(silence[2])
-                                        self._log_event(f"Silence detected: {duration:.1f}s")
-                                        if duration >= 10:
-                                            silence_long = True
-                                    except Exception:
-                                        pass
-                            if silence_long and not silence_detected:
-                                self._set_status("SILENCE AUDIO")
-                                self._log_event("Audio silence detected (>10s)")
-                                silence_detected = True
-                            elif not silence_long:
-                                silence_detected = False
-                        except subprocess.TimeoutExpired:
-                            audio_timeout_count += 1
-                            # hide timeout log except if 3 consecutive
-                            if audio_timeout_count >= 3:
-                                self._log_event('Warning: 3 consecutive timeouts on audio analysis (silencedetect)')
-                            continue  # don't block, continue to next
-                        except Exception as e:
-                            self._log_event(f'Audio analysis error (silencedetect): {e}')
-                    # in the image analysis loop (where you analyze frames for black screen, frozen, etc.)
-                    unsafe_score = content_moderation.detect_nsfw(frame)
-                    if unsafe_score > 0.8:
-                        self._log_event('Inappropriate content detected (NSFW)')
-                        self.add_incident('NSFW', 'Inappropriate content detected (NSFW)')
-                    forbidden = content_moderation.detect_forbidden_text(frame)
-                    if forbidden:
-                        self._log_event(f'Forbidden text detected: {forbidden}')
-                        self.add_incident('FORBIDDEN TEXT', f'Forbidden text detected: {forbidden}')
-                    # unauthorized_logo = content_moderation.detect_unauthorized_logo(frame)
-                    # if unauthorized_logo:
-                    #     self._log_event('Logo non autorisé détecté')
-                    #     self.add_incident('LOGO', 'Logo non autorisé détecté')
-                    # if everything is ok
-                    if self.black_count == 0 and self.frozen_count == 0 and not silence_detected:
-                        self._set_status("OK")
-                    # send frame to GUI
-                    if self.frame_callback:
-                        try:
-                            self.frame_callback(frame)
-                        except Exception as cb_err:
-                            self._log_event(f"Frame callback error: {cb_err}")
-                    time.sleep(0.5)
+                    if self.preview_enabled:
+                        self._publish_preview(frame, frame_time)
+                    if not self._check_audio_silencedetect(now):
+                        continue
+                    self._analyse_frame(frame, now)
+                    self._record_latency(frame_time)
+                    self._sleep(0.5)
                 except Exception as loop_err:
                     self._log_event(f"Exception in monitor_loop: {loop_err}")
-                    time.sleep(2)
+                    self._sleep(2)
         except Exception as fatal_err:
             self._log_event(f"Fatal crash of monitor_loop thread: {fatal_err}")
         finally:
             if cap:
                 cap.release()
 
+    def _check_audio_levels(self):
+        # silence state is maintained continuously by the ingest audio reader, nothing to spawn here
+        tracker = self.silence_tracker
+        if tracker is None:
+            return
+        if tracker.is_silent:
+            # the episode stays open (and is extended) for as long as the audio is silent
+            message = f"Audio silence detected (>{tracker.min_duration:g}s, level {tracker.level_db:.1f} dBFS)"
+            if self.open_episode("SILENCE AUDIO", message):
+                self._log_event(message, stage="audio")
+            self.silence_detected = True
+        elif self.silence_detected:
+            self._log_event(f"Audio back (level {tracker.level_db:.1f} dBFS)", stage="audio")
+            self.silence_detected = False
+            self.close_episode("SILENCE AUDIO")
+
+    def _check_audio_silencedetect(self, now):
+        """returns False when the audio analysis timed out (the frame is then skipped)."""
+        # Détection silence audio (analyse toutes les 2 minutes avec silencedetect)
+        if now - self.last_audio_check > 120:
+            self.last_audio_check = now
+            try:
+                import subprocess
+                # Utilisation de silencedetect sur 5s
+                cmd = [
+                    'ffmpeg', '-y', '-i', self.stream_url,
+                    '-af', 'silencedetect=noise=-40dB:d=10',
+                    '-t', '3',  # Durée analysée réduite à 3s
+                    '-f', 'null', '-'
+                ]
+                proc = subprocess.run(cmd, capture_output=True, text=True, timeout=7)
+                self.audio_timeout_count = 0  # Reset si succès
+                # Correction : proc.stderr est déjà str si text=True
+                err_str = proc.stderr if isinstance(proc.stderr, str) else proc.stderr.decode('utf-8', errors='ignore')
+                # Chercher la durée du silence détecté
+                import re
+                silences = re.findall(r'silence_start: (.*?)\n|silence_end: (.*?) \| silence_duration: (.*?)\n', err_str)
+                silence_long = False
+                for silence in silences:
+                    if silence[2]:
+                        try:
+                            duration = float(silence[2])
+                            self._log_event(f"Silence detected: {duration:.1f}s", stage="audio")
+                            if duration >= 10:
+                                silence_long = True
+                        except Exception:
+                            pass
+                if silence_long:
+                    if self.open_episode("SILENCE AUDIO", "Audio silence detected (>10s)"):
+                        self._log_event("Audio silence detected (>10s)", stage="audio")
+                    self.silence_detected = True
+                else:
+                    self.silence_detected = False
+                    self.close_episode("SILENCE AUDIO")
+            except subprocess.TimeoutExpired:
+                self.audio_timeout_count += 1
+                # hide timeout log except if 3 consecutive
+                if self.audio_timeout_count >= 3:
+                    self._log_event('Warning: 3 consecutive timeouts on audio analysis (silencedetect)', stage="audio")
+                return False  # don't block, continue to next
+            except Exception as e:
+                self._log_event(f'Audio analysis error (silencedetect): {e}', stage="audio")
+        return True
+
+    def _analyse_frame(self, frame, now):
+        # each detector runs at its own cadence, expensive models only on a sampled subset of frames
+        sched = self.scheduler
+        sched.tick(now)
+        self.frames_analysed += 1
+        check_black = sched.due("black", now)
+        check_frozen = sched.due("frozen", now)
+        check_nsfw = sched.due("nsfw", now)
+        check_text = sched.due("forbidden_text", now)
+        check_logo = sched.due("logo", now)
+        self._current_frame = frame  # evidence of the episodes opened while analysing it
+        self.close_episode("ERROR")  # frames are coming in again
+        # image analysis holds a worker slot so that many channels share a bounded CPU budget
+        with self._worker_slot():
+            if check_black or check_frozen:
+                # black screen / frozen frame measured on a small luma thumbnail
+                started = time.perf_counter()
+                mean_luma, changed_ratio = self.luma.update(frame)
+                luma_time = time.perf_counter() - started
+            # Détection écran noir
+            if check_black:
+                sched.record("black", luma_time)
+                if frame_analysis.is_black(mean_luma, self.black_threshold):
+                    self.black_count += 1
+                    if self.black_since is None:
+                        self.black_since = now
+                    if now - self.black_since >= self.black_min_duration:
+                        if self.open_episode("BLACK SCREEN", "Black screen detected"):
+                            self._log_event("Black screen detected", stage="video")
+                else:
+                    self.black_count = 0
+                    self.black_since = None
+                    self.close_episode("BLACK SCREEN")
+            # Détection image figée (a black picture is also unchanged: it is reported as black screen only)
+            if check_frozen and changed_ratio is not None:
+                sched.record("frozen", luma_time)
+                if frame_analysis.is_frozen(changed_ratio, self.frozen_threshold) and self.black_since is None:
+                    self.frozen_count += 1
+                    if self.frozen_since is None:
+                        self.frozen_since = now
+                    if now - self.frozen_since >= self.frozen_min_duration:
+                        if self.open_episode("LAG", "Frozen frame detected"):
+                            self._log_event("Frozen frame detected", stage="video")
+                else:
+                    self.frozen_count = 0
+                    self.frozen_since = None
+                    self.close_episode("LAG")
+            if check_nsfw:
+                if self.moderation_service is not None and self.moderation_service.running:
+                    self._submit_nsfw(frame)
+                else:
+                    started = time.perf_counter()
+                    unsafe_score = content_moderation.detect_nsfw(frame, key=self.channel_name)
+                    sched.record("nsfw", time.perf_counter() - started)
+                    self._handle_nsfw_score(unsafe_score)
+            if check_text:
+                if self.ocr_pool is not None and self.ocr_pool.running:
+                    self._submit_forbidden_text(frame)
+                else:
+                    started = time.perf_counter()
+                    forbidden = content_moderation.detect_forbidden_text(frame, key=self.channel_name, regions=self.ocr_regions)
+                    sched.record("forbidden_text", time.perf_counter() - started)
+                    self._handle_forbidden_text(forbidden)
+            if check_logo:
+                # preloaded template pyramids, searched in the corner regions only
+                started = time.perf_counter()
+                unauthorized_logo = content_moderation.detect_unauthorized_logo(frame, regions=self.logo_regions)
+                sched.record("logo", time.perf_counter() - started)
+                if unauthorized_logo:
+                    if self.open_episode('LOGO', 'Unauthorized logo detected (no authorized logo on screen)'):
+                        self._log_event('Unauthorized logo detected (no authorized logo on screen)', stage="moderation")
+                else:
+                    self.close_episode('LOGO')
+        self._update_status()
+        self._current_frame = None
+        # frames are only copied (the ingest buffer is reused) when someone subscribed to them
+        if self.bus.wants(event_bus.FrameEvent, self.channel_name):
+            self.bus.publish(event_bus.FrameEvent(self.channel_name, frame.copy(), now))
+
+    def _begin_request(self, detector):
+        """returns the request start time, or None if a request of this detector is still in flight."""
+        started = time.perf_counter()
+        pending = self._pending.get(detector)
+        if pending is not None and started - pending < MODERATION_PENDING_TIMEOUT:
+            return None  # one request in flight per channel and detector
+        self._pending[detector] = started
+        return started
+
+    def _end_request(self, detector, started):
+        self._pending.pop(detector, None)
+        self.scheduler.record(detector, time.perf_counter() - started)
+
+    def _submit_nsfw(self, frame):
+        # asynchronous: the score comes back from the moderation service, the capture loop does not wait
+        started = self._begin_request("nsfw")
+        if started is None:
+            return
+        # the ingest buffer is reused before the answer: keep a thumbnail of the frame as evidence
+        thumb = self._evidence_thumbnail(frame)
+
+        def on_score(score):
+            self._end_request("nsfw", started)
+            self._handle_nsfw_score(score, thumb)
+        if not content_moderation.detect_nsfw_async(frame, on_score, self.moderation_service, key=self.channel_name):
+            self._pending.pop("nsfw", None)
+
+    def _submit_forbidden_text(self, frame):
+        # asynchronous: region crops are OCR'd by the persistent OCR workers
+        started = self._begin_request("forbidden_text")
+        if started is None:
+            return
+        thumb = self._evidence_thumbnail(frame)
+
+        def on_text(forbidden):
+            self._end_request("forbidden_text", started)
+            self._handle_forbidden_text(forbidden, thumb)
+        if not content_moderation.detect_forbidden_text_async(frame, on_text, self.ocr_pool, key=self.channel_name,
+                                                              regions=self.ocr_regions):
+            self._pending.pop("forbidden_text", None)
+
+    def _handle_forbidden_text(self, forbidden, frame=None):
+        if forbidden:
+            if self.open_episode('FORBIDDEN TEXT', f'Forbidden text detected: {forbidden}', frame):
+                self._log_event(f'Forbidden text detected: {forbidden}', stage="moderation")
+        else:
+            self.close_episode('FORBIDDEN TEXT')
+
+    def _handle_nsfw_score(self, unsafe_score, frame=None):
+        if unsafe_score is None:
+            return  # inference failed, the episode state is unknown
+        if unsafe_score > 0.8:
+            if self.open_episode('NSFW', 'Inappropriate content detected (NSFW)', frame):
+                self._log_event('Inappropriate content detected (NSFW)', stage="moderation")
+        else:
+            self.close_episode('NSFW')
+
+    def _record_latency(self, frame_time):
+        # detection latency = wall clock time between frame arrival and end of its analysis
+        latency = time.time() - frame_time
+        self.latency_samples.append(latency)
+        self.last_latency = latency
+        now = time.time()
+        if now - self.last_latency_report >= LATENCY_REPORT_INTERVAL and self.latency_samples:
+            samples = sorted(self.latency_samples)
+            p50 = samples[len(samples) // 2]
+            p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+            self._log_event(f"Detection latency: p50={p50 * 1000:.0f} ms, p95={p95 * 1000:.0f} ms over {len(samples)} frames",
+                            stage="perf", latency=p95)
+            self.latency_samples.clear()
+            self.last_latency_report = now
+            # effective rate of each detector over the same period
+            self.detector_rates = self.scheduler.rates(now)
+            self._log_event(f"Detector rates: {DetectorScheduler.format_rates(self.detector_rates)}", stage="perf")
+            cache = content_moderation.cache_stats()
+            self._log_event("Moderation cache hit rate: " + ", ".join(
+                f"{name}={stats['hit_rate'] * 100:.0f}%" for name, stats in cache.items()), stage="perf")
+
+    def _worker_slot(self):
+        if self.worker_slots is None:
+            return contextlib.nullcontext()
+        return self.worker_slots
+
     def _set_status(self, status):
+        """displayed status only: episodes are opened and closed by each condition (open_episode / close_episode)."""
         if status != self.last_status:
+            previous = self.last_status
             self.status = status
-            self._log_event(f"Status change: {status}")
-            self.status_signal.emit(status) # Emit signal instead of direct call
+            # latency: analysis delay of the frame that triggered the change
+            self._log_event(f"Status change: {status}", stage="status", latency=self.last_latency)
+            self.bus.publish(event_bus.StatusEvent(self.channel_name, status, previous, time.time()))
             self.last_status = status
-            if status != "OK":
-                self.add_incident(status, f"Incident detected on stream {self.channel_name}.")
 
-    def _log_event(self, msg):
-        self.logger.info(f"{datetime.now().isoformat()} - {msg}")
-        self.log_signal.emit(f"{datetime.now().strftime('%H:%M:%S')} - {msg}") # Emit signal instead of direct call
+    def _update_status(self):
+        # several conditions can be open at once (black and silent): the first of CONDITION_STATUSES is shown
+        with self._episodes_lock:
+            status = next((s for s in CONDITION_STATUSES if s in self.episodes), "OK")
+        self._set_status(status)
+
+    def _stream_error(self, message):
+        """no frame from the stream: the ERROR episode lasts until the next analysed frame."""
+        self.open_episode("ERROR", message)
+        self._log_event(message, stage="ingest")
+        self._update_status()
+
+    def _log_event(self, msg, stage="monitor", latency=None):
+        """stage: ingest, audio, video, moderation, status, perf or monitor; latency in seconds."""
+        # only queued here: formatting and file writes happen in the event_log thread
+        self.logger.info(msg, extra={"channel": self.channel_name, "stage": stage, "latency": latency})
+        self.bus.publish(event_bus.LogEvent(self.channel_name, msg, stage, latency, time.time()))
 
     def add_incident(self, incident_type, message):
+        """records a one-off incident (no duration), e.g. a simulated one."""
         now = datetime.now()
-        date_str = now.strftime('%Y-%m-%d')
-        heure_str = now.strftime('%H:%M:%S')
-        incident_str = f"{date_str} {heure_str} | {incident_type} | {message}"
+        timestamp = now.strftime('%Y-%m-%d %H:%M:%S')
+        incident_str = f"{timestamp} | {incident_type} | {message}"
         self.incidents.append(incident_str)
-        # save to data/db_name
-        data_dir = os.path.join(os.getcwd(), "data")
-        if not os.path.exists(data_dir):
-            os.makedirs(data_dir)
-        db_path = os.path.join(data_dir, self.db_name)
-        with open(db_path, "a", encoding="utf-8") as f:
-            f.write(incident_str + "\n")
-        # real-time recording in csv_name
-        csv_path = os.path.join(data_dir, self.db_name.replace(".db", ".csv"))
-        write_header = not os.path.exists(csv_path) or os.path.getsize(csv_path) == 0
-        with open(csv_path, "a", encoding="utf-8", newline='') as fout:
-            writer = csv.writer(fout)
-            if write_header:
-                writer.writerow(["Date", "Heure", "Type", "Message"])
-            writer.writerow([date_str, heure_str, incident_type, message])
-        print(incident_str)
+        # queued to the background writer of the incident store: no disk access on the monitor thread
+        incident_store.get_writer().submit(self.channel_name, incident_type, message, ts=timestamp)
+
+    def open_episode(self, incident_type, message, frame=None):
+        """starts an incident episode, or extends the open one of the same type.
+
+        frame: picture saved as evidence of a new episode (default: the frame being analysed).
+        Returns True when a new episode was opened.
+        """
+        now = time.time()
+        writer = incident_store.get_writer()
+        with self._episodes_lock:
+            episode = self.episodes.get(incident_type)
+            if episode is not None:
+                # still going on: last_seen is only written every EPISODE_UPDATE_INTERVAL seconds
+                if now - episode["updated"] >= EPISODE_UPDATE_INTERVAL:
+                    writer.update_episode(episode["key"], datetime.fromtimestamp(now).strftime('%Y-%m-%d %H:%M:%S'))
+                    episode["updated"] = now
+                return False
+            timestamp = datetime.fromtimestamp(now).strftime('%Y-%m-%d %H:%M:%S')
+            evidence = self._store_evidence(frame if frame is not None else self._current_frame)
+            key = writer.open_episode(self.channel_name, incident_type, message, ts=timestamp, evidence=evidence)
+            self.episodes[incident_type] = {"key": key, "start": now, "updated": now}
+        self.incidents.append(f"{timestamp} | {incident_type} | {message}")
+        return True
+
+    def _evidence_thumbnail(self, frame):
+        if not self.evidence_enabled or frame is None:
+            return None
+        return evidence_store.thumbnail(frame)
+
+    def _store_evidence(self, frame):
+        """queues the thumbnail of frame to the evidence store, returns its digest (None: no evidence)."""
+        if not self.evidence_enabled or frame is None:
+            return None
+        try:
+            # downscaling and hashing only: encoding and disk writes happen in the evidence thread
+            return evidence_store.get_evidence_store().submit(evidence_store.thumbnail(frame))
+        except Exception as e:
+            self._log_event(f"Evidence error: {e}")
+            return None
+
+    def close_episode(self, incident_type):
+        with self._episodes_lock:
+            episode = self.episodes.pop(incident_type, None)
+        if episode is None:
+            return
+        now = time.time()
+        duration = now - episode["start"]
+        incident_store.get_writer().close_episode(
+            episode["key"], datetime.fromtimestamp(now).strftime('%Y-%m-%d %H:%M:%S'), round(duration, 1))
+        self._log_event(f"{incident_type} ended after {duration:.0f}s", stage="status")
+
+    def close_all_episodes(self):
+        for incident_type in list(self.episodes):
+            self.close_episode(incident_type)
 
     def export_report(self):
         if self.incidents:
@@ -0,0 +1,168 @@
+import os
+import threading
+import logging
+import time
+import content_moderation
+import incident_store
+import evidence_store
+import event_log
+import event_bus
+from stream_monitor import StreamMonitor
+from async_engine import AsyncEngine, DEFAULT_ANALYSIS_WORKERS
+from moderation_service import ModerationService
+from ocr_pool import OcrPool
+
+# maximum number of channels analysing a frame at the same time (SUPERVISION_MAX_WORKERS, defaults to the CPU count;
+# parsed once by async_engine.cpu_budget, which shares this budget)
+DEFAULT_MAX_WORKERS = DEFAULT_ANALYSIS_WORKERS
+# delay between two channel start-ups, so that 50+ streams are not all opened at the same instant
+START_STAGGER = 0.2
+# "threads": one monitor thread (plus ingest reader threads) per channel; "asyncio": every ffmpeg ingest on one
+# event loop and the analysis on a pool of SUPERVISION_MAX_WORKERS threads, for hundreds of channels
+DEFAULT_ENGINE = os.environ.get("SUPERVISION_ENGINE", "threads")
+
+startup_log = logging.getLogger("startup")
+
+
+class SupervisorPool:
+    """Runs one StreamMonitor per configured channel, all at the same time.
+
+    Monitors keep running whatever channel is displayed: the GUI only
+    subscribes to / unsubscribes from the bus events of the selected one.
+    """
+
+    monitor_class = StreamMonitor
+
+    def __init__(self, channels=None, max_workers=None, moderation_service=True, ocr_workers=None, bus=None,
+                 engine=DEFAULT_ENGINE, compaction=True, preview=False):
+        # status / log / frame events of every monitor
+        self.bus = bus or event_bus.get_bus()
+        self.max_workers = max_workers or DEFAULT_MAX_WORKERS
+        self.worker_slots = threading.BoundedSemaphore(self.max_workers)
+        if engine not in ("threads", "asyncio"):
+            raise ValueError(f"unknown supervision engine {engine!r}, expected 'threads' or 'asyncio'")
+        self.engine = AsyncEngine(self.max_workers) if engine == "asyncio" else None
+        # monitors publish their frames in a shared memory ring for a live preview (the GUI), see frame_ring.py
+        self.preview = preview
+        # NSFW inference of all channels is batched in one separate process, OCR runs on long-lived engines.
+        # Both are only started (and the model only loaded) once a channel with moderation enabled is added.
+        self.moderation_service = None
+        if moderation_service:
+            self.moderation_service = moderation_service if isinstance(moderation_service, ModerationService) \
+                else ModerationService()
+            self.moderation_service.on_ready = self._on_model_ready
+        self.ocr_pool = OcrPool(workers=ocr_workers) if ocr_workers else OcrPool()
+        self._moderation_started = False
+        self._started_at = time.perf_counter()
+        self.monitors = {}  # channel name -> StreamMonitor
+        self._channels = {}  # channel name -> channel config
+        self._lock = threading.Lock()
+        # retention ("retention_days" per channel) and tombstone purge of the incident history
+        # (compaction=False in the worker processes of sharding.py: the coordinator owns the store)
+        self.compaction = None
+        if compaction:
+            store = incident_store.get_store()
+            self.compaction = incident_store.CompactionJob(
+                store, self.retention_days,
+                after=lambda: evidence_store.get_evidence_store().prune(store.evidence_digests()))
+        if channels:
+            self.sync(channels)
+
+    def _start_moderation(self):
+        if self._moderation_started:
+            return
+        self._moderation_started = True
+        if self.moderation_service:
+            self.moderation_service.start()  # the service process warms the model up itself
+        else:
+            content_moderation.warmup(self._on_model_ready)  # background thread, the UI is not blocked
+        self.ocr_pool.start()
+
+    def _on_model_ready(self, load_time):
+        if load_time is None:
+            startup_log.warning("NSFW model could not be loaded")
+        else:
+            startup_log.info(f"NSFW model ready: loaded in {load_time:.2f}s, "
+                             f"{time.perf_counter() - self._started_at:.2f}s after supervisor start")
+
+    def _create_monitor(self, channel):
+        return self.monitor_class(channel["url"], channel["db_name"], channel["name"],
+                                  worker_slots=self.worker_slots, config=channel,
+                                  moderation_service=self.moderation_service, ocr_pool=self.ocr_pool, bus=self.bus,
+                                  engine=self.engine, preview=self.preview)
+
+    def add_channel(self, channel, start=True, delay=0):
+        with self._lock:
+            name = channel["name"]
+            if name in self.monitors:
+                return self.monitors[name]
+            if channel.get("moderation", True):
+                self._start_moderation()
+            monitor = self._create_monitor(channel)
+            self.monitors[name] = monitor
+            self._channels[name] = dict(channel)
+            if self.compaction is not None:
+                self.compaction.start()
+        if start:
+            monitor.start(delay=delay)
+        return monitor
+
+    def remove_channel(self, name):
+        with self._lock:
+            monitor = self.monitors.pop(name, None)
+            self._channels.pop(name, None)
+        if monitor:
+            monitor.stop()
+        return monitor
+
+    def sync(self, channels, start=True):
+        """aligns running monitors on the channel list (new ones started, removed or changed ones stopped)."""
+        wanted = {c["name"]: c for c in channels}
+        for name in list(self.monitors):
+            current = self._channels.get(name)
+            if name not in wanted or current != wanted[name]:
+                self.remove_channel(name)
+        pending = [c for name, c in wanted.items() if name not in self.monitors]
+        for i, channel in enumerate(pending):
+            self.add_channel(channel, start=start, delay=i * START_STAGGER)
+
+    def retention_days(self):
+        with self._lock:
+            return {name: channel.get("retention_days", incident_store.DEFAULT_RETENTION_DAYS)
+                    for name, channel in self._channels.items()}
+
+    def get(self, name):
+        return self.monitors.get(name)
+
+    def start_all(self):
+        for i, monitor in enumerate(list(self.monitors.values())):
+            monitor.start(delay=i * START_STAGGER)
+
+    def stop_all(self):
+        monitors = list(self.monitors.values())
+        # signal every monitor first, then wait: shutdown takes the time of the slowest, not the sum
+        for monitor in monitors:
+            monitor.stop(wait=False)
+        for monitor in monitors:
+            if hasattr(monitor, 'thread'):
+                monitor.thread.join(timeout=10)
+        if self.engine is not None:
+            self.engine.stop()
+        if self.moderation_service:
+            self.moderation_service.stop()
+        self.ocr_pool.stop()
+        self._moderation_started = False
+        if self.compaction is not None:
+            self.compaction.stop()
+        # encode the evidence thumbnails still queued
+        evidence_store.shutdown()
+        # commit the incidents still queued by the monitors
+        incident_store.shutdown()
+        # write the queued channel log records
+        event_log.stop()
+
+    def statuses(self):
+        return {name: monitor.status for name, monitor in self.monitors.items()}
+
+    def __len__(self):
+        return len(self.monitors)
@@ -0,0 +1,88 @@
+import asyncio
+import threading
+import time
+import numpy as np
+import async_engine
+
+
+class FakeIngest:
+    """first ingest: fails as configured; the next ones deliver frames."""
+    created = 0
+
+    def __init__(self, failure):
+        FakeIngest.created += 1
+        self.failure = failure if FakeIngest.created == 1 else None
+        self.reconnect_delay = 0.01
+        self.max_reconnect_delay = 0.1
+        self.frame = np.zeros((4, 4, 3), np.uint8)
+
+    async def run(self):
+        if self.failure == "run":
+            raise OSError("pipe broken")
+        await asyncio.Event().wait()
+
+    async def read(self, timeout=None):
+        await asyncio.sleep(0.01)
+        if self.failure == "read":
+            raise ValueError("bad frame size")
+        if self.failure == "no_frame":
+            return None, None
+        return self.frame, time.time()
+
+
+class FakeMonitor:
+    def __init__(self, failure):
+        self.channel_name = failure
+        self.failure = failure
+        self.running = True
+        self.frames = 0
+        self.logs = []
+        self.closed = threading.Event()
+
+    def create_ingest(self, ingest_class):
+        return FakeIngest(self.failure)
+
+    def on_frame(self, frame, frame_time):
+        self.frames += 1
+
+    def on_no_frame(self, now, no_frame_since):
+        raise KeyError("status bug")
+
+    def _log_event(self, msg, stage="monitor", latency=None):
+        self.logs.append(msg)
+
+    def close_all_episodes(self):
+        self.closed.set()
+
+    def close_frame_ring(self):
+        pass
+
+
+def test_a_failing_channel_restarts_its_ingest_instead_of_stopping():
+    engine = async_engine.AsyncEngine(max_workers=2)
+    try:
+        for failure in ("read", "run", "no_frame"):
+            FakeIngest.created = 0
+            monitor = FakeMonitor(failure)
+            engine.run(monitor)
+            deadline = time.monotonic() + 5
+            while monitor.frames < 3 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert monitor.frames >= 3, failure
+            assert engine.is_running(monitor) and FakeIngest.created == 2
+            assert "ingest restarted in 0.01s" in monitor.logs[0]
+            engine.cancel(monitor)
+            assert monitor.closed.is_set() and not engine.is_running(monitor)
+    finally:
+        engine.stop()
+
+
+def test_cpu_budget_ignores_bad_values(monkeypatch, caplog):
+    monkeypatch.setattr(async_engine.os, "cpu_count", lambda: 6)
+    for value, expected in (("12", 12), ("", 6), ("0", 6), ("-3", 6), ("four", 6)):
+        monkeypatch.setenv("SUPERVISION_MAX_WORKERS", value)
+        caplog.clear()
+        assert async_engine.cpu_budget("SUPERVISION_MAX_WORKERS") == expected
+        assert bool(caplog.records) == (value in ("-3", "four"))
+    monkeypatch.setattr(async_engine.os, "cpu_count", lambda: None)
+    assert async_engine.cpu_budget("SUPERVISION_PROCESSES", minimum=1) == 1
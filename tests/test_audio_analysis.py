@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+import audio_analysis
+
+
+def tone(seconds, amplitude, sample_rate=audio_analysis.DEFAULT_SAMPLE_RATE):
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    return (np.sin(2 * np.pi * 440 * t) * amplitude).astype(np.int16)
+
+
+def test_dbfs_windows_levels_of_complete_windows():
+    samples = np.concatenate((np.full(100, 32767, np.int16), np.full(100, 3277, np.int16), np.zeros(50, np.int16)))
+    levels = audio_analysis.dbfs_windows(samples, 100)
+    assert len(levels) == 2  # the incomplete last window is left out
+    assert levels[0] == pytest.approx(0, abs=0.01)
+    assert levels[1] == pytest.approx(-20, abs=0.01)
+    assert audio_analysis.dbfs_windows(samples[:50], 100).size == 0
+
+
+def test_silence_tracker_reports_silence_after_min_duration_in_stream_time():
+    tracker = audio_analysis.SilenceTracker(min_duration=2.0)
+    tracker.feed(tone(1.0, 10000))
+    assert tracker.silence_duration == 0 and not tracker.is_silent
+    # chunks not aligned on windows: the remainder is kept for the next one
+    for chunk in np.array_split(np.zeros(int(2.05 * tracker.sample_rate), np.int16), 7):
+        tracker.feed(chunk)
+    assert tracker.silence_duration == pytest.approx(2.0)
+    assert tracker.is_silent
+    tracker.feed(tone(0.5, 10000))
+    assert not tracker.is_silent and tracker.level_db > tracker.threshold_db
+
+
+def test_silence_starts_after_the_last_loud_window_of_a_chunk():
+    tracker = audio_analysis.SilenceTracker(min_duration=1.0)
+    tracker.feed(np.concatenate((tone(0.3, 10000), np.zeros(int(0.7 * tracker.sample_rate), np.int16))))
+    assert tracker.silent_since == pytest.approx(0.3)
+    assert tracker.silence_duration == pytest.approx(0.7)
+    tracker.reset()
+    assert tracker.stream_time == 0 and tracker.silent_since is None
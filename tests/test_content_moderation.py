@@ -0,0 +1,48 @@
+import cv2
+import numpy as np
+import content_moderation
+from content_moderation import ModerationCache, perceptual_hash
+
+
+def picture(seed):
+    blocks = np.random.default_rng(seed).integers(20, 230, (9, 16, 3), dtype=np.uint8)
+    return cv2.resize(blocks, (160, 90), interpolation=cv2.INTER_LINEAR)
+
+
+def test_nearly_identical_frames_reuse_the_last_result(monkeypatch):
+    calls = []
+    monkeypatch.setattr(content_moderation, "nsfw_cache", ModerationCache())
+    monkeypatch.setattr(content_moderation, "_nsfw_score", lambda frame: calls.append(frame) or 0.9)
+    frame = picture(0)
+    noise = np.random.default_rng(9).integers(-2, 3, frame.shape)
+    noisy = (frame.astype(int) + noise).astype(np.uint8)  # compression noise
+    distance = bin(perceptual_hash(frame) ^ perceptual_hash(noisy)).count('1')
+    assert distance <= content_moderation.GATE_MAX_DISTANCE
+    assert content_moderation.detect_nsfw(frame, key="a") == 0.9
+    assert content_moderation.detect_nsfw(noisy, key="a") == 0.9
+    assert len(calls) == 1
+    content_moderation.detect_nsfw(picture(1), key="a")  # scene change
+    assert len(calls) == 2
+    assert content_moderation.nsfw_cache.stats() == {"gate_hits": 1, "cache_hits": 0, "misses": 2, "hit_rate": 1 / 3}
+
+
+def test_cache_is_shared_by_callers_and_bounded():
+    cache = ModerationCache(maxsize=2, max_distance=0)
+    cache.store(1, "one", key="a")
+    assert cache.lookup(1, key="b") == "one"  # same picture on another channel: cache hit
+    cache.store(2, "two", key="a")
+    cache.store(4, "four", key="a")
+    assert cache.lookup(1, key="c") is content_moderation._MISS  # least recently used, evicted
+    assert cache.lookup(2, key="c") == "two"
+    assert cache.stats()["cache_hits"] == 2 and cache.stats()["misses"] == 1
+
+
+def test_forbidden_text_is_matched_on_the_cached_text(monkeypatch):
+    calls = []
+    monkeypatch.setattr(content_moderation, "text_cache", ModerationCache())
+    monkeypatch.setattr(content_moderation.ocr_pool, "ocr_crops", lambda crops: calls.append(crops) or "NO SIGNAL")
+    frame = picture(2)
+    assert content_moderation.detect_forbidden_text(frame, key="a") == ["no signal"]
+    # another blacklist on the same picture: no new OCR
+    assert content_moderation.detect_forbidden_text(frame, blacklist=["signal", "logo"], key="a") == ["signal"]
+    assert len(calls) == 1
@@ -0,0 +1,18 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CHECK = """
+import runpy, sys
+runpy.run_path({path!r}, run_name="__mp_main__")  # what a spawned worker does with the parent's main module
+print(sorted({{m.split(".")[0] for m in sys.modules}} & {{"PyQt5", "gui", "matplotlib", "vlc"}}))
+"""
+
+
+def test_spawned_workers_do_not_import_the_gui():
+    for script in ("main.py", "headless.py"):
+        out = subprocess.run([sys.executable, "-c", CHECK.format(path=os.path.join(ROOT, script))], cwd=ROOT,
+                             capture_output=True, text=True, timeout=60)
+        assert out.returncode == 0, out.stderr
+        assert out.stdout.strip() == "[]", script
@@ -0,0 +1,60 @@
+import threading
+import event_bus
+from event_bus import EventBus, FrameEvent, LogEvent, StatusEvent
+
+
+def status(channel, value):
+    return StatusEvent(channel, value, None, 0.0)
+
+
+def test_frames_keep_only_the_latest_ones():
+    bus = EventBus()
+    frames = bus.subscribe(FrameEvent)
+    for i in range(5):
+        bus.publish(FrameEvent("a", i, float(i)))
+    assert [e.frame for e in frames.drain()] == [3, 4]  # drop-oldest, FRAME_QUEUE_SIZE deep
+    assert frames.stats() == {"pending": 0, "delivered": 2, "dropped": 3}
+
+
+def test_full_queue_drops_new_events_by_default():
+    bus = EventBus()
+    statuses = bus.subscribe(StatusEvent, maxsize=2)
+    for value in ("BLACK SCREEN", "OK", "LAG"):
+        bus.publish(status("a", value))
+    assert [e.status for e in statuses.drain()] == ["BLACK SCREEN", "OK"]
+    assert statuses.dropped == 1
+
+
+def test_events_go_to_subscribers_of_their_type_and_channel():
+    bus = EventBus()
+    only_a = bus.subscribe(StatusEvent, channel="a")
+    every_channel = bus.subscribe(StatusEvent)
+    logs = bus.subscribe(LogEvent)
+    bus.publish(status("a", "LAG"))
+    bus.publish(status("b", "OK"))
+    assert [e.channel for e in only_a.drain()] == ["a"]
+    assert [e.channel for e in every_channel.drain()] == ["a", "b"]
+    assert logs.get(timeout=0) is None
+    assert bus.wants(StatusEvent, "b") and not bus.wants(FrameEvent, "a")
+    bus.unsubscribe(every_channel)
+    bus.publish(status("b", "LAG"))
+    assert every_channel.drain() == [] and every_channel.closed
+
+
+def test_callbacks_run_in_the_subscription_thread_and_survive_errors():
+    bus = EventBus()
+    received, done = [], threading.Event()
+
+    def callback(event):
+        if event.status == "ERROR":
+            raise ValueError("subscriber bug")
+        received.append((event.status, threading.current_thread().name))
+        if event.status == "OK":
+            done.set()
+    subscription = bus.subscribe(StatusEvent, callback, name="test")
+    bus.publish(status("a", "ERROR"))
+    bus.publish(status("a", "OK"))
+    assert done.wait(5)
+    bus.unsubscribe(subscription)
+    assert received == [("OK", "EventBus-test")]
+    assert event_bus.get_bus() is event_bus.get_bus()
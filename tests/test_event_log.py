@@ -0,0 +1,51 @@
+import gzip
+import json
+import logging
+import queue
+import event_log
+
+
+def record(msg, **extra):
+    rec = logging.LogRecord("test", logging.INFO, __file__, 1, msg, None, None)
+    rec.__dict__.update(extra)
+    return rec
+
+
+def test_records_are_json_lines():
+    line = event_log.JsonLinesFormatter().format(record("Status change: LAG", channel="a", stage="status", latency=0.0123))
+    entry = json.loads(line)
+    assert entry["channel"] == "a" and entry["stage"] == "status" and entry["msg"] == "Status change: LAG"
+    assert entry["latency_ms"] == 12.3
+    assert "latency_ms" not in json.loads(event_log.JsonLinesFormatter().format(record("x")))
+
+
+def test_rotated_files_are_compressed(tmp_path):
+    path = tmp_path / "stream_events_a.log"
+    handler = event_log.CompressingRotatingFileHandler(str(path), max_bytes=200, backup_count=2)
+    handler.setFormatter(event_log.JsonLinesFormatter())
+    for i in range(20):
+        handler.handle(record(f"line {i} " + "x" * 40, channel="a"))
+    handler.close()
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "stream_events_a.log", "stream_events_a.log.1.gz", "stream_events_a.log.2.gz"]
+    with gzip.open(str(path) + ".1.gz", "rt", encoding="utf-8") as f:
+        assert json.loads(f.readline())["msg"].startswith("line ")
+
+
+def test_full_queue_drops_records_instead_of_blocking():
+    handler = event_log._DroppingQueueHandler(queue.Queue(maxsize=1))
+    handler.handle(record("kept %s", channel="a"))
+    handler.handle(record("dropped", channel="a"))
+    assert handler.dropped == 1
+    assert handler.queue.get_nowait().msg == "kept %s"
+
+
+def test_channel_loggers_write_their_own_file(tmp_path, monkeypatch):
+    event_log.stop()
+    monkeypatch.setattr(event_log, "LOG_DIR", str(tmp_path))
+    event_log.get_channel_logger("Channel A").info("hello", extra={"channel": "Channel A", "stage": "monitor"})
+    event_log.get_channel_logger("b").info("other", extra={"channel": "b", "stage": "monitor"})
+    event_log.stop()  # writes what is queued
+    with open(tmp_path / "stream_events_channel_a.log", encoding="utf-8") as f:
+        assert [json.loads(line)["msg"] for line in f] == ["hello"]
+    assert (tmp_path / "stream_events_b.log").exists()
@@ -0,0 +1,69 @@
+import os
+import threading
+import time
+import numpy as np
+import pytest
+import evidence_store
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = evidence_store.EvidenceStore(root=str(tmp_path / "evidence"))
+    yield store
+    store.stop()
+
+
+def picture(value):
+    return np.full((90, 160, 3), value, dtype=np.uint8)
+
+
+def age(store, key, seconds):
+    # as if the file had been written `seconds` ago
+    path = store.path(key)
+    old = time.time() - seconds
+    os.utime(path, (old, old))
+    return path
+
+
+def test_submit_leaves_the_file_system_to_the_encoder(store, monkeypatch):
+    threads = []
+    path = store.path
+    monkeypatch.setattr(store, "path", lambda key: threads.append(threading.current_thread().name) or path(key))
+    keys = [store.submit(picture(v)) for v in (0, 0, 255)]
+    store.stop()
+    assert keys[0] == keys[1] != keys[2]
+    assert set(threads) == {"EvidenceEncoder"}
+    assert store.stats()["stored"] == 2 and store.stats()["deduplicated"] == 1
+    assert all(os.path.exists(path(key)) for key in keys)
+
+
+def test_a_file_stored_by_an_earlier_run_is_reused(store):
+    key = store.submit(picture(0))
+    store.stop()
+    path = age(store, key, 2 * evidence_store.PRUNE_MIN_AGE)
+
+    restarted = evidence_store.EvidenceStore(root=store.root)
+    assert restarted.submit(picture(0)) == key
+    restarted.stop()
+    assert restarted.stats()["stored"] == 0 and restarted.stats()["deduplicated"] == 1
+    # the new incident is not committed yet: the file it points to is not pruned
+    assert restarted.prune(set()) == 0 and os.path.exists(path)
+
+
+def test_prune_keeps_the_files_reused_by_recent_incidents(store, monkeypatch):
+    reused, stale = store.submit(picture(0)), store.submit(picture(255))
+    store.stop()
+    age(store, reused, 2 * evidence_store.PRUNE_MIN_AGE)
+    stale_path = age(store, stale, 2 * evidence_store.PRUNE_MIN_AGE)
+    # reused again after TOUCH_INTERVAL: the encoder refreshes the file age
+    later = time.monotonic() + evidence_store.TOUCH_INTERVAL
+    monkeypatch.setattr(evidence_store.time, "monotonic", lambda: later)
+    assert store.submit(picture(0)) == reused
+    store.stop()
+
+    assert store.prune(set()) == 1
+    assert store.path(reused) and not os.path.exists(stale_path)
+    # pruned: stored again by the next incident using it
+    assert store.submit(picture(255)) == stale
+    store.stop()
+    assert store.path(stale)
@@ -0,0 +1,91 @@
+import asyncio
+import os
+import stat
+import sys
+import time
+import pytest
+import ffmpeg_ingest
+from audio_analysis import SilenceTracker
+
+FAKE_FFMPEG = """#!{python}
+import sys, time
+# stands for ffmpeg: three 16x8 bgr24 frames filled with 1, 2, 3, then the stream drops
+for value in (1, 2, 3):
+    sys.stdout.buffer.write(bytes([value]) * 16 * 8 * 3)
+    sys.stdout.buffer.flush()
+time.sleep(0.3)
+sys.stderr.write("Connection reset by peer\\n")
+"""
+
+
+def fake_ffmpeg(tmp_path):
+    path = tmp_path / "ffmpeg"
+    path.write_text(FAKE_FFMPEG.format(python=sys.executable))
+    path.chmod(path.stat().st_mode | stat.S_IEXEC)
+    return str(path)
+
+needs_posix = pytest.mark.skipif(os.name == "nt", reason="the fake ffmpeg needs a shebang")
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_command_decodes_to_rawvideo_at_the_analysis_rate():
+    ingest = ffmpeg_ingest.FFmpegIngest("http://example/live.m3u8", width=480, height=270, fps=5)
+    cmd = ingest.build_command()
+    assert cmd[cmd.index('-i') + 1] == "http://example/live.m3u8" and '-reconnect' in cmd
+    assert cmd[cmd.index('-vf') + 1] == 'fps=5.0,scale=480:270'
+    assert cmd[-3:] == ['-f', 'rawvideo', 'pipe:1']
+    audio = ffmpeg_ingest.FFmpegIngest("rtmp://example/live", audio_tracker=SilenceTracker(sample_rate=8000))
+    audio._audio_target = 'pipe:5'
+    cmd = audio.build_command()
+    assert '-reconnect' not in cmd and cmd[-9:] == ['-map', '0:a:0?', '-ac', '1', '-ar', '8000', '-f', 's16le', 'pipe:5']
+
+
+@needs_posix
+def test_frames_are_read_into_the_buffers_and_ffmpeg_restarted(tmp_path):
+    logs = []
+    ingest = ffmpeg_ingest.FFmpegIngest("udp://test", width=16, height=8, reconnect_delay=0.1,
+                                        ffmpeg_bin=fake_ffmpeg(tmp_path), log=logs.append)
+    ingest.start()
+    try:
+        frame, frame_time = ingest.read(timeout=5)
+        assert frame.shape == (8, 16, 3) and frame[0, 0, 0] in (1, 2, 3) and frame_time <= time.time()
+        assert wait_for(lambda: ingest.frames_received >= 3)
+        latest, _ = ingest.read(timeout=1)
+        assert latest is None or latest[0, 0, 0] > frame[0, 0, 0]  # older frames are skipped, never repeated
+        assert wait_for(lambda: ingest.reconnects >= 1)
+        assert any("Connection reset by peer" in line for line in logs)
+        assert wait_for(lambda: ingest.frames_received >= 6)  # restarted after the backoff
+    finally:
+        ingest.stop()
+    assert not ingest.running
+
+
+@needs_posix
+def test_async_ingest_feeds_the_same_buffers(tmp_path):
+    ingest = ffmpeg_ingest.AsyncFFmpegIngest("udp://test", width=16, height=8, reconnect_delay=0.1,
+                                             ffmpeg_bin=fake_ffmpeg(tmp_path))
+
+    async def main():
+        task = asyncio.create_task(ingest.run())
+        try:
+            frame, _ = await ingest.read(timeout=5)
+            assert frame.shape == (8, 16, 3) and frame[0, 0, 0] in (1, 2, 3)
+            for _ in range(500):
+                if ingest.reconnects:
+                    break
+                await asyncio.sleep(0.01)
+            assert ingest.reconnects >= 1
+        finally:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+    asyncio.run(main())
+    assert ingest.frames_received >= 3 and not ingest.running
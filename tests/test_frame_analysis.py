@@ -0,0 +1,28 @@
+import numpy as np
+import frame_analysis
+
+
+def test_black_and_frozen_thresholds_do_not_depend_on_resolution():
+    rng = np.random.default_rng(0)
+    for height, width in ((270, 480), (1080, 1920)):
+        analyzer = frame_analysis.LumaAnalyzer()
+        black = np.full((height, width, 3), 5, np.uint8)
+        mean, changed = analyzer.update(black)
+        assert frame_analysis.is_black(mean) and changed is None
+        assert not frame_analysis.is_frozen(changed)  # nothing to compare the first frame with
+        mean, changed = analyzer.update(black)
+        assert changed == 0 and frame_analysis.is_frozen(changed)
+        picture = rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+        mean, changed = analyzer.update(picture)
+        assert not frame_analysis.is_black(mean)
+        assert changed > 0.5 and not frame_analysis.is_frozen(changed)
+
+
+def test_compression_noise_is_not_a_change():
+    analyzer = frame_analysis.LumaAnalyzer()
+    frame = np.full((90, 160, 3), 128, np.uint8)
+    analyzer.update(frame)
+    _, changed = analyzer.update(frame + np.uint8(frame_analysis.FROZEN_PIXEL_DELTA - 1))
+    assert frame_analysis.is_frozen(changed)
+    analyzer.reset()
+    assert analyzer.luma is None and analyzer.update(frame)[1] is None
@@ -0,0 +1,48 @@
+import os
+import types
+import numpy as np
+import pytest
+import frame_ring
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+QtWidgets = pytest.importorskip("PyQt5.QtWidgets")
+gui = pytest.importorskip("gui", exc_type=ImportError)  # Qt multimedia libraries may be missing
+
+
+@pytest.fixture
+def app():
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+@pytest.fixture
+def ring(monkeypatch):
+    monkeypatch.setattr(frame_ring, "NAME_PREFIX", f"supervision-test-{os.getpid()}")
+    ring = frame_ring.FrameRing.create(frame_ring.ring_name("preview"), 32, 16)
+    yield ring
+    ring.close()
+
+
+def publish(ring, slot, value):
+    ring.begin(slot)
+    ring.frames[slot][...] = value
+    ring.publish(slot, 0.0)
+
+
+def test_preview_shows_a_copy_and_skips_torn_frames(app, ring, monkeypatch):
+    preview = gui.FramePreview()
+    preview.show()
+    preview.set_monitor(types.SimpleNamespace(frame_ring=ring))
+    publish(ring, 0, 10)
+    preview.refresh()
+    assert preview._image.pixelColor(0, 0).red() == 10
+    ring.begin(0)
+    ring.frames[0][...] = 99  # the ingest is writing into the displayed slot: the preview keeps its copy
+    assert preview._image.pixelColor(0, 0).red() == 10
+    ring.publish(0, 0.0)
+    monkeypatch.setattr(ring, "valid", lambda token: False)  # overwritten while copied
+    preview.refresh()
+    assert preview._image.pixelColor(0, 0).red() == 10
+    monkeypatch.undo()
+    preview.refresh()
+    assert preview._image.pixelColor(0, 0).red() == 99
+    preview.close()
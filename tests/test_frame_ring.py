@@ -0,0 +1,68 @@
+import os
+import numpy as np
+import pytest
+import frame_ring
+
+
+@pytest.fixture
+def ring(monkeypatch):
+    monkeypatch.setattr(frame_ring, "NAME_PREFIX", f"supervision-test-{os.getpid()}")
+    ring = frame_ring.FrameRing.create(frame_ring.ring_name("test"), 32, 16)
+    yield ring
+    ring.close()
+
+
+def write(ring, slot, value, frame_time):
+    ring.begin(slot)
+    ring.frames[slot][...] = value
+    ring.publish(slot, frame_time)
+
+
+def test_readers_see_the_latest_published_frame(ring):
+    reader = frame_ring.FrameRing.attach(ring.name)
+    try:
+        assert reader.frame_shape == (16, 32, 3) and reader.slots == frame_ring.DEFAULT_SLOTS
+        assert reader.latest() == (None, None, None)
+        write(ring, 0, 1, 10.0)
+        write(ring, 1, 2, 11.0)
+        frame, frame_time, token = reader.latest()
+        assert (frame == 2).all() and frame_time == 11.0 and reader.valid(token)
+        assert reader.seq == 2
+    finally:
+        reader.close()
+
+
+def test_seqlock_invalidates_a_frame_being_overwritten(ring):
+    write(ring, 1, 5, 1.0)
+    frame, _, token = ring.latest()
+    ring.begin(1)  # the writer comes back to this slot
+    assert not ring.valid(token)
+    assert ring.latest() == (None, None, None)  # latest slot is being written
+    ring.frames[1][...] = 6
+    ring.publish(1, 2.0)
+    frame, frame_time, new_token = ring.latest()
+    assert (frame == 6).all() and frame_time == 2.0
+    assert not ring.valid(token) and ring.valid(new_token)
+
+
+def test_closed_by_the_writer(ring):
+    reader = frame_ring.FrameRing.attach(ring.name)
+    try:
+        write(ring, 0, 1, 1.0)
+        ring.close()
+        assert reader.closed
+        with pytest.raises(FileNotFoundError):
+            frame_ring.FrameRing.attach(ring.name)
+    finally:
+        reader.close()
+    assert reader.latest() == (None, None, None) and reader.seq == 0
+
+
+def test_create_replaces_a_stale_ring(ring):
+    replaced = frame_ring.FrameRing.create(ring.name, 8, 8)
+    try:
+        reader = frame_ring.FrameRing.attach(ring.name)
+        assert reader.frame_shape == (8, 8, 3)
+        reader.close()
+    finally:
+        replaced.close()
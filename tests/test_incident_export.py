@@ -0,0 +1,65 @@
+import csv
+import json
+import pytest
+import incident_export
+import incident_store
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = incident_store.IncidentStore(str(tmp_path / "incidents.sqlite3"))
+    store.add("b", "ERROR", "later", ts="2024-01-02 08:00:00")
+    episode = store.open_episode("a", "BLACK SCREEN", "black", ts="2024-01-01 10:00:00")
+    store.close_episode(episode, "2024-01-01 10:00:30", 30.0)
+    store.open_episode("a", "LAG", "frozen", ts="2024-01-01 12:00:00")
+    store.add("a", "ERROR", "next day", ts="2024-01-02 09:00:00")
+    yield store
+    store.close()
+
+
+def test_csv_export_of_a_channel_and_day(store, tmp_path):
+    path = str(tmp_path / "a.csv")
+    assert incident_export.export(path, store=store, channel="a", date="2024-01-01") == 2
+    with open(path, encoding="utf-8", newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert [r["type"] for r in rows] == ["BLACK SCREEN", "LAG"]  # ordered by time
+    assert rows[0]["duration"] == "30.0" and rows[1]["end_ts"] == ""  # open episode: no end yet
+
+
+def test_jsonl_export_of_every_channel_in_a_range(store, tmp_path):
+    path = str(tmp_path / "all.json")
+    assert incident_export.export(path, store=store, start="2024-01-01 11:00:00", end="2024-01-02 08:30:00") == 2
+    with open(path, encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f]
+    assert [(r["channel"], r["type"]) for r in rows] == [("a", "LAG"), ("b", "ERROR")]
+    assert set(rows[0]) == set(incident_store.COLUMNS) and rows[0]["end_ts"] is None
+
+
+def test_format_from_path():
+    assert incident_export.format_from_path("report.JSON") == "jsonl"
+    with pytest.raises(ValueError):
+        incident_export.format_from_path("report.xlsx")
+
+
+def test_parquet_without_pyarrow_names_the_package(store, tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(incident_export, "pq", None)
+    monkeypatch.setattr(incident_store, "_store", store)
+    assert incident_export.main(["-o", str(tmp_path / "x.parquet")]) == 1
+    assert "pip install pyarrow" in capsys.readouterr().err
+
+
+def test_command_line_type_filter(store, tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(incident_store, "_store", store)
+    path = str(tmp_path / "errors.csv")
+    assert incident_export.main(["-o", path, "--type", "ERROR", "--start", "2024-01-02"]) == 0
+    assert "2 incidents exported" in capsys.readouterr().out
+
+
+def test_parquet_export(store, tmp_path, monkeypatch):
+    pq = pytest.importorskip("pyarrow.parquet")
+    monkeypatch.setattr(incident_export, "PARQUET_ROW_GROUP", 2)
+    path = str(tmp_path / "all.parquet")
+    assert incident_export.export(path, store=store) == 4
+    table = pq.read_table(path)
+    assert table.column_names == list(incident_store.COLUMNS)
+    assert table.column("channel").to_pylist() == ["a", "a", "b", "a"]
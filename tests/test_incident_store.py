@@ -0,0 +1,117 @@
+import datetime
+import incident_store
+
+
+def test_incident_types_lists_known_and_recorded_types(tmp_path):
+    store = incident_store.IncidentStore(str(tmp_path / "incidents.sqlite3"))
+    try:
+        store.add("a", "NSFW", "x")
+        store.add("a", "CUSTOM", "x")
+        store.add("b", "OTHER", "x")
+        assert store.incident_types("a") == list(incident_store.INCIDENT_TYPES) + ["CUSTOM"]
+        assert store.incident_types()[-2:] == ["CUSTOM", "OTHER"]
+    finally:
+        store.close()
+
+
+def test_downtime_is_the_union_of_the_outage_episodes(tmp_path):
+    store = incident_store.IncidentStore(str(tmp_path / "incidents.sqlite3"))
+    try:
+        # 10:00-10:10 black, silent 10:05-10:20 (overlap counted once)
+        black = store.open_episode("a", "BLACK SCREEN", ts="2024-01-01 10:00:00")
+        store.close_episode(black, "2024-01-01 10:10:00", 600)
+        silence = store.open_episode("a", "SILENCE AUDIO", ts="2024-01-01 10:05:00")
+        store.close_episode(silence, "2024-01-01 10:20:00", 900)
+        # started before the period, clipped to its start
+        lag = store.open_episode("a", "LAG", ts="2024-01-01 08:00:00")
+        store.close_episode(lag, "2024-01-01 09:01:00", 3660)
+        # moderation episodes are not outages
+        store.open_episode("a", "LOGO", ts="2024-01-01 09:00:00")
+        store.open_episode("b", "ERROR", ts="2024-01-01 09:00:00")
+        assert store.downtime("a", "2024-01-01 09:00:00", "2024-01-01 11:00:00") == 60 + 20 * 60
+        # still open: counted up to the end of the period
+        store.open_episode("a", "ERROR", ts="2024-01-01 10:50:00")
+        assert store.downtime("a", "2024-01-01 09:00:00", "2024-01-01 11:00:00") == 60 + 30 * 60
+        assert store.downtime("b", "2024-01-01 09:00:00", "2024-01-01 11:00:00") == 2 * 3600
+    finally:
+        store.close()
+
+
+def test_keyset_pages_cover_every_row_once_in_order(tmp_path):
+    store = incident_store.IncidentStore(str(tmp_path / "incidents.sqlite3"))
+    try:
+        with store._conn() as conn:
+            for i in range(25):
+                # equal timestamps by threes: the id breaks the ties between pages
+                store.add("a", "LAG" if i % 2 else "ERROR", f"#{i}", ts=f"2024-01-01 10:00:{i // 3:02d}", conn=conn)
+            store.add("b", "LAG", "other channel", ts="2024-01-01 10:00:00", conn=conn)
+        for order_by, descending in (("ts", False), ("ts", True), ("end_ts", False), ("type", True)):
+            seen, after = [], None
+            while True:
+                rows, after = store.page(10, after=after, channel="a", order_by=order_by, descending=descending)
+                seen += rows
+                if after is None:
+                    break
+            assert seen == store.query(channel="a", order_by=order_by, descending=descending)
+            assert len({row[0] for row in seen}) == 25
+        rows, after = store.page(10, channel="a", incident_type="LAG", descending=True)
+        assert len(rows) == 10 and all(row[3] == "LAG" for row in rows) and rows[0][4] == "#23"
+        assert store.page(10, after=after, channel="a", incident_type="LAG", descending=True)[1] is None
+    finally:
+        store.close()
+
+
+def test_compaction_expires_closed_episodes_and_purges_tombstones(tmp_path):
+    store = incident_store.IncidentStore(str(tmp_path / "incidents.sqlite3"))
+    try:
+        old = store.add("a", "ERROR", "old", ts="2024-01-01 10:00:00")
+        still_open = store.open_episode("a", "LAG", "old but still open", ts="2024-01-01 11:00:00")
+        recent = store.add("a", "ERROR", "recent", ts="2024-03-30 10:00:00")
+        kept = store.add("b", "ERROR", "channel kept forever", ts="2024-01-01 10:00:00")
+        deleted = store.add("b", "LAG", "deleted by the user", ts="2024-03-30 10:00:00")
+        store.delete(deleted)
+        assert store.type_counts("b") == {"ERROR": 1}  # tombstones leave the rollups at once
+
+        result = store.compact(retention={"b": 0}, default_days=30, now=datetime.datetime(2024, 4, 1))
+        assert result == {"expired": 1, "purged": 2}
+        ids = {row[0] for row in store._conn().execute("SELECT id FROM incidents")}
+        assert ids == {still_open, recent, kept} and old not in ids
+        assert store.type_counts("a") == {"ERROR": 1, "LAG": 1}
+        assert store.day_counts("a") == {"2024-01-01": 1, "2024-03-30": 1}
+        assert store.compact(retention={"b": 0}, default_days=30, now=datetime.datetime(2024, 4, 1)) == \
+            {"expired": 0, "purged": 0}
+    finally:
+        store.close()
+
+
+def test_purge_works_in_batches(tmp_path):
+    store = incident_store.IncidentStore(str(tmp_path / "incidents.sqlite3"))
+    try:
+        store.delete([store.add("a", "ERROR", ts="2024-01-01 10:00:00") for _ in range(7)])
+        assert store.purge(batch=3) == 7
+        assert store.count() == 0 and store._conn().execute("SELECT COUNT(*) FROM incidents").fetchone()[0] == 0
+    finally:
+        store.close()
+
+
+def test_rollups_follow_writes_and_match_a_rebuild(tmp_path):
+    store = incident_store.IncidentStore(str(tmp_path / "incidents.sqlite3"))
+    try:
+        store.add("a", "ERROR", ts="2024-01-01 10:15:00")
+        store.add("a", "ERROR", ts="2024-01-01 10:45:00")
+        store.open_episode("a", "LAG", ts="2024-01-01 23:59:59")
+        removed = store.add("a", "NSFW", ts="2024-01-02 00:00:00")
+        store.add("b", "LAG", ts="2024-01-01 10:00:00")
+        store.delete(removed)
+
+        def counts():
+            return (store.total_count("a"), store.type_counts("a"), store.day_counts("a"),
+                    store.hour_counts("a", "2024-01-01"), store.channel_counts(), store.last_date("a"))
+        expected = (3, {"ERROR": 2, "LAG": 1}, {"2024-01-01": 3}, {"10": 2, "23": 1}, {"a": 3, "b": 1}, "2024-01-01")
+        assert counts() == expected
+        store.rebuild_rollups()
+        assert counts() == expected
+        store.clear("a")
+        assert store.total_count("a") == 0 and store.channel_counts() == {"b": 1}
+    finally:
+        store.close()
@@ -0,0 +1,97 @@
+import sqlite3
+import threading
+import time
+import incident_store
+
+
+def make_writer(tmp_path):
+    store = incident_store.IncidentStore(str(tmp_path / "incidents.sqlite3"))
+    writer = incident_store.IncidentWriter(store, flush_interval=0.05)
+    writer.start()
+    return store, writer
+
+
+def rows(store):
+    return store._conn().execute("SELECT type, end_ts, duration FROM incidents ORDER BY id").fetchall()
+
+
+def test_failed_batch_forgets_rolled_back_episodes(tmp_path, monkeypatch):
+    store, writer = make_writer(tmp_path)
+    try:
+        kept = writer.open_episode("ch", "LAG", ts="2024-01-01 00:00:00")
+        writer.flush()
+
+        add = store.add
+
+        def failing_add(channel, incident_type, message="", ts=None, conn=None):
+            if message == "boom":
+                raise sqlite3.OperationalError("disk I/O error")
+            return add(channel, incident_type, message, ts, conn=conn)
+        monkeypatch.setattr(store, "add", failing_add)
+
+        # one batch: the new episode, the close of the committed one, then the failing insert
+        lost = writer.open_episode("ch", "BLACK SCREEN", ts="2024-01-01 00:00:01")
+        writer.close_episode(kept, "2024-01-01 00:00:02", 2.0)
+        writer.submit("ch", "ERROR", "boom", ts="2024-01-01 00:00:02")
+        writer.flush()
+        assert writer.stats()["errors"] == 1
+        assert rows(store) == [("LAG", None, None)]
+        assert lost not in writer._rows and kept in writer._rows
+
+        # the committed episode can still be closed, the rolled back one is reported, not written
+        monkeypatch.setattr(store, "add", add)
+        writer.close_episode(kept, "2024-01-01 00:00:05", 5.0)
+        writer.update_episode(lost, "2024-01-01 00:00:05")
+        writer.close_episode(lost, "2024-01-01 00:00:05", 4.0)
+        writer.flush()
+        assert rows(store) == [("LAG", "2024-01-01 00:00:05", 5.0)]
+        assert writer.stats()["orphaned"] == 2
+        assert writer._rows == {} and writer._lost == set()
+    finally:
+        writer.stop()
+        store.close()
+
+
+def test_listeners_get_the_channels_of_each_commit(tmp_path):
+    store, writer = make_writer(tmp_path)
+    commits = []
+    writer.add_listener(commits.append)
+    try:
+        key = writer.open_episode("a", "LAG")
+        writer.submit("b", "ERROR")
+        writer.flush()
+        writer.close_episode(key, "2024-01-01 00:00:05", 5.0)
+        writer.flush()
+        writer.remove_listener(commits.append)
+        writer.submit("c", "ERROR")
+        writer.flush()
+        assert commits == [{"a", "b"}, {"a"}]
+    finally:
+        writer.stop()
+        store.close()
+
+
+def test_flush_gives_up_on_a_stuck_writer(tmp_path, monkeypatch):
+    store = incident_store.IncidentStore(str(tmp_path / "incidents.sqlite3"))
+    writer = incident_store.IncidentWriter(store, flush_interval=0.05, max_pending=2)
+    release = threading.Event()
+    add = store.add
+
+    def stuck_add(*args, **kwargs):
+        release.wait()
+        return add(*args, **kwargs)
+    monkeypatch.setattr(store, "add", stuck_add)
+    writer.start()
+    try:
+        writer.submit("ch", "ERROR", "stuck", ts="2024-01-01 00:00:00")
+        time.sleep(0.2)  # taken by the writer thread, blocked in its batch
+        assert writer.submit("ch", "ERROR", "a") and writer.submit("ch", "ERROR", "b")  # queue full
+        started = time.monotonic()
+        assert writer.flush(timeout=0.2) is False
+        assert time.monotonic() - started < 1
+    finally:
+        release.set()
+    assert writer.flush() is True
+    writer.stop()
+    assert store.count() == 3
+    store.close()
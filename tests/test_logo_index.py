@@ -0,0 +1,41 @@
+import os
+import cv2
+import numpy as np
+import logo_index
+
+
+def logo(seed):
+    blocks = np.random.default_rng(seed).integers(0, 256, (8, 16), dtype=np.uint8)
+    return cv2.resize(blocks, (160, 80), interpolation=cv2.INTER_NEAREST)
+
+
+def frame_with(image, scale):
+    frame = np.full((540, 960, 3), 40, np.uint8)
+    small = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    h, w = small.shape
+    frame[20:20 + h, 900 - w:900] = cv2.cvtColor(small, cv2.COLOR_GRAY2BGR)  # top right corner
+    return frame
+
+
+def test_logo_found_at_a_pyramid_scale_in_its_corner(tmp_path):
+    cv2.imwrite(str(tmp_path / "channel.png"), logo(0))
+    index = logo_index.LogoIndex(str(tmp_path))
+    index.refresh(force=True)
+    assert len(index) == 1 and [t.shape for t in index.logos[0][1]][0] == (80, 160)
+    assert index.find(frame_with(logo(0), 0.5)) == "channel.png"
+    assert index.find(frame_with(logo(1), 0.5)) is None  # another logo
+    assert index.find(frame_with(logo(0), 0.5), regions={"top_left": [0.0, 0.0, 0.3, 0.25]}) is None
+
+
+def test_index_rebuilt_when_the_directory_changes(tmp_path):
+    index = logo_index.LogoIndex(str(tmp_path))
+    index.refresh(force=True)
+    assert len(index) == 0
+    cv2.imwrite(str(tmp_path / "a.png"), logo(0))
+    index.refresh()
+    assert len(index) == 0  # directory checked at most every RELOAD_CHECK_INTERVAL seconds
+    index.refresh(force=True)
+    assert len(index) == 1
+    os.remove(tmp_path / "a.png")
+    index.refresh(force=True)
+    assert len(index) == 0
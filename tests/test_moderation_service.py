@@ -0,0 +1,51 @@
+import queue
+import threading
+import numpy as np
+import content_moderation
+import moderation_service
+
+
+class AliveProcess:
+    def is_alive(self):
+        return True
+
+
+def test_frames_of_every_channel_are_inferred_in_batches(monkeypatch):
+    batches = []
+    monkeypatch.setattr(content_moderation, "get_detector", lambda: None)
+    monkeypatch.setattr(content_moderation, "nsfw_scores_batch",
+                        lambda frames: batches.append(len(frames)) or [float(f[0, 0, 0]) for f in frames])
+    requests, results = queue.Queue(), queue.Queue()
+    for i in range(5):
+        frame = np.full((4, 4, 3), i, np.uint8)
+        requests.put((i, frame.shape, frame.tobytes()))
+    requests.put(None)
+    moderation_service._service_main(requests, results, max_batch=3, max_wait=1.0)
+    assert results.get()[0] == "ready"
+    assert results.get() == [(0, 0.0, None), (1, 1.0, None), (2, 2.0, None)]
+    assert results.get() == [(3, 3.0, None), (4, 4.0, None)]  # stop request ends the last batch early
+    assert results.get() is None
+    assert batches == [3, 2]
+
+
+def test_submit_downscales_and_results_reach_the_callbacks():
+    service = moderation_service.ModerationService(max_pending=2)
+    service.process = AliveProcess()  # no service process: the queues are read by the test
+    service._results = queue.Queue()
+    received = []
+    assert service.submit(np.zeros((1080, 1920, 3), np.uint8), lambda score, error: received.append((score, error)))
+    assert service.submit(np.zeros((100, 100, 3), np.uint8), lambda score, error: received.append((score, error)))
+    assert not service.submit(np.zeros((100, 100, 3), np.uint8), lambda score, error: None)  # saturated
+    first = service._requests.get(timeout=5)
+    assert first[1] == (180, 320, 3) and len(first[2]) == 180 * 320 * 3
+    collector = threading.Thread(target=service._collect)
+    collector.start()
+    service._results.put(("ready", 1.5))
+    service._results.put([(first[0], 0.9, None)])
+    service._results.put(None)
+    collector.join(5)
+    assert service.load_time == 1.5 and received == [(0.9, None)]
+    service.process = None
+    service._fail_pending("stopped")
+    assert received[-1] == (None, "stopped")
+    assert service.stats() == {"submitted": 2, "completed": 1, "dropped": 1, "pending": 0}
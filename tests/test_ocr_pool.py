@@ -0,0 +1,62 @@
+import types
+import numpy as np
+import ocr_pool
+
+
+def test_stitch_stacks_regions_in_one_image():
+    crops = [np.zeros((20, 100), np.uint8), np.full((30, 60), 7, np.uint8)]
+    image = ocr_pool.stitch(crops)
+    assert image.shape == (20 + ocr_pool.STITCH_GAP + 30, 100)
+    assert (image[:20] == 0).all()
+    assert (image[20:20 + ocr_pool.STITCH_GAP] == 255).all()
+    assert (image[-30:, :60] == 7).all() and (image[-30:, 60:] == 255).all()
+
+
+def test_fallback_without_tesserocr_runs_one_process_per_check(monkeypatch):
+    calls = []
+    monkeypatch.setattr(ocr_pool, "tesserocr", None)
+    monkeypatch.setattr(ocr_pool.pytesseract, "image_to_string", lambda image, lang: calls.append(image) or "TEXT")
+    crops = ocr_pool.crop_regions(np.zeros((540, 960, 3), np.uint8))
+    assert len(crops) == len(ocr_pool.DEFAULT_OCR_REGIONS)
+    assert ocr_pool._Engine().read_all(crops) == "TEXT"
+    assert len(calls) == 1
+
+
+def fake_tesserocr(engines):
+    class PyTessBaseAPI:
+        def __init__(self, lang):
+            self.images, self.ended = [], False
+            engines.append(self)
+
+        def SetImageBytes(self, data, width, height, bpp, bpl):
+            assert len(data) == width * height == height * bpl and bpp == 1
+            self.images.append((width, height))
+
+        def GetUTF8Text(self):
+            return f"region {len(self.images)}"
+
+        def End(self):
+            self.ended = True
+    return types.SimpleNamespace(PyTessBaseAPI=PyTessBaseAPI)
+
+
+def test_pool_workers_keep_one_engine_for_every_check(monkeypatch):
+    engines = []
+    monkeypatch.setattr(ocr_pool, "tesserocr", fake_tesserocr(engines))
+    monkeypatch.setattr(ocr_pool.pytesseract, "image_to_string", no_process)
+    pool = ocr_pool.OcrPool(workers=1)
+    pool.start()
+    frame = np.zeros((540, 960, 3), np.uint8)
+    try:
+        for _ in range(5):
+            text = pool.submit(ocr_pool.crop_regions(frame)).result(timeout=5)
+    finally:
+        pool.stop()
+    regions = len(ocr_pool.DEFAULT_OCR_REGIONS)
+    assert text.splitlines()[-1] == f"region {5 * regions}"
+    # one engine loaded for the worker's lifetime, no process per check
+    assert len(engines) == 1 and len(engines[0].images) == 5 * regions and engines[0].ended
+
+
+def no_process(*args, **kwargs):
+    raise AssertionError("pytesseract must not be used when tesserocr is available")
@@ -0,0 +1,48 @@
+from scheduler import DetectorScheduler, DEFAULT_CADENCES
+
+
+def run(scheduler, name, frames, fps=5.0):
+    runs = []
+    for i in range(frames):
+        now = i / fps
+        scheduler.tick(now)
+        if scheduler.due(name, now):
+            runs.append(i)
+    return runs
+
+
+def test_every_n_frames_override_replaces_default_interval():
+    scheduler = DetectorScheduler({"forbidden_text": {"every_n_frames": 25}})
+    assert scheduler.cadences["forbidden_text"] == {"every_n_frames": 25}
+    # 5 fps: every 25 frames is every 5 s, faster than the default 10 s interval
+    assert run(scheduler, "forbidden_text", 101) == [0, 25, 50, 75, 100]
+
+
+def test_enabled_only_override_keeps_default_cadence():
+    scheduler = DetectorScheduler({"nsfw": {"enabled": True}})
+    assert scheduler.cadences["nsfw"] == dict(DEFAULT_CADENCES["nsfw"], enabled=True)
+    assert not DetectorScheduler({"logo": {"enabled": False}}).enabled("logo")
+
+
+def test_default_cadences():
+    scheduler = DetectorScheduler()
+    assert run(scheduler, "black", 5) == [0, 1, 2, 3, 4]
+    # 5 fps for 21 s: the NSFW model every 5 s, the logo search every 30 s
+    assert run(DetectorScheduler(), "nsfw", 105) == [0, 25, 50, 75, 100]
+    assert run(DetectorScheduler(), "logo", 105) == [0]
+    assert not DetectorScheduler({"logo": {"enabled": False}}).due("logo", 0)
+
+
+def test_rates_since_last_report():
+    scheduler = DetectorScheduler({"logo": {"enabled": False}})
+    for i in range(50):
+        now = 1000 + i / 5
+        scheduler.tick(now)
+        if scheduler.due("nsfw", now):
+            scheduler.record("nsfw", 0.2)
+    rates = scheduler.rates(1010.0)
+    assert rates["frames"] == 5.0
+    assert rates["nsfw"] == (0.2, 0.2)  # 2 runs in 10 s, 200 ms each
+    assert "logo" not in rates
+    assert scheduler.rates(1020.0)["nsfw"] == (0.0, 0.0)  # counters reset by the previous report
+    assert "nsfw=0.00/s (0 ms)" in DetectorScheduler.format_rates(scheduler.rates(1030.0))
@@ -0,0 +1,39 @@
+import queue
+import sharding
+import incident_store
+
+
+def test_worker_episode_keys_are_mapped_to_coordinator_rows(tmp_path):
+    store = incident_store.IncidentStore(str(tmp_path / "incidents.sqlite3"))
+    writer = incident_store.IncidentWriter(store, flush_interval=0.05)
+    writer.start()
+    # coordinator side only: no worker process is spawned
+    supervisor = sharding.ShardedSupervisor.__new__(sharding.ShardedSupervisor)
+    supervisor._episodes, supervisor.writer, supervisor.bus = {}, writer, None
+    results = queue.Queue()
+    workers = [sharding.RemoteIncidentWriter(slot, results) for slot in (0, 1)]
+    try:
+        # both workers number their episodes from 1: the keys collide across processes
+        assert workers[0].open_episode("a", "BLACK SCREEN", ts="2024-01-01 10:00:00") == 1
+        assert workers[1].open_episode("b", "LAG", ts="2024-01-01 10:00:00") == 1
+        workers[0].update_episode(1, "2024-01-01 10:00:30")
+        workers[0].close_episode(1, "2024-01-01 10:01:00", 60.0)
+        workers[1].submit("b", "ERROR", "one-off", ts="2024-01-01 10:00:05")
+        workers[1].close_episode(7, "2024-01-01 10:01:00", 60.0)  # unknown key: ignored
+        while not results.empty():
+            kind, slot, op = results.get()
+            assert kind == "incident"
+            supervisor._handle(kind, slot, op)
+        assert list(supervisor._episodes) == [(1, 1)]
+        # worker 1 died: its open episode is closed by the coordinator
+        supervisor._close_episodes(1)
+        assert supervisor._episodes == {}
+        writer.flush()
+        rows = store._conn().execute("SELECT channel, type, end_ts, duration FROM incidents ORDER BY id").fetchall()
+        assert rows[0] == ("a", "BLACK SCREEN", "2024-01-01 10:01:00", 60.0)
+        assert rows[1][:2] == ("b", "LAG") and rows[1][2] is not None and rows[1][3] > 0
+        assert rows[2] == ("b", "ERROR", "2024-01-01 10:00:05", 0)
+        assert workers[0].stats()["written"] == 3
+    finally:
+        writer.stop()
+        store.close()
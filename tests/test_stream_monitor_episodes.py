@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+import event_log
+import incident_store
+import stream_monitor
+
+FPS = 5
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def time(self):
+        return self.now
+
+    def perf_counter(self):
+        return self.now
+
+
+class RecordingWriter:
+    """records the episodes instead of writing them."""
+
+    def __init__(self):
+        self.episodes = []
+
+    def start(self):
+        pass
+
+    def open_episode(self, channel, incident_type, message="", ts=None, evidence=None):
+        self.episodes.append({"type": incident_type, "duration": None})
+        return len(self.episodes) - 1
+
+    def update_episode(self, key, last_seen):
+        pass
+
+    def close_episode(self, key, end_ts, duration):
+        self.episodes[key]["duration"] = duration
+
+
+@pytest.fixture
+def monitor(tmp_path, monkeypatch):
+    clock = FakeClock()
+    writer = RecordingWriter()
+    monkeypatch.setattr(event_log, "LOG_DIR", str(tmp_path))
+    monkeypatch.setattr(stream_monitor, "time", clock)
+    monkeypatch.setattr(incident_store, "_writer", writer)
+    config = {"moderation": False, "evidence": False, "detectors": {"logo": {"enabled": False}}}
+    monitor = stream_monitor.StreamMonitor("lavfi://test", "test.db", "test", config=config)
+    monitor.clock, monitor.writer = clock, writer
+    return monitor
+
+
+def feed(monitor, seconds, frame, level):
+    """seconds of frames at FPS, with the audio of each frame period fed before it is analysed."""
+    rng = np.random.default_rng(0)
+    samples = int(monitor.silence_tracker.sample_rate / FPS)
+    for _ in range(int(seconds * FPS)):
+        audio = (rng.standard_normal(samples) * level).astype(np.int16)
+        monitor.silence_tracker.feed(audio)
+        monitor.on_frame(frame() if callable(frame) else frame, monitor.clock.now)
+        monitor.clock.now += 1 / FPS
+
+
+def test_sustained_black_and_silence_give_one_episode_per_condition(monitor):
+    rng = np.random.default_rng(1)
+    black = np.zeros((90, 160, 3), dtype=np.uint8)
+    feed(monitor, 12, black, level=0)
+    assert monitor.status == "BLACK SCREEN"
+    assert set(monitor.episodes) == {"BLACK SCREEN", "SILENCE AUDIO"}
+    feed(monitor, 2, lambda: rng.integers(0, 256, (90, 160, 3), dtype=np.uint8), level=8000)
+    assert monitor.status == "OK" and not monitor.episodes
+
+    episodes = {e["type"]: e["duration"] for e in monitor.writer.episodes}
+    assert len(monitor.writer.episodes) == len(episodes) == 2  # no LAG, no episode reopened
+    # black for 12 s, reported after BLACK_MIN_DURATION; silent for 12 s, reported after the silence min duration
+    assert episodes["BLACK SCREEN"] == pytest.approx(12 - stream_monitor.BLACK_MIN_DURATION, abs=0.25)
+    assert episodes["SILENCE AUDIO"] == pytest.approx(12 - monitor.silence_tracker.min_duration, abs=0.25)